@@ -1,9 +1,13 @@
+import logging
 import tkinter as tk
 from tkinter import ttk, messagebox
-from services.auth_service import AuthService
+from services.registry import get_service, warm_for_role
+from ui.dispatch import get_dispatcher
 from PIL import Image, ImageTk, ImageFilter, ImageEnhance, ImageOps
 import os
 
+log = logging.getLogger(__name__)
+
 
 class App(tk.Tk):
     def __init__(self):
@@ -31,7 +35,6 @@ class App(tk.Tk):
             relief=[("pressed", "sunken"), ("active", "raised")],
         )
 
-        self.auth = AuthService()
         self.current_user = None
 
         # Resolve assets directory relative to this file
@@ -149,16 +152,25 @@ class App(tk.Tk):
         ttk.Entry(login_frame, textvariable=password_var, show="*", width=32).grid(row=1, column=1, padx=8, pady=8)
 
         def on_login():
-            user = self.auth.login(email_var.get().strip(), password_var.get())
-            if not user or user["role"] != role:
-                messagebox.showerror("Login failed", "Invalid credentials or role mismatch")
-                return
-            self.current_user = user
-            messagebox.showinfo("Success", f"Welcome {user['full_name']}")
-            # Route to role dashboard
-            self.show_dashboard(user["role"]) 
+            def _done(user):
+                if not user or user["role"] != role:
+                    messagebox.showerror("Login failed", "Invalid credentials or role mismatch")
+                    return
+                self.current_user = user
+                # Build the dashboard's services while the welcome dialog is open
+                warm_for_role(user["role"])
+                messagebox.showinfo("Success", f"Welcome {user['full_name']}")
+                # Route to role dashboard
+                self.show_dashboard(user["role"])
+            # bcrypt + DB round trip run on a worker so the window stays responsive
+            get_dispatcher(self).submit(
+                get_service("auth").login, email_var.get().strip(), password_var.get(),
+                on_done=_done, on_error=lambda e: messagebox.showerror("Login failed", str(e)),
+                key="auth", busy=(login_btn,), name="login",
+            )
 
-        ttk.Button(login_frame, text="Login", style="Role.TButton", command=on_login).grid(row=2, column=0, columnspan=2, pady=12)
+        login_btn = ttk.Button(login_frame, text="Login", style="Role.TButton", command=on_login)
+        login_btn.grid(row=2, column=0, columnspan=2, pady=12)
 
         # Register tab
         reg_fields = {
@@ -174,20 +186,22 @@ class App(tk.Tk):
             ttk.Entry(register_frame, textvariable=var, show=show, width=32).grid(row=i, column=1, padx=8, pady=8)
 
         def on_register():
-            try:
-                self.auth.register(
-                    reg_fields["College ID"].get().strip(),
-                    reg_fields["Full Name"].get().strip(),
-                    reg_fields["Email"].get().strip(),
-                    reg_fields["Password"].get(),
-                    role,
-                )
+            def _done(_):
                 messagebox.showinfo("Registered", "Registration successful. You can now login.")
                 nb.select(0)
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            get_dispatcher(self).submit(
+                get_service("auth").register,
+                reg_fields["College ID"].get().strip(),
+                reg_fields["Full Name"].get().strip(),
+                reg_fields["Email"].get().strip(),
+                reg_fields["Password"].get(),
+                role,
+                on_done=_done, on_error=lambda e: messagebox.showerror("Error", str(e)),
+                key="auth", busy=(register_btn,), name="register",
+            )
 
-        ttk.Button(register_frame, text="Register", style="Role.TButton", command=on_register).grid(row=len(reg_fields), column=0, columnspan=2, pady=12)
+        register_btn = ttk.Button(register_frame, text="Register", style="Role.TButton", command=on_register)
+        register_btn.grid(row=len(reg_fields), column=0, columnspan=2, pady=12)
 
     def _render_background(self):
         w = max(self.winfo_width(), 1)
@@ -234,7 +248,7 @@ class App(tk.Tk):
             img = img.resize(size, Image.LANCZOS)
             return ImageTk.PhotoImage(img)
         except Exception:
-            print(f"[UI] Role image missing or failed to load: {path}")
+            log.warning("Role image missing or failed to load: %s", path)
             # Placeholder if missing
             ph = Image.new("RGBA", size, (255, 255, 255, 0))
             return ImageTk.PhotoImage(ph)
@@ -379,6 +393,7 @@ class App(tk.Tk):
         
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
     app = App()
     app.mainloop()
 
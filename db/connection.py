@@ -1,16 +1,252 @@
-import mysql.connector
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
 
 DB_HOST = "localhost"
 DB_PORT = 3306
 DB_USER = "root"
-DB_PASSWORD = "Raviabhinav0" 
+DB_PASSWORD = "Raviabhinav0"
 DB_NAME = "parking_management"
 
+# Pool tuning; override through the environment on busy gate PCs
+POOL_SIZE = int(os.environ.get("PARKING_DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.environ.get("PARKING_DB_POOL_TIMEOUT", "10"))
+POOL_MAX_LIFETIME = float(os.environ.get("PARKING_DB_POOL_MAX_LIFETIME", "1800"))
+
+
 def get_connection():
+    # Imported here so the driver is only loaded once a connection is needed
+    import mysql.connector
+
     return mysql.connector.connect(
         host=DB_HOST,
         port=DB_PORT,
         user=DB_USER,
         password=DB_PASSWORD,
         database=DB_NAME,
-    )
\ No newline at end of file
+    )
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class DatabaseUnavailable(Exception):
+    """MySQL could not be reached, or the connection dropped mid-operation."""
+
+
+class ConnectError(DatabaseUnavailable):
+    """No connection could be had at all, so nothing was sent to the server.
+
+    Unlike a plain DatabaseUnavailable (the link dropped mid-transaction,
+    possibly during commit), the caller knows the write did not happen.
+    """
+
+
+# Client errors meaning the server is unreachable rather than the query failing
+# (can't connect, unknown host, server gone away, connection lost)
+_UNAVAILABLE_ERRNOS = {2002, 2003, 2005, 2006, 2013, 2055}
+
+
+def _unavailable(e: BaseException) -> bool:
+    return getattr(e, "errno", None) in _UNAVAILABLE_ERRNOS or isinstance(e, (ConnectionError, TimeoutError))
+
+
+class ConnectionPool:
+    """Fixed-size pool of MySQL connections shared by all services.
+
+    Connections are pinged on borrow (reconnecting if the server dropped
+    them) and recycled once older than ``max_lifetime`` seconds.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT,
+                 max_lifetime: float = POOL_MAX_LIFETIME, connect=get_connection):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle: list = []
+        self._created_at: dict[int, float] = {}
+        self._in_use = 0
+        self._closed = False
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._reconnects = 0
+        self._recycled = 0
+        self._fault = None
+
+    def _open(self):
+        conn = self._connect()
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn):
+        """Return a usable connection: recycled if too old, reconnected if dropped."""
+        created = self._created_at.get(id(conn), 0.0)
+        if self.max_lifetime and time.monotonic() - created > self.max_lifetime:
+            self._discard(conn)
+            self._recycled += 1
+            return self._open()
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Exception:
+            pass
+        try:
+            conn.reconnect(attempts=1, delay=0)
+            self._created_at[id(conn)] = time.monotonic()
+            self._reconnects += 1
+            return conn
+        except Exception:
+            self._discard(conn)
+            self._reconnects += 1
+            return self._open()
+
+    def inject_fault(self, fault) -> None:
+        """Call ``fault()`` before every checkout (it should raise); None clears it. See db/fault_injection.py."""
+        self._fault = fault
+
+    def acquire(self):
+        try:
+            return self._acquire()
+        except Exception as e:
+            if _unavailable(e):
+                raise ConnectError(str(e)) from e
+            raise
+
+    def _acquire(self):
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._in_use + len(self._idle) < self.size:
+                    conn = None
+                    break
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection free after {self.timeout:.1f}s")
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                elapsed = time.monotonic() - started
+                self._waits += 1
+                self._wait_total += elapsed
+                self._wait_max = max(self._wait_max, elapsed)
+        if self._fault is not None:
+            try:
+                self._fault()
+            except Exception:
+                # Injected outage: hand the untouched connection back
+                self._put_back(conn)
+                raise
+        # Network work happens outside the lock so other threads are not blocked
+        try:
+            return self._open() if conn is None else self._healthy(conn)
+        except Exception:
+            self._put_back(None)
+            raise
+
+    def _put_back(self, conn) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if conn is not None:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def release(self, conn, broken: bool = False) -> None:
+        if not broken:
+            try:
+                # End any open transaction so the next borrower sees fresh data
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                broken = True
+        with self._cond:
+            self._in_use -= 1
+            if broken or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            if _unavailable(e):
+                # The outcome of an in-flight commit is unknown; callers decide whether to retry
+                raise DatabaseUnavailable(str(e)) from e
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_avg_ms": (self._wait_total / self._waits * 1000.0) if self._waits else 0.0,
+                "wait_max_ms": self._wait_max * 1000.0,
+                "reconnects": self._reconnects,
+                "recycled": self._recycled,
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    with get_pool().connection() as conn:
+        yield conn
@@ -0,0 +1,154 @@
+"""EXPLAIN every static query in services/ and fail on unindexed scans.
+
+Finds SQL string literals (SELECT / UPDATE / DELETE) in services/*.py with
+the ast module, substitutes a literal for each %s placeholder and runs
+EXPLAIN against the configured database. Any table read with type ALL fails
+the check, including one where the optimizer passed over a usable index,
+unless the query is in ALLOW_FULL_SCAN (bulk jobs that read whole tables on
+purpose, or tables that stay tiny). Run it against a database holding
+realistic row counts; on near-empty tables MySQL may scan regardless.
+Queries assembled at run time (f-strings, .format templates) are listed as
+skipped. Run after `python -m db.migrate`:
+
+    python -m db.explain_check [-v]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import re
+import sys
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES_DIR = os.path.join(ROOT, "services")
+
+# "file.py:function" pairs (or "file.py:function:table") allowed to scan
+ALLOW_FULL_SCAN = {
+    "kpi_service.py:reconcile",  # recount from source tables
+    "kpi_service.py:snapshot",  # kpi_counters holds a handful of rows
+    "data_versions.py:current",  # one row per domain
+    "rollup_service.py:backfill",  # rebuild from full history
+    "rollup_service.py:zones",  # zone_occupancy: one row per zone
+    "slot_index.py:_fetch",  # full slot load on startup
+    "plate_directory.py:<module>",  # full directory load at login; deltas use updated_at
+}
+
+# Modules whose SQL runs against local SQLite files, not MySQL
+SKIP_FILES = {"ocr_cache.py", "local_snapshot.py", "offline_queue.py"}
+
+_SQL_START = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.I)
+
+
+class Query(NamedTuple):
+    file: str
+    function: str
+    line: int
+    sql: str
+    dynamic: bool
+
+
+class _Finder(ast.NodeVisitor):
+    def __init__(self, fname: str):
+        self.fname = fname
+        self.stack: list[str] = []
+        self.queries: list[Query] = []
+
+    def _scoped(self, node) -> None:
+        self.stack.append(node.name)
+        self.generic_visit(node)
+        self.stack.pop()
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _scoped
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        if isinstance(node.value, str) and _SQL_START.match(node.value):
+            self._add(node, node.value, dynamic="{" in node.value)
+
+    def visit_JoinedStr(self, node: ast.JoinedStr) -> None:
+        head = node.values[0] if node.values else None
+        if isinstance(head, ast.Constant) and isinstance(head.value, str) and _SQL_START.match(head.value):
+            self._add(node, head.value, dynamic=True)
+        # Do not descend: the literal pieces of an f-string are not queries
+
+    def _add(self, node, sql: str, dynamic: bool) -> None:
+        func = self.stack[-1] if self.stack else "<module>"
+        self.queries.append(Query(self.fname, func, node.lineno, " ".join(sql.split()), dynamic))
+
+
+def find_queries(directory: str = SERVICES_DIR) -> list[Query]:
+    out = []
+    for fname in sorted(os.listdir(directory)):
+        if not fname.endswith(".py") or fname in SKIP_FILES:
+            continue
+        with open(os.path.join(directory, fname), encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=fname)
+        finder = _Finder(fname)
+        finder.visit(tree)
+        out.extend(finder.queries)
+    return out
+
+
+def _bindable(sql: str) -> str:
+    # EXPLAIN needs literals; the plan does not depend on the actual value here
+    return sql.replace("%s", "1")
+
+
+def _allowed(q: Query, table: str) -> bool:
+    return f"{q.file}:{q.function}" in ALLOW_FULL_SCAN or f"{q.file}:{q.function}:{table}" in ALLOW_FULL_SCAN
+
+
+def check(conn, queries: list[Query], verbose: bool = False) -> list[str]:
+    failures = []
+    for q in queries:
+        where = f"{q.file}:{q.line} ({q.function})"
+        if q.dynamic:
+            if verbose:
+                print(f"SKIP {where}: built at run time")
+            continue
+        cur = conn.cursor(dictionary=True)
+        try:
+            cur.execute("EXPLAIN " + _bindable(q.sql))
+            plan = cur.fetchall() or []
+        except Exception as e:
+            failures.append(f"{where}: EXPLAIN failed: {e}")
+            continue
+        finally:
+            cur.close()
+        for row in plan:
+            table = row.get("table") or ""
+            scan = row.get("type") == "ALL"
+            if scan and not _allowed(q, table):
+                keys = row.get("possible_keys")
+                why = f"index(es) {keys} not used" if keys else "no usable index"
+                failures.append(f"{where}: full scan of {table}, {why} -- {q.sql[:100]}")
+            elif verbose:
+                key = row.get("key") or "-"
+                note = " (allowed)" if scan and _allowed(q, table) else ""
+                print(f"OK   {where}: {table or '-'} type={row.get('type')} key={key}{note}")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Check that service queries use indexes")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+    sys.path.insert(0, ROOT)
+    from db.connection import get_connection
+
+    queries = find_queries()
+    conn = get_connection()
+    try:
+        failures = check(conn, queries, args.verbose)
+    finally:
+        conn.close()
+    static = sum(not q.dynamic for q in queries)
+    print(f"Checked {static} queries ({len(queries) - static} built at run time, skipped)")
+    for f in failures:
+        print(f"FAIL {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Simulated database outages for exercising the offline gate mode.
+
+``Outage`` makes the shared connection pool fail every checkout with a
+"can't connect" error, exactly as if MySQL were unreachable, without
+touching the server. The drill below uses it against a live database: it
+parks and releases a throwaway vehicle during a simulated outage, checks the
+operations were queued and applied locally, ends the outage, replays the
+queue and verifies the database. Fixture rows are removed unless ``--keep``;
+the KPI counters, rollups and data versions are rebuilt afterwards either way.
+
+    python -m db.fault_injection [--keep]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+from typing import Optional
+
+from db.connection import ConnectionPool, get_pool
+
+
+class InjectedOutage(Exception):
+    """Stands in for the driver's "Can't connect to MySQL server" error."""
+
+    errno = 2003
+
+
+class Outage:
+    """Context manager: the pool behaves as if MySQL were down until exit."""
+
+    def __init__(self, pool: Optional[ConnectionPool] = None):
+        self.pool = pool or get_pool()
+        self.refused = 0
+
+    def _refuse(self) -> None:
+        self.refused += 1
+        raise InjectedOutage("Can't connect to MySQL server (injected outage)")
+
+    def start(self) -> None:
+        self.pool.inject_fault(self._refuse)
+
+    def stop(self) -> None:
+        self.pool.inject_fault(None)
+
+    def __enter__(self) -> "Outage":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _setup(tag: str) -> tuple[int, int, str, str]:
+    from db.connection import pooled_connection
+
+    zone, plate = f"FI{tag[:6]}", f"FI{tag[:8]}".upper()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO users (college_id, full_name, email, password_hash, role, is_profile_verified)"
+                " VALUES (%s,%s,%s,%s,'guard',1)",
+                (f"fault-{tag}", "Outage Drill", f"fault-{tag}@example.invalid", "!"),
+            )
+            user_id = cur.lastrowid
+            cur.execute("INSERT INTO vehicles (user_id, plate_number, is_active) VALUES (%s,%s,1)", (user_id, plate))
+            vehicle_id = cur.lastrowid
+            cur.executemany(
+                "INSERT INTO slots (code, zone, level, status) VALUES (%s,%s,'F','available')",
+                [(f"{zone}-{i}", zone) for i in range(2)],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return user_id, vehicle_id, zone, plate
+
+
+def _verify(vehicle_id: int, zone: str) -> list[str]:
+    from db.connection import pooled_connection
+
+    problems = []
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT status FROM parking_events WHERE vehicle_id=%s", (vehicle_id,))
+        statuses = [s for (s,) in cur.fetchall()]
+        if statuses != ["exited"]:
+            problems.append(f"expected one exited event, found {statuses}")
+        cur.execute("SELECT COUNT(*) FROM active_sessions WHERE vehicle_id=%s", (vehicle_id,))
+        if cur.fetchone()[0]:
+            problems.append("vehicle still has an active session")
+        cur.execute("SELECT code FROM slots WHERE zone=%s AND status<>'available'", (zone,))
+        problems.extend(f"slot {code} left occupied" for (code,) in cur.fetchall())
+        cur.close()
+    return problems
+
+
+def _cleanup(user_id: int, zone: str) -> None:
+    from db.connection import pooled_connection
+
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM active_sessions WHERE user_id=%s", (user_id,))
+            cur.execute("DELETE FROM flags WHERE raised_by_guard_id=%s", (user_id,))
+            cur.execute(
+                "DELETE pe FROM parking_events pe JOIN vehicles v ON v.id=pe.vehicle_id WHERE v.user_id=%s",
+                (user_id,),
+            )
+            cur.execute("DELETE FROM vehicles WHERE user_id=%s", (user_id,))
+            cur.execute("DELETE FROM slots WHERE zone=%s", (zone,))
+            cur.execute("DELETE FROM users WHERE id=%s", (user_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def _repair() -> None:
+    """Rebuild KPI counters and rollups from the tables and bump every data version.
+
+    The fixture rows are written and deleted directly, bypassing the
+    bookkeeping the services do, so without this the dashboards would keep
+    counting them.
+    """
+    from db.connection import pooled_connection
+    from services.data_versions import DOMAINS, touch
+    from services.kpi_service import KPIService
+    from services.rollup_service import RollupService
+
+    KPIService().reconcile()
+    RollupService().backfill()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            touch(cur, *DOMAINS)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Offline gate drill against a simulated outage")
+    ap.add_argument("--keep", action="store_true", help="leave the fixture rows in place")
+    args = ap.parse_args(argv)
+    # A scratch queue so the drill never mixes with a real gate's backlog
+    os.environ["PARKING_OFFLINE_QUEUE_PATH"] = os.path.join(tempfile.mkdtemp(), "drill_queue.db")
+    os.environ["PARKING_OFFLINE_MODE"] = "1"
+    # Replay by hand below, not from the background retry thread
+    os.environ["PARKING_OFFLINE_RETRY"] = "3600"
+    from services.offline_queue import QUEUED, get_offline_queue
+    from services.parking_service import ParkingService
+    from services.plate_directory import get_plate_directory
+    from services.slot_index import get_slot_index
+
+    user_id, vehicle_id, zone, plate = _setup(uuid.uuid4().hex)
+    parking = ParkingService()
+    queue = get_offline_queue()
+    problems: list[str] = []
+    try:
+        get_slot_index().refresh()
+        get_plate_directory().refresh()
+        with Outage() as outage:
+            slot = parking.allocate_next(vehicle_id, user_id, zone=zone, strict=True)
+            if slot is None:
+                problems.append("no slot handed out while offline")
+            elif get_slot_index().free_count(zone) != 1:
+                problems.append("offline allocation was not applied to the local slot index")
+            if parking.process_exit(plate) != QUEUED:
+                problems.append("offline exit was not queued")
+            elif get_slot_index().free_count(zone) != 2:
+                problems.append("offline exit did not free the slot locally")
+            if len(queue) != 2:
+                problems.append(f"{len(queue)} operations queued, expected 2")
+        print(f"Outage refused {outage.refused} connection attempts; {len(queue)} operations queued")
+        applied, conflicts = queue.replay(parking._replay_handlers(), parking._on_conflict)
+        if (applied, conflicts) != (2, 0) or len(queue):
+            problems.append(f"replay applied {applied}, conflicts {conflicts}, {len(queue)} still pending")
+        problems += _verify(vehicle_id, zone)
+    finally:
+        queue.stop()
+        try:
+            if not args.keep:
+                _cleanup(user_id, zone)
+        finally:
+            _repair()
+
+    for p in problems:
+        print(f"FAIL: {p}")
+    if not problems:
+        print("OK: offline entry and exit replayed")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
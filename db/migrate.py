@@ -0,0 +1,229 @@
+"""Apply db/migrations/NNNN_name.sql in order and record them in schema_version.
+
+Each file runs once. CREATE INDEX and ALTER TABLE ... ADD COLUMN are
+checked against information_schema first and skipped if already in place
+(MySQL has no IF NOT EXISTS for them), so a partly applied migration or a
+database created from schema.sql can be migrated safely.
+
+    python -m db.migrate              # apply pending migrations
+    python -m db.migrate --dry-run    # show what would run
+    python -m db.migrate --status
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from typing import NamedTuple, Optional
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_CREATE_INDEX_RE = re.compile(
+    r"^CREATE\s+(UNIQUE\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?\s*\((.+)\)\s*$", re.I | re.S
+)
+_ADD_COLUMN_RE = re.compile(r"^ALTER\s+TABLE\s+`?(\w+)`?\s+ADD\s+COLUMN\s+`?(\w+)`?", re.I)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+    checksum: str
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> list[Migration]:
+    found = []
+    for fname in sorted(os.listdir(directory)):
+        m = _FILE_RE.match(fname)
+        if not m:
+            continue
+        path = os.path.join(directory, fname)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found.append(Migration(int(m.group(1)), m.group(2), path, checksum))
+    versions = [m.version for m in found]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version in " + directory)
+    return found
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a script on ';' at end of line, dropping '--' comment lines."""
+    statements, current = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            stmt = "\n".join(current).strip().rstrip(";").strip()
+            if stmt:
+                statements.append(stmt)
+            current = []
+    tail = "\n".join(current).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def _index_columns(cols: str) -> list[str]:
+    # "status, entry_time" / "`code`(10) DESC" -> bare column names
+    return [re.split(r"[\s(]", c.strip().strip("`"), 1)[0].strip("`").lower() for c in cols.split(",")]
+
+
+class Migrator:
+    def __init__(self, conn, out=print):
+        self.conn = conn
+        self.out = out
+
+    def ensure_version_table(self) -> None:
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+              version INT PRIMARY KEY,
+              name VARCHAR(120) NOT NULL,
+              checksum CHAR(64) NOT NULL,
+              applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.close()
+
+    def has_version_table(self) -> bool:
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME='schema_version'"
+        )
+        exists = cur.fetchone() is not None
+        cur.close()
+        return exists
+
+    def applied(self) -> dict[int, tuple[str, str]]:
+        # Read-only callers (--dry-run, --status) must not create the table
+        if not self.has_version_table():
+            return {}
+        cur = self.conn.cursor()
+        cur.execute("SELECT version, name, checksum FROM schema_version ORDER BY version")
+        rows = {v: (n, c) for v, n, c in cur.fetchall() or []}
+        cur.close()
+        return rows
+
+    def _skip_reason(self, stmt: str) -> Optional[str]:
+        """Why an idempotent-by-inspection statement does not need to run."""
+        m = _CREATE_INDEX_RE.match(stmt)
+        if m:
+            name, table, cols = m.group(2), m.group(3), _index_columns(m.group(4))
+            indexes = self._indexes(table)
+            if name.lower() in indexes:
+                return f"index {name} exists"
+            for other, other_cols in indexes.items():
+                if other_cols[: len(cols)] == cols:
+                    return f"index {name} is covered by {other}"
+            return None
+        m = _ADD_COLUMN_RE.match(stmt)
+        if m:
+            cur = self.conn.cursor()
+            cur.execute(
+                """
+                SELECT 1 FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME=%s AND COLUMN_NAME=%s
+                """,
+                (m.group(1), m.group(2)),
+            )
+            exists = cur.fetchone() is not None
+            cur.close()
+            return f"column {m.group(1)}.{m.group(2)} exists" if exists else None
+        return None
+
+    def _indexes(self, table: str) -> dict[str, list[str]]:
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME=%s
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+            """,
+            (table,),
+        )
+        indexes: dict[str, list[str]] = {}
+        for name, col in cur.fetchall() or []:
+            indexes.setdefault(name.lower(), []).append(col.lower())
+        cur.close()
+        return indexes
+
+    def pending(self, migrations: list[Migration]) -> list[Migration]:
+        done = self.applied()
+        for m in migrations:
+            if m.version in done and done[m.version][1] != m.checksum:
+                self.out(f"WARNING: {os.path.basename(m.path)} changed after it was applied")
+        return [m for m in migrations if m.version not in done]
+
+    def run(self, migrations: list[Migration], dry_run: bool = False, target: Optional[int] = None) -> int:
+        if not dry_run:
+            self.ensure_version_table()
+        todo = [m for m in self.pending(migrations) if target is None or m.version <= target]
+        if not todo:
+            self.out("Schema is up to date")
+            return 0
+        for m in todo:
+            self.out(f"{'Would apply' if dry_run else 'Applying'} {m.version:04d}_{m.name}")
+            with open(m.path, encoding="utf-8") as f:
+                statements = split_statements(f.read())
+            for stmt in statements:
+                first_line = stmt.splitlines()[0][:90]
+                reason = self._skip_reason(stmt)
+                if reason:
+                    self.out(f"  skip: {reason}")
+                    continue
+                self.out(f"  {'would run' if dry_run else 'run'}: {first_line}")
+                if not dry_run:
+                    cur = self.conn.cursor()
+                    try:
+                        cur.execute(stmt)
+                        # Drain results so the connection is ready for the next statement
+                        if cur.with_rows:
+                            cur.fetchall()
+                    finally:
+                        cur.close()
+            if not dry_run:
+                # DDL commits implicitly in MySQL; record the version once every statement succeeded
+                cur = self.conn.cursor()
+                cur.execute(
+                    "INSERT INTO schema_version (version, name, checksum) VALUES (%s,%s,%s)",
+                    (m.version, m.name, m.checksum),
+                )
+                self.conn.commit()
+                cur.close()
+        return len(todo)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Apply database migrations")
+    ap.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    ap.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    ap.add_argument("--to", type=int, dest="target", help="stop after this version")
+    args = ap.parse_args(argv)
+
+    from db.connection import get_connection
+
+    conn = get_connection()
+    try:
+        migrator = Migrator(conn)
+        migrations = discover()
+        if args.status:
+            done = migrator.applied()
+            for m in migrations:
+                state = "applied" if m.version in done else "pending"
+                print(f"{m.version:04d}_{m.name}: {state}")
+            return 0
+        migrator.run(migrations, dry_run=args.dry_run, target=args.target)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
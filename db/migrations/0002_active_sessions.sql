@@ -0,0 +1,27 @@
+-- One row per vehicle currently parked; maintained in the same transaction
+-- as allocate/exit. The keys make a second active session impossible.
+CREATE TABLE IF NOT EXISTS active_sessions (
+  vehicle_id BIGINT PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  plate_number VARCHAR(20) NOT NULL,
+  slot_id BIGINT NOT NULL,
+  event_id BIGINT NOT NULL,
+  entry_time DATETIME NOT NULL,
+  UNIQUE KEY uq_active_plate (plate_number),
+  UNIQUE KEY uq_active_slot (slot_id),
+  UNIQUE KEY uq_active_event (event_id),
+  KEY idx_active_user (user_id),
+  FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
+  FOREIGN KEY (user_id) REFERENCES users(id),
+  FOREIGN KEY (slot_id) REFERENCES slots(id),
+  FOREIGN KEY (event_id) REFERENCES parking_events(id)
+);
+
+-- Backfill active_sessions from existing active events (safe to rerun).
+-- If a vehicle or slot has several active events only the newest is kept;
+-- close the others by hand.
+INSERT IGNORE INTO active_sessions (vehicle_id, user_id, plate_number, slot_id, event_id, entry_time)
+SELECT v.id, v.user_id, v.plate_number, pe.slot_id, pe.id, pe.entry_time
+FROM parking_events pe JOIN vehicles v ON v.id=pe.vehicle_id
+WHERE pe.status='active'
+ORDER BY pe.entry_time DESC, pe.id DESC;
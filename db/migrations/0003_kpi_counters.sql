@@ -0,0 +1,8 @@
+-- Dashboard counters, bumped in the same transaction as the change they
+-- count (see services/kpi_service.py). `day` is set for daily counters.
+CREATE TABLE IF NOT EXISTS kpi_counters (
+  name VARCHAR(32) PRIMARY KEY,
+  value BIGINT NOT NULL DEFAULT 0,
+  day DATE,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
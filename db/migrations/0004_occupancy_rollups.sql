@@ -0,0 +1,26 @@
+-- Occupancy rollups (see services/rollup_service.py). zone is '' for slots
+-- without a zone and '*' for the whole lot.
+CREATE TABLE IF NOT EXISTS occupancy_hourly (
+  bucket DATETIME NOT NULL,
+  zone VARCHAR(20) NOT NULL DEFAULT '',
+  entries INT NOT NULL DEFAULT 0,
+  exits INT NOT NULL DEFAULT 0,
+  dwell_seconds BIGINT NOT NULL DEFAULT 0,
+  peak_occupancy INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (zone, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS occupancy_daily (
+  day DATE NOT NULL,
+  zone VARCHAR(20) NOT NULL DEFAULT '',
+  entries INT NOT NULL DEFAULT 0,
+  exits INT NOT NULL DEFAULT 0,
+  dwell_seconds BIGINT NOT NULL DEFAULT 0,
+  peak_occupancy INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (zone, day)
+);
+
+CREATE TABLE IF NOT EXISTS zone_occupancy (
+  zone VARCHAR(20) PRIMARY KEY,
+  current INT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,27 @@
+-- Exited events moved out of parking_events by services/archive_service.py.
+-- Monthly RANGE partitions on exit_time are split out of pmax as needed;
+-- partitioned tables cannot carry foreign keys.
+CREATE TABLE IF NOT EXISTS parking_events_archive (
+  id BIGINT NOT NULL,
+  vehicle_id BIGINT NOT NULL,
+  slot_id BIGINT NOT NULL,
+  guard_user_id BIGINT NOT NULL,
+  entry_time DATETIME NOT NULL,
+  exit_time DATETIME NOT NULL,
+  status ENUM('active','exited') DEFAULT 'exited',
+  ocr_plate_text VARCHAR(32),
+  ocr_confidence DECIMAL(5,2),
+  PRIMARY KEY (id, exit_time),
+  KEY idx_archive_vehicle (vehicle_id, exit_time)
+)
+PARTITION BY RANGE (TO_DAYS(exit_time)) (
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- Live and archived events together, for history and reports
+CREATE OR REPLACE VIEW parking_events_history AS
+  SELECT id, vehicle_id, slot_id, guard_user_id, entry_time, exit_time, status, ocr_plate_text, ocr_confidence
+  FROM parking_events
+  UNION ALL
+  SELECT id, vehicle_id, slot_id, guard_user_id, entry_time, exit_time, status, ocr_plate_text, ocr_confidence
+  FROM parking_events_archive;
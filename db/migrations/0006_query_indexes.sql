@@ -0,0 +1,17 @@
+-- Indexes for the hot lookups in services/. CREATE INDEX is skipped by
+-- db/migrate.py when an index with the same name or columns already exists.
+
+-- Vehicle history and "is this vehicle parked" checks
+CREATE INDEX idx_events_vehicle_status ON parking_events (vehicle_id, status);
+-- Today's entries (KPI reconcile) as a range scan
+CREATE INDEX idx_events_entry ON parking_events (entry_time);
+-- Verification lookups by member
+CREATE INDEX idx_verifications_user ON verifications (user_id);
+-- Pending verification queue, newest first
+CREATE INDEX idx_verifications_status ON verifications (status, id);
+-- Open flags, newest first
+CREATE INDEX idx_flags_status_created ON flags (status, created_at);
+-- Slot index reconciliation
+CREATE INDEX idx_slot_changed ON slots (last_changed_at);
+-- Free slots by zone/level in code order
+CREATE INDEX idx_slot_zone ON slots (status, zone, level, code);
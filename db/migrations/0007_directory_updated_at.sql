@@ -0,0 +1,8 @@
+-- Change tracking for the guard station's plate directory
+-- (services/plate_directory.py), which pulls only rows changed since its
+-- last sync. ON UPDATE keeps the columns current without touching the
+-- services that write these tables.
+ALTER TABLE vehicles ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+ALTER TABLE users ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+CREATE INDEX idx_vehicle_updated ON vehicles (updated_at);
+CREATE INDEX idx_users_updated ON users (updated_at);
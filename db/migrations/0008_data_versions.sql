@@ -0,0 +1,9 @@
+-- Version counter per data domain, bumped in the same transaction as the
+-- writes to it (see services/data_versions.py). Polling dashboards compare
+-- these instead of re-running their queries.
+CREATE TABLE IF NOT EXISTS data_versions (
+  domain VARCHAR(32) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+INSERT IGNORE INTO data_versions (domain) VALUES ('slots'), ('events'), ('flags'), ('verifications');
@@ -0,0 +1,7 @@
+-- Ids of offline gate operations already applied (services/offline_queue.py).
+-- Each replayed write inserts its id in the same transaction, so a replay
+-- retried after a dropped commit is recognised instead of applied twice.
+CREATE TABLE IF NOT EXISTS applied_ops (
+  op_id CHAR(32) PRIMARY KEY,
+  applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,3 @@
+-- Registrations and vehicle changes move the admin KPI tiles too, so they
+-- get their own data_versions rows (see services/data_versions.py).
+INSERT IGNORE INTO data_versions (domain) VALUES ('users'), ('vehicles');
@@ -1,11 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from services.admin_service import AdminService
+from services.registry import get_service
+from ui.dispatch import get_dispatcher
+from ui.live import LiveRefresh
+from ui.paged_tree import PagedTree
 
-_admin = AdminService()
+
+def _admin():
+    return get_service("admin")
+
+
+def _load_kpis() -> list[int]:
+    kpis = get_service("kpi").snapshot()
+    return [kpis["users"], kpis["guards"], kpis["vehicles"], kpis["open_flags"]]
 
 
 def render(parent, on_logout, current_user=None):
+    dispatcher = get_dispatcher(parent)
+    admin_id = (current_user or {}).get('id') or 0
+
     wrapper = ttk.Frame(parent)
     wrapper.grid(row=0, column=0)
 
@@ -37,56 +50,143 @@ def render(parent, on_logout, current_user=None):
     kpi_row.grid(row=0, column=0, pady=(0, 12))
     def chip(lbl, val):
         f = ttk.Labelframe(kpi_row, text=lbl, style="Glass.TLabelframe")
-        ttk.Label(f, text=str(val)).grid(row=0, column=0, padx=8, pady=8)
+        f.value = ttk.Label(f, text=str(val))
+        f.value.grid(row=0, column=0, padx=8, pady=8)
         return f
-    chips = [
-        ("Users", _admin.count_users()),
-        ("Guards", _admin.count_guards()),
-        ("Vehicles", _admin.count_vehicles()),
-        ("Open Flags", _admin.count_open_flags()),
-    ]
-    for idx, (lbl, val) in enumerate(chips):
-        chip(lbl, val).grid(row=0, column=idx, padx=6)
-
-    # Verification queue
-    rows = _admin.list_pending_verifications()
-    ttk.Label(verify_tab, text=f"Pending: {len(rows)}").grid(row=0, column=0, padx=8, pady=8, sticky="w")
-    for i, r in enumerate(rows, start=1):
-        row_f = ttk.Frame(verify_tab)
-        row_f.grid(row=i, column=0, sticky="w", pady=4)
-        ttk.Label(row_f, text=f"{r['full_name']} ({r['email']})").grid(row=0, column=0, padx=8)
-        def _approve(r=r):
-            try:
-                _admin.set_verification_status(r['id'], reviewer_id=(current_user or {}).get('id') or 0, status='approved')
-                messagebox.showinfo("Verify", "Approved.")
-            except Exception as e:
-                messagebox.showerror("Verify", str(e))
-        def _reject(r=r):
-            try:
-                _admin.set_verification_status(r['id'], reviewer_id=(current_user or {}).get('id') or 0, status='rejected')
-                messagebox.showinfo("Verify", "Rejected.")
-            except Exception as e:
-                messagebox.showerror("Verify", str(e))
-        ttk.Button(row_f, text="Approve", style="Role.TButton", command=_approve).grid(row=0, column=1, padx=6)
-        ttk.Button(row_f, text="Reject", style="Role.TButton", command=_reject).grid(row=0, column=2, padx=6)
-
-    # Flags
-    flags = _admin.list_open_flags()
-    ttk.Label(flags_tab, text=f"Open Flags: {len(flags)}").grid(row=0, column=0, padx=8, pady=8, sticky="w")
-    for i, f in enumerate(flags, start=1):
-        row_f = ttk.Frame(flags_tab)
-        row_f.grid(row=i, column=0, sticky="w", pady=4)
-        ttk.Label(row_f, text=f"#{f['id']} - {f['reason']} by {f['raised_by']} at {f['created_at']}").grid(row=0, column=0, padx=8)
-        note_var = tk.StringVar(value="")
-        ttk.Entry(row_f, textvariable=note_var, width=30).grid(row=0, column=1, padx=6)
-        def _close(f=f, note_var=note_var):
-            try:
-                _admin.close_flag(f['id'], admin_user_id=(current_user or {}).get('id') or 0, note=note_var.get() or None)
-                messagebox.showinfo("Flag", "Closed.")
-            except Exception as e:
-                messagebox.showerror("Flag", str(e))
-        ttk.Button(row_f, text="Close", style="Role.TButton", command=_close).grid(row=0, column=2, padx=6)
+    chips = []
+    for idx, lbl in enumerate(("Users", "Guards", "Vehicles", "Open Flags")):
+        c = chip(lbl, "…")
+        c.grid(row=0, column=idx, padx=6)
+        chips.append(c)
+    def _show_kpis(values):
+        for c, val in zip(chips, values):
+            c.value.config(text=str(val))
+    dispatcher.submit(_load_kpis, on_done=_show_kpis, key="admin_kpis")
 
-    return wrapper
+    # Today's traffic, from the occupancy rollups
+    today = ttk.Labelframe(dash_tab, text="Today", style="Glass.TLabelframe")
+    today.grid(row=1, column=0, sticky="w", pady=(0, 12))
+    today_labels = {}
+    for idx, (key, lbl) in enumerate((("current", "Inside now"), ("entries", "Entries"), ("exits", "Exits"),
+                                       ("peak_occupancy", "Peak"), ("avg_dwell_minutes", "Avg stay (min)"))):
+        ttk.Label(today, text=f"{lbl}:").grid(row=0, column=idx * 2, padx=(8, 2), pady=8, sticky="w")
+        today_labels[key] = ttk.Label(today, text="…")
+        today_labels[key].grid(row=0, column=idx * 2 + 1, padx=(0, 8), pady=8, sticky="w")
+    def _show_today(stats):
+        for key, label in today_labels.items():
+            val = stats[key]
+            label.config(text=f"{val:.0f}" if isinstance(val, float) else str(val))
+    def _load_today():
+        dispatcher.submit(get_service("rollup").today, on_done=_show_today, key="admin_today")
+    _load_today()
+
+    def _on_dashboard_change(topics):
+        if topics & {"flags", "users", "vehicles"}:
+            dispatcher.submit(_load_kpis, on_done=_show_kpis, key="admin_kpis")
+        if "events" in topics:
+            _load_today()
+    LiveRefresh(dash_tab, ("events", "flags", "users", "vehicles"), _on_dashboard_change)
+
+    # Verification queue, fetched a page at a time as the list scrolls
+    pending_var = tk.StringVar(value="Pending: …")
+    ttk.Label(verify_tab, textvariable=pending_var).grid(row=0, column=0, padx=8, pady=8, sticky="w")
+    verifications = PagedTree(
+        verify_tab, (("full_name", "Name", 200), ("email", "Email", 260), ("id", "Request #", 90)),
+        fetch=lambda cursor, limit: _admin().list_pending_verifications_page(limit, after_id=cursor),
+        cursor_of=lambda r: r["id"], dispatcher=dispatcher, key="admin_verifications", selectmode="extended",
+    )
+    verifications.grid(row=1, column=0, padx=8, sticky="nsew")
+    verify_actions = ttk.Frame(verify_tab)
+    verify_actions.grid(row=2, column=0, padx=8, pady=8, sticky="w")
+    approve_btn = ttk.Button(verify_actions, text="Approve selected", style="Role.TButton")
+    reject_btn = ttk.Button(verify_actions, text="Reject selected", style="Role.TButton")
+    approve_btn.grid(row=0, column=0, padx=(0, 6))
+    reject_btn.grid(row=0, column=1, padx=6)
+
+    def _load_pending_count():
+        dispatcher.submit(_admin().count_pending_verifications,
+                          on_done=lambda n: pending_var.set(f"Pending: {n}"), key="admin_pending_count")
 
+    def _review(status):
+        # Shift/Ctrl-click selects several; they are all reviewed in one transaction
+        ids = [r['id'] for r in verifications.selected()]
+        if not ids:
+            messagebox.showwarning("Verify", "Select one or more requests first.")
+            return
 
+        def _done(outcomes):
+            # Every selected row has left the pending queue, whether or not we changed it
+            verifications.remove(ids)
+            _load_pending_count()
+            done = sum(1 for o in outcomes.values() if o == status)
+            msg = f"{'Approved' if status == 'approved' else 'Rejected'} {done}."
+            if done < len(ids):
+                msg += f" {len(ids) - done} skipped (already reviewed or removed)."
+            messagebox.showinfo("Verify", msg)
+        dispatcher.submit(
+            _admin().set_verification_status_bulk, ids, reviewer_id=admin_id, status=status,
+            on_done=_done, on_error=lambda e: messagebox.showerror("Verify", str(e)),
+            busy=(approve_btn, reject_btn), name="set_verification_status_bulk",
+        )
+    approve_btn.configure(command=lambda: _review("approved"))
+    reject_btn.configure(command=lambda: _review("rejected"))
+    _load_pending_count()
+    verifications.reload()
+
+    def _on_verifications_change(_topics):
+        _load_pending_count()
+        # Do not pull rows out from under a selection the admin is working on
+        if not verifications.selected():
+            verifications.reload()
+    LiveRefresh(verify_tab, ("verifications",), _on_verifications_change)
+
+    # Flags, paged the same way
+    flags_var = tk.StringVar(value="Open Flags: …")
+    ttk.Label(flags_tab, textvariable=flags_var).grid(row=0, column=0, padx=8, pady=8, sticky="w")
+    flags = PagedTree(
+        flags_tab, (("id", "#", 60), ("reason", "Reason", 110), ("raised_by", "Raised by", 180),
+                    ("created_at", "Raised at", 160)),
+        fetch=lambda cursor, limit: _admin().list_open_flags_page(limit, after=cursor),
+        cursor_of=lambda f: (f["created_at"], f["id"]), dispatcher=dispatcher, key="admin_flags",
+    )
+    flags.grid(row=1, column=0, padx=8, sticky="nsew")
+    flag_actions = ttk.Frame(flags_tab)
+    flag_actions.grid(row=2, column=0, padx=8, pady=8, sticky="w")
+    ttk.Label(flag_actions, text="Note:").grid(row=0, column=0, padx=(0, 6))
+    note_var = tk.StringVar(value="")
+    ttk.Entry(flag_actions, textvariable=note_var, width=30).grid(row=0, column=1, padx=6)
+    close_btn = ttk.Button(flag_actions, text="Close", style="Role.TButton")
+    close_btn.grid(row=0, column=2, padx=6)
+
+    def _load_flag_count():
+        dispatcher.submit(_admin().count_open_flags,
+                          on_done=lambda n: flags_var.set(f"Open Flags: {n}"), key="admin_flag_count")
+
+    def _close():
+        rows = flags.selected()
+        if not rows:
+            messagebox.showwarning("Flag", "Select a flag first.")
+            return
+        f = rows[0]
+
+        def _done(_):
+            flags.remove([f['id']])
+            note_var.set("")
+            _load_flag_count()
+            messagebox.showinfo("Flag", "Closed.")
+        dispatcher.submit(
+            _admin().close_flag, f['id'], admin_user_id=admin_id, note=note_var.get() or None,
+            on_done=_done, on_error=lambda e: messagebox.showerror("Flag", str(e)),
+            busy=(close_btn,), name="close_flag",
+        )
+    close_btn.configure(command=_close)
+    _load_flag_count()
+    flags.reload()
+
+    def _on_flags_change(_topics):
+        _load_flag_count()
+        if not flags.selected():
+            flags.reload()
+    LiveRefresh(flags_tab, ("flags",), _on_flags_change)
+
+    return wrapper
@@ -1,33 +1,78 @@
+import os
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from services.ocr_service import PlateOCR
-from services.parking_service import ParkingService
+from tkinter import ttk, filedialog, messagebox, simpledialog
+from services.offline_queue import QUEUED
+from services.registry import get_service
+from ui.dispatch import get_dispatcher
+from ui.live import LiveRefresh
+from ui.slot_map import SlotMap
 
+# How often the slot map asks for changes (ms)
+SLOT_MAP_REFRESH_MS = 2000
 
-_ocr = PlateOCR()
-_parking = ParkingService()
+
+def _ocr():
+    return get_service("ocr")
+
+
+def _parking():
+    return get_service("parking")
+
+
+def _offline_note() -> str:
+    # Cheap: reads the local queue length, no DB access
+    n = _parking().offline_pending()
+    return f"\n\nDatabase unreachable: saved on this PC, {n} change(s) waiting to sync." if n else ""
 
 
 def _kpi_chip(parent, label_text: str, value_text: str):
     frame = ttk.Labelframe(parent, text=label_text, style="Glass.TLabelframe")
-    ttk.Label(frame, text=value_text).grid(row=0, column=0, padx=8, pady=8)
+    value = ttk.Label(frame, text=value_text)
+    value.grid(row=0, column=0, padx=8, pady=8)
+    frame.value = value
     return frame
 
 
+def _load_kpis() -> list[int]:
+    kpis = get_service("kpi").snapshot()
+    return [kpis["active_inside"], kpis["free_slots"], kpis["entries_today"], kpis["open_flags"]]
+
+
+def _lookup_plate(plate: str, conf: float):
+    record = _parking().find_vehicle(plate) if plate else None
+    # On a miss, look for plates one or two OCR slips away
+    suggestions = _parking().suggest_vehicles(plate) if plate and not record else []
+    slots = _parking().get_available_slots() if record or suggestions else []
+    return plate, conf, record, slots, suggestions
+
+
+def _identify(image):
+    """Worker-side part of an upload or camera read: OCR, DB lookup and free slots."""
+    plate, conf = _ocr().extract_plate(image)
+    return _lookup_plate(plate, conf)
+
+
 def _build_dashboard(tab):
+    dispatcher = get_dispatcher(tab)
     # KPI row
     kpi_row = ttk.Frame(tab)
     kpi_row.grid(row=0, column=0, pady=(0, 12))
-    # Live KPI values from DB
-    kpis = [
-        ("Vehicles Inside", str(_parking.count_active_inside())),
-        ("Free Slots", str(_parking.count_free_slots())),
-        ("Today Entries", str(_parking.count_today_entries())),
-        ("Open Flags", str(_parking.count_open_flags())),
-    ]
-    for idx, (lbl, val) in enumerate(kpis):
-        c = _kpi_chip(kpi_row, lbl, val)
+    # Live KPI values from DB, filled in once the background query returns
+    chips = []
+    for idx, lbl in enumerate(("Vehicles Inside", "Free Slots", "Today Entries", "Open Flags")):
+        c = _kpi_chip(kpi_row, lbl, "…")
         c.grid(row=0, column=idx, padx=6)
+        chips.append(c)
+
+    def _show_kpis(values):
+        for chip, val in zip(chips, values):
+            chip.value.config(text=str(val))
+
+    def _load():
+        dispatcher.submit(_load_kpis, on_done=_show_kpis, key="guard_kpis")
+    _load()
+    # Any gate's entries, exits and flags move the KPIs
+    LiveRefresh(tab, ("slots", "events", "flags"), lambda _topics: _load())
 
     # Quick actions
     actions = ttk.Frame(tab)
@@ -35,24 +80,31 @@ def _build_dashboard(tab):
     ttk.Button(actions, text="Scan Vehicle", style="Role.TButton").grid(row=0, column=0, padx=6)
     ttk.Button(actions, text="Parking Map", style="Role.TButton").grid(row=0, column=1, padx=6)
     def _process_exit():
-        plate = filedialog.askstring("Process Exit", "Enter plate number:")
+        plate = simpledialog.askstring("Process Exit", "Enter plate number:", parent=tab)
         if not plate:
             return
-        try:
-            ok = _parking.process_exit(plate.strip().upper())
-            if ok:
+        def _done(ok):
+            if ok == QUEUED:
+                messagebox.showinfo("Exit", "Exit saved on this PC; it is checked against the parking records "
+                                            "once the database is back." + _offline_note())
+            elif ok:
                 messagebox.showinfo("Exit", "Vehicle exited and slot freed.")
             else:
                 messagebox.showwarning("Exit", "No active parking event for this plate.")
-        except Exception as e:
-            messagebox.showerror("Exit", str(e))
-    ttk.Button(actions, text="Process Exit", style="Role.TButton", command=_process_exit).grid(row=0, column=2, padx=6)
+        dispatcher.submit(
+            _parking().process_exit, plate.strip().upper(),
+            on_done=_done, on_error=lambda e: messagebox.showerror("Exit", str(e)),
+            busy=(exit_btn,), name="process_exit",
+        )
+    exit_btn = ttk.Button(actions, text="Process Exit", style="Role.TButton", command=_process_exit)
+    exit_btn.grid(row=0, column=2, padx=6)
     ttk.Button(actions, text="Flags", style="Role.TButton").grid(row=0, column=3, padx=6)
 
     ttk.Label(tab, text="Use actions above to manage entries, slots, and exits.").grid(row=2, column=0, pady=(8, 0), sticky="w")
 
 
 def _build_identification(tab, guard_user_id: int):
+    dispatcher = get_dispatcher(tab)
     plate_var = tk.StringVar(value="—")
     conf_var = tk.StringVar(value="—")
     status_var = tk.StringVar(value="")
@@ -63,34 +115,107 @@ def _build_identification(tab, guard_user_id: int):
     # Left: capture/upload
     left = ttk.Labelframe(tab, text="Capture / Upload", style="Glass.TLabelframe")
     left.grid(row=0, column=0, padx=(0, 8), pady=(0, 8), sticky="n")
-    ttk.Button(left, text="Open Camera", style="Role.TButton", state="disabled").grid(row=0, column=0, padx=8, pady=8)
-    def _upload_image():
-        path = filedialog.askopenfilename(filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.bmp;*.webp")])
-        if not path:
-            return
-        plate, conf = _ocr.extract_plate(path)
+
+    def _show_identified(result):
+        plate, conf, record, slots, suggestions = result
         if not plate:
+            status_var.set("")
             messagebox.showwarning("OCR", "No text detected. Try again.")
             return
         plate_var.set(plate)
         conf_var.set(f"{conf:.2f}")
-        # Lookup in DB
-        record = _parking.find_vehicle(plate)
+        matched = ""
+        if not record:
+            for candidate in suggestions:
+                if messagebox.askyesno(
+                    "Did you mean",
+                    f"Read '{plate}', which is not registered.\n\n"
+                    f"Did you mean {candidate['plate_number']} ({candidate['full_name']})?",
+                ):
+                    record = candidate
+                    matched = f" (matched {candidate['plate_number']})"
+                    break
         if not record:
             status_var.set("Access Denied: Not found in database")
             return
         current_vehicle["vehicle_id"] = record["vehicle_id"]
         current_vehicle["user_id"] = record["user_id"]
-        status_var.set(f"Member Found: {record['full_name']}")
-        # Load slots
-        slots = _parking.get_available_slots()
-        nonlocal slots_values
-        slots_values = [(s["id"], s["code"]) for s in slots]
-        selected_slot.set(slots_values[0][1] if slots_values else "")
-        combo_slot["values"] = [code for _, code in slots_values]
+        status_var.set(f"Member Found: {record['full_name']}{matched}")
+        selected_slot.set("")
+        _show_slots(slots)
 
-    ttk.Button(left, text="Upload Image", style="Role.TButton", command=_upload_image).grid(row=0, column=1, padx=8, pady=8)
-    ttk.Button(left, text="Read Plate (OCR)", style="Role.TButton", state="disabled").grid(row=1, column=0, columnspan=2, padx=8, pady=8)
+    def _identify_failed(e):
+        status_var.set("")
+        messagebox.showerror("OCR", str(e))
+
+    def _upload_image():
+        path = filedialog.askopenfilename(filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.bmp;*.webp")])
+        if not path:
+            return
+        current_vehicle["vehicle_id"] = None
+        current_vehicle["user_id"] = None
+        status_var.set("Reading plate…")
+        # A newer upload supersedes one still being read
+        dispatcher.submit(
+            _identify, path, on_done=_show_identified,
+            on_error=_identify_failed,
+            key="identify", busy=(upload_btn,),
+        )
+
+    upload_btn = ttk.Button(left, text="Upload Image", style="Role.TButton", command=_upload_image)
+    upload_btn.grid(row=0, column=1, padx=8, pady=8)
+
+    # Live camera: frames are gated on motion and read in the background
+    preview_canvas = tk.Canvas(left, width=320, height=240, bg="#0f1b2d", highlightthickness=0)
+    preview_canvas.grid(row=2, column=0, columnspan=2, padx=8, pady=(0, 8))
+    camera = {"preview": None}
+
+    def _on_camera_plate(plate, conf, _frame):
+        current_vehicle["vehicle_id"] = None
+        current_vehicle["user_id"] = None
+        status_var.set("Reading plate…")
+        dispatcher.submit(_lookup_plate, plate, conf, on_done=_show_identified,
+                          on_error=_identify_failed, key="identify")
+
+    def _on_camera_stopped(error):
+        camera["preview"] = None
+        camera_btn.configure(text="Open Camera")
+        read_btn.state(["disabled"])
+        if error is not None:
+            messagebox.showerror("Camera", str(error))
+
+    def _toggle_camera():
+        preview = camera["preview"]
+        if preview is not None:
+            # Reopening waits until the old capture threads have let go of the camera
+            camera_btn.state(["disabled"])
+            preview.stop(on_done=lambda: camera_btn.state(["!disabled"]))
+            _on_camera_stopped(None)
+            return
+        from services.camera_service import CAMERA_SOURCE, CameraPipeline
+        from ui.camera_preview import CameraPreview
+        # A folder of stills stands in for a camera; pace it so each still is seen
+        fps = 1.0 if os.path.isdir(CAMERA_SOURCE) else 30.0
+        preview = CameraPreview(preview_canvas, CameraPipeline(_ocr(), max_fps=fps),
+                                on_plate=_on_camera_plate, on_stopped=_on_camera_stopped)
+        camera["preview"] = preview
+        preview.start()
+        camera_btn.configure(text="Close Camera")
+        read_btn.state(["!disabled"])
+
+    def _read_current_frame():
+        preview = camera["preview"]
+        frame = preview.pipeline.latest() if preview is not None else None
+        if frame is None:
+            return
+        status_var.set("Reading plate…")
+        dispatcher.submit(_identify, frame.path or frame.image, on_done=_show_identified,
+                          on_error=_identify_failed, key="identify", busy=(read_btn,))
+
+    camera_btn = ttk.Button(left, text="Open Camera", style="Role.TButton", command=_toggle_camera)
+    camera_btn.grid(row=0, column=0, padx=8, pady=8)
+    read_btn = ttk.Button(left, text="Read Plate (OCR)", style="Role.TButton", state="disabled", command=_read_current_frame)
+    read_btn.grid(row=1, column=0, columnspan=2, padx=8, pady=8)
 
     # Right: result
     right = ttk.Labelframe(tab, text="Result", style="Glass.TLabelframe")
@@ -120,42 +245,155 @@ def _build_identification(tab, guard_user_id: int):
         except StopIteration:
             messagebox.showwarning("Allocate", "Select a slot.")
             return
-        try:
-            _parking.allocate(
-                vehicle_id=current_vehicle["vehicle_id"],
-                slot_id=slot_id,
-                guard_user_id=guard_user_id,
-                ocr_plate_text=plate_var.get() if plate_var.get() != "—" else None,
-                ocr_conf=float(conf_var.get()) if conf_var.get() not in ("—", "") else None,
-            )
-            messagebox.showinfo("Allocated", f"Assigned slot {selected_slot.get()}.")
-            status_var.set(f"Allocated to slot {selected_slot.get()}")
-        except Exception as e:
+        code = selected_slot.get()
+        def _done(_):
+            messagebox.showinfo("Allocated", f"Assigned slot {code}." + _offline_note())
+            status_var.set(f"Allocated to slot {code}")
+            _refresh_slots()
+
+        def _failed(e):
             messagebox.showerror("Allocate", str(e))
+            # Another gate may have taken the slot; offer only what is still free
+            _refresh_slots()
+        dispatcher.submit(
+            _parking().allocate,
+            vehicle_id=current_vehicle["vehicle_id"],
+            slot_id=slot_id,
+            guard_user_id=guard_user_id,
+            ocr_plate_text=plate_var.get() if plate_var.get() != "—" else None,
+            ocr_conf=float(conf_var.get()) if conf_var.get() not in ("—", "") else None,
+            on_done=_done, on_error=_failed,
+            busy=(allocate_btn, auto_btn, flag_btn), name="allocate",
+        )
+
+    def _auto_allocate():
+        if not current_vehicle["vehicle_id"]:
+            messagebox.showwarning("Allocate", "Identify a member vehicle first.")
+            return
+        zone = zone_var.get()
+
+        def _done(slot):
+            if slot is None:
+                messagebox.showwarning("Allocate", "No available slots. Raise a flag for admin review.")
+                _refresh_slots()
+                return
+            messagebox.showinfo("Allocated", f"Assigned slot {slot['code']}." + _offline_note())
+            status_var.set(f"Allocated to slot {slot['code']}")
+            _refresh_slots()
+
+        # The server picks the slot, so concurrent gates never collide on one
+        dispatcher.submit(
+            _parking().allocate_next,
+            vehicle_id=current_vehicle["vehicle_id"],
+            guard_user_id=guard_user_id,
+            zone=None if zone in ("", "Any") else zone,
+            ocr_plate_text=plate_var.get() if plate_var.get() != "—" else None,
+            ocr_conf=float(conf_var.get()) if conf_var.get() not in ("—", "") else None,
+            on_done=_done, on_error=lambda e: messagebox.showerror("Allocate", str(e)),
+            busy=(allocate_btn, auto_btn, flag_btn), name="allocate_next",
+        )
+
+    def _show_slots(slots):
+        nonlocal slots_values
+        slots_values = [(s["id"], s["code"]) for s in slots]
+        if selected_slot.get() not in {code for _, code in slots_values}:
+            selected_slot.set(slots_values[0][1] if slots_values else "")
+        combo_slot["values"] = [code for _, code in slots_values]
 
-    def _raise_flag():
-        try:
-            _parking.raise_flag(raised_by_guard_id=guard_user_id, reason="no_slots", vehicle_id=current_vehicle["vehicle_id"])  # type: ignore[arg-type]
-            messagebox.showinfo("Flag", "Flag raised for admin review.")
-        except Exception as e:
-            messagebox.showerror("Flag", str(e))
+    def _refresh_slots():
+        dispatcher.submit(_parking().get_available_slots, on_done=_show_slots, key="guard_slots")
 
-    ttk.Button(actions, text="Allocate Slot", style="Role.TButton", command=_allocate).grid(row=1, column=2, padx=8, pady=(0, 8))
-    ttk.Button(actions, text="Raise Flag", style="Role.TButton", command=_raise_flag).grid(row=1, column=3, padx=8, pady=(0, 8))
+    def _raise_flag():
+        dispatcher.submit(
+            _parking().raise_flag, raised_by_guard_id=guard_user_id, reason="no_slots", vehicle_id=current_vehicle["vehicle_id"],  # type: ignore[arg-type]
+            on_done=lambda _: messagebox.showinfo("Flag", "Flag raised for admin review." + _offline_note()),
+            on_error=lambda e: messagebox.showerror("Flag", str(e)),
+            busy=(allocate_btn, auto_btn, flag_btn), name="raise_flag",
+        )
+
+    allocate_btn = ttk.Button(actions, text="Allocate Slot", style="Role.TButton", command=_allocate)
+    allocate_btn.grid(row=1, column=2, padx=8, pady=(0, 8))
+    flag_btn = ttk.Button(actions, text="Raise Flag", style="Role.TButton", command=_raise_flag)
+    flag_btn.grid(row=1, column=3, padx=8, pady=(0, 8))
+    ttk.Label(actions, text="Preferred Zone:").grid(row=2, column=0, padx=8, pady=(0, 8), sticky="w")
+    zone_var = tk.StringVar(value="Any")
+    combo_zone = ttk.Combobox(actions, values=["Any"], width=20, state="readonly", textvariable=zone_var)
+    combo_zone.grid(row=2, column=1, padx=8, pady=(0, 8))
+    auto_btn = ttk.Button(actions, text="Auto Allocate", style="Role.TButton", command=_auto_allocate)
+    auto_btn.grid(row=2, column=2, padx=8, pady=(0, 8))
+
+    def _show_zones(zones):
+        combo_zone["values"] = ["Any"] + zones
+
+    dispatcher.submit(_parking().list_zones, on_done=_show_zones, key="guard_zones")
 
 
 def _build_slots(tab):
-    # Filters and grid placeholder
+    dispatcher = get_dispatcher(tab)
+    # Filters
     controls = ttk.Frame(tab)
     controls.grid(row=0, column=0, pady=(0, 8), sticky="w")
     ttk.Label(controls, text="Zone:").grid(row=0, column=0, padx=(0, 6))
-    ttk.Combobox(controls, values=["All"], width=12, state="readonly").grid(row=0, column=1, padx=(0, 12))
+    zone_var = tk.StringVar(value="All")
+    combo_zone = ttk.Combobox(controls, values=["All"], width=12, state="readonly", textvariable=zone_var)
+    combo_zone.grid(row=0, column=1, padx=(0, 12))
     ttk.Label(controls, text="Level:").grid(row=0, column=2, padx=(0, 6))
-    ttk.Combobox(controls, values=["All"], width=12, state="readonly").grid(row=0, column=3)
+    level_var = tk.StringVar(value="All")
+    combo_level = ttk.Combobox(controls, values=["All"], width=12, state="readonly", textvariable=level_var)
+    combo_level.grid(row=0, column=3)
 
     grid = ttk.Labelframe(tab, text="Slots", style="Glass.TLabelframe")
     grid.grid(row=1, column=0, sticky="w")
-    ttk.Label(grid, text="Green = available, Red = occupied, Yellow = reserved").grid(row=0, column=0, padx=8, pady=8)
+    hover_var = tk.StringVar(value="Green = available, Red = occupied, Yellow = reserved")
+    ttk.Label(grid, textvariable=hover_var).grid(row=0, column=0, padx=8, pady=(8, 4), sticky="w")
+
+    def _hover(slot):
+        if slot is None:
+            hover_var.set("Green = available, Red = occupied, Yellow = reserved")
+        else:
+            hover_var.set(f"{slot['code']}: {slot['status']}")
+    slot_map = SlotMap(grid, on_hover=_hover)
+    slot_map.grid(row=1, column=0, padx=8, pady=(0, 8))
+
+    def _filter(_event=None):
+        slot_map.set_filter(None if zone_var.get() == "All" else zone_var.get(),
+                            None if level_var.get() == "All" else level_var.get())
+    combo_zone.bind("<<ComboboxSelected>>", _filter)
+    combo_level.bind("<<ComboboxSelected>>", _filter)
+
+    # Poll the slot index for changes; each round only redraws slots whose status moved
+    job = {"id": None}
+
+    def _poll():
+        job["id"] = None
+        if not tab.winfo_ismapped():
+            _schedule()
+            return
+        dispatcher.submit(_parking().slot_changes, slot_map.version, slot_map.epoch,
+                          on_done=_apply, on_error=lambda _e: _schedule(), key="guard_slot_map")
+
+    def _apply(change):
+        slot_map.apply(change)
+        groups = slot_map.groups()
+        combo_zone["values"] = ["All"] + sorted({z for z, _ in groups if z})
+        combo_level["values"] = ["All"] + sorted({lv for _, lv in groups if lv})
+        _schedule()
+
+    def _schedule():
+        try:
+            job["id"] = tab.after(SLOT_MAP_REFRESH_MS, _poll)
+        except tk.TclError:
+            # Page closed (logout)
+            pass
+
+    def _poll_now(_topics):
+        # A slot changed: fetch now instead of waiting for the next round
+        if job["id"] is not None:
+            tab.after_cancel(job["id"])
+        _poll()
+
+    LiveRefresh(tab, ("slots",), _poll_now)
+    _poll()
 
 
 def _build_profile(tab, current_user: dict | None):
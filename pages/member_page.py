@@ -1,17 +1,23 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from services.member_service import MemberService
+from services.registry import get_service
+from ui.dispatch import get_dispatcher
+from ui.live import LiveRefresh
 from ui.theme_light import setup_style
 from ui.widgets import card, kpi_card, pill_row
 
-_member = MemberService()
+
+def _member():
+    return get_service("member")
+
 
 def render(parent, on_logout, current_user=None):
     for w in parent.winfo_children():
         w.destroy()
 
     setup_style(parent)
+    dispatcher = get_dispatcher(parent)
 
     root = ttk.Frame(parent, style="TFrame")
     root.grid(row=0, column=0, sticky="nsew")
@@ -136,22 +142,40 @@ def render(parent, on_logout, current_user=None):
     ttk.Entry(add_row, textvariable=new_plate, width=20).grid(row=0, column=0, padx=(0, 8))
     def _add_vehicle_profile():
         if not new_plate.get().strip(): return
-        try:
-            _member.add_vehicle(uid, new_plate.get().strip())
+        def _done(_):
             messagebox.showinfo("Vehicles", "Vehicle added.")
             refresh_dashboard(); refresh_profile()
-        except Exception as e:
-            messagebox.showerror("Vehicles", str(e))
-    ttk.Button(add_row, text="Add Vehicle", style="Primary.TButton", command=_add_vehicle_profile).grid(row=0, column=1)
+        dispatcher.submit(_member().add_vehicle, uid, new_plate.get().strip(), on_done=_done,
+                          on_error=lambda e: messagebox.showerror("Vehicles", str(e)),
+                          busy=(add_btn,), name="add_vehicle")
+    add_btn = ttk.Button(add_row, text="Add Vehicle", style="Primary.TButton", command=_add_vehicle_profile); add_btn.grid(row=0, column=1)
 
     # ===== DATA HOOKS
-    def refresh_dashboard():
-        rows = _member.list_vehicles(uid)
+    # Queries run on the dispatcher's workers; the _show_* halves update widgets on the Tk thread
+    def _load_dashboard():
+        m = _member()
+        return m.list_vehicles(uid), m.get_verification_status(uid), m.get_assigned_slot(uid)
+
+    # Last data drawn per view and this member's vehicle ids, for the live refresh below
+    shown = {}
+    mine = {"vehicles": frozenset()}
+
+    def _unchanged(view, data, rows=None):
+        if rows is not None:
+            mine["vehicles"] = frozenset(v["id"] for v in rows)
+        if shown.get(view) == data:
+            return True
+        shown[view] = data
+        return False
+
+    def _show_dashboard(data):
+        rows, v_status, slot = data
+        if _unchanged("dashboard", data, rows):
+            return
         lbl_reg_count.config(text=str(len(rows)))
         for w in vehicles_list_container.winfo_children(): w.destroy()
         for i, v in enumerate(rows): pill_row(vehicles_list_container, v["plate_number"], row=i)
-        v_status = _member.get_verification_status(uid); lbl_ver.config(text=v_status.capitalize())
-        slot = _member.get_assigned_slot(uid)
+        lbl_ver.config(text=v_status.capitalize())
         if slot:
             lbl_state.config(text="Parked"); lbl_slot.config(text=slot["code"])
             lbl_vehicle.config(text=rows[0]["plate_number"] if rows else "—")
@@ -159,20 +183,36 @@ def render(parent, on_logout, current_user=None):
         else:
             lbl_state.config(text="Not Parked"); lbl_slot.config(text="—"); lbl_vehicle.config(text="—"); lbl_entry.config(text="—")
 
-    def refresh_slot():
-        slot = _member.get_assigned_slot(uid)
+    def refresh_dashboard():
+        dispatcher.submit(_load_dashboard, on_done=_show_dashboard, key="member_dashboard")
+
+    def _load_slot():
+        slot = _member().get_assigned_slot(uid)
+        return slot, (_member().list_vehicles(uid) if slot else [])
+
+    def _show_slot(data):
+        slot, rows = data
+        if _unchanged("slot", data):
+            return
         if slot:
             lbl_slot_big.config(text=str(slot["code"])); lbl_tile_entry.config(text=str(slot["entry_time"]))
-            rows = _member.list_vehicles(uid); lbl_tile_vehicle.config(text=rows[0]["plate_number"] if rows else "—")
+            lbl_tile_vehicle.config(text=rows[0]["plate_number"] if rows else "—")
             lbl_tile_duration.config(text="—")
         else:
             lbl_slot_big.config(text="No active assignment"); lbl_tile_entry.config(text="—"); lbl_tile_vehicle.config(text="—"); lbl_tile_duration.config(text="—")
 
-    def refresh_profile():
+    def refresh_slot():
+        dispatcher.submit(_load_slot, on_done=_show_slot, key="member_slot")
+
+    def _show_profile(rows):
+        if _unchanged("profile", rows, rows):
+            return
         for w in vehicles_profile_list.winfo_children(): w.destroy()
-        rows = _member.list_vehicles(uid)
         for i, v in enumerate(rows): pill_row(vehicles_profile_list, v["plate_number"], row=i)
 
+    def refresh_profile():
+        dispatcher.submit(_member().list_vehicles, uid, on_done=_show_profile, key="member_profile")
+
     def set_active(view: str):
         nav_state["active"] = view
         for key, btn in nav_buttons.items(): btn.configure(style="NavSelected.TButton" if key == view else "Nav.TButton")
@@ -181,5 +221,19 @@ def render(parent, on_logout, current_user=None):
         elif view == "slot":    refresh_slot(); view_slot.grid()
         else:                   refresh_profile(); view_profile.grid()
 
+    # Entries, exits and reviews of this member's cars reload the open view. Bus
+    # events name the car or member; polled versions are lot-wide, so those
+    # reloads only redraw when this member's rows actually differ.
+    def _mine(_topic, data):
+        if "user_id" in data:
+            return data["user_id"] == uid
+        if "vehicle_id" in data:
+            return data["vehicle_id"] in mine["vehicles"]
+        return True
+
+    def _on_change(_topics):
+        {"dashboard": refresh_dashboard, "slot": refresh_slot}.get(nav_state["active"], refresh_profile)()
+    LiveRefresh(root, ("events", "verifications", "vehicles"), _on_change, match=_mine)
+
     set_active("dashboard")
     return root
@@ -1,5 +1,8 @@
 -- Schema for parking_management
 -- Run after creating database `parking_management`
+-- Snapshot of db/migrations/*.sql for a fresh install; safe to rerun. For an
+-- existing database prefer `python -m db.migrate`, which also records the
+-- schema version. Keep this file in step when adding a migration.
 
 USE parking_management;
 
@@ -13,7 +16,9 @@ CREATE TABLE IF NOT EXISTS users (
   is_email_verified BOOL DEFAULT FALSE,
   is_profile_verified BOOL DEFAULT FALSE,
   mobile VARCHAR(20),
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_users_updated (updated_at)
 );
 
 CREATE TABLE IF NOT EXISTS vehicles (
@@ -21,6 +26,9 @@ CREATE TABLE IF NOT EXISTS vehicles (
   user_id BIGINT NOT NULL,
   plate_number VARCHAR(20) UNIQUE NOT NULL,
   is_active BOOL DEFAULT TRUE,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_vehicle_plate (plate_number),
+  KEY idx_vehicle_updated (updated_at),
   FOREIGN KEY (user_id) REFERENCES users(id)
 );
 
@@ -33,6 +41,8 @@ CREATE TABLE IF NOT EXISTS verifications (
   reviewer_id BIGINT,
   reviewed_at DATETIME,
   notes TEXT,
+  KEY idx_verifications_user (user_id),
+  KEY idx_verifications_status (status, id),
   FOREIGN KEY (user_id) REFERENCES users(id),
   FOREIGN KEY (reviewer_id) REFERENCES users(id)
 );
@@ -43,7 +53,10 @@ CREATE TABLE IF NOT EXISTS slots (
   zone VARCHAR(20),
   level VARCHAR(20),
   status ENUM('available','occupied','reserved') DEFAULT 'available',
-  last_changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+  last_changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_slot_status (status),
+  KEY idx_slot_changed (last_changed_at),
+  KEY idx_slot_zone (status, zone, level, code)
 );
 
 CREATE TABLE IF NOT EXISTS parking_events (
@@ -56,11 +69,33 @@ CREATE TABLE IF NOT EXISTS parking_events (
   status ENUM('active','exited') DEFAULT 'active',
   ocr_plate_text VARCHAR(32),
   ocr_confidence DECIMAL(5,2),
+  KEY idx_parking_active (status, entry_time),
+  KEY idx_events_vehicle_status (vehicle_id, status),
+  KEY idx_events_entry (entry_time),
   FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
   FOREIGN KEY (slot_id) REFERENCES slots(id),
   FOREIGN KEY (guard_user_id) REFERENCES users(id)
 );
 
+-- One row per vehicle currently parked; maintained in the same transaction
+-- as allocate/exit. The keys make a second active session impossible.
+CREATE TABLE IF NOT EXISTS active_sessions (
+  vehicle_id BIGINT PRIMARY KEY,
+  user_id BIGINT NOT NULL,
+  plate_number VARCHAR(20) NOT NULL,
+  slot_id BIGINT NOT NULL,
+  event_id BIGINT NOT NULL,
+  entry_time DATETIME NOT NULL,
+  UNIQUE KEY uq_active_plate (plate_number),
+  UNIQUE KEY uq_active_slot (slot_id),
+  UNIQUE KEY uq_active_event (event_id),
+  KEY idx_active_user (user_id),
+  FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
+  FOREIGN KEY (user_id) REFERENCES users(id),
+  FOREIGN KEY (slot_id) REFERENCES slots(id),
+  FOREIGN KEY (event_id) REFERENCES parking_events(id)
+);
+
 CREATE TABLE IF NOT EXISTS flags (
   id BIGINT PRIMARY KEY AUTO_INCREMENT,
   vehicle_id BIGINT,
@@ -71,15 +106,98 @@ CREATE TABLE IF NOT EXISTS flags (
   closed_by_admin_id BIGINT,
   resolution_note TEXT,
   closed_at DATETIME,
+  KEY idx_flags_status_created (status, created_at),
   FOREIGN KEY (vehicle_id) REFERENCES vehicles(id),
   FOREIGN KEY (raised_by_guard_id) REFERENCES users(id),
   FOREIGN KEY (closed_by_admin_id) REFERENCES users(id)
 );
 
--- Note: Some MySQL versions don't support IF NOT EXISTS for CREATE INDEX
--- Run these once; rerunning may cause duplicate key errors if indexes already exist
-CREATE INDEX idx_vehicle_plate ON vehicles (plate_number);
-CREATE INDEX idx_slot_status ON slots (status);
-CREATE INDEX idx_parking_active ON parking_events (status, entry_time);
+-- Exited events moved out of parking_events by services/archive_service.py.
+-- Monthly RANGE partitions on exit_time are split out of pmax as needed;
+-- partitioned tables cannot carry foreign keys.
+CREATE TABLE IF NOT EXISTS parking_events_archive (
+  id BIGINT NOT NULL,
+  vehicle_id BIGINT NOT NULL,
+  slot_id BIGINT NOT NULL,
+  guard_user_id BIGINT NOT NULL,
+  entry_time DATETIME NOT NULL,
+  exit_time DATETIME NOT NULL,
+  status ENUM('active','exited') DEFAULT 'exited',
+  ocr_plate_text VARCHAR(32),
+  ocr_confidence DECIMAL(5,2),
+  PRIMARY KEY (id, exit_time),
+  KEY idx_archive_vehicle (vehicle_id, exit_time)
+)
+PARTITION BY RANGE (TO_DAYS(exit_time)) (
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
 
+-- Live and archived events together, for history and reports
+CREATE OR REPLACE VIEW parking_events_history AS
+  SELECT id, vehicle_id, slot_id, guard_user_id, entry_time, exit_time, status, ocr_plate_text, ocr_confidence
+  FROM parking_events
+  UNION ALL
+  SELECT id, vehicle_id, slot_id, guard_user_id, entry_time, exit_time, status, ocr_plate_text, ocr_confidence
+  FROM parking_events_archive;
+
+-- Dashboard counters, bumped with the change they count
+-- (see services/kpi_service.py). `day` is set for daily counters.
+CREATE TABLE IF NOT EXISTS kpi_counters (
+  name VARCHAR(32) PRIMARY KEY,
+  value BIGINT NOT NULL DEFAULT 0,
+  day DATE,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Version counter per data domain, bumped with the writes to it
+-- (see services/data_versions.py).
+CREATE TABLE IF NOT EXISTS data_versions (
+  domain VARCHAR(32) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+INSERT IGNORE INTO data_versions (domain) VALUES ('slots'), ('events'), ('flags'), ('verifications'),
+  ('users'), ('vehicles');
+
+-- Ids of replayed offline gate operations, recorded in the same transaction
+-- as the write so a retried replay is not applied twice.
+CREATE TABLE IF NOT EXISTS applied_ops (
+  op_id CHAR(32) PRIMARY KEY,
+  applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Occupancy rollups (see services/rollup_service.py). zone is '' for slots
+-- without a zone and '*' for the whole lot.
+CREATE TABLE IF NOT EXISTS occupancy_hourly (
+  bucket DATETIME NOT NULL,
+  zone VARCHAR(20) NOT NULL DEFAULT '',
+  entries INT NOT NULL DEFAULT 0,
+  exits INT NOT NULL DEFAULT 0,
+  dwell_seconds BIGINT NOT NULL DEFAULT 0,
+  peak_occupancy INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (zone, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS occupancy_daily (
+  day DATE NOT NULL,
+  zone VARCHAR(20) NOT NULL DEFAULT '',
+  entries INT NOT NULL DEFAULT 0,
+  exits INT NOT NULL DEFAULT 0,
+  dwell_seconds BIGINT NOT NULL DEFAULT 0,
+  peak_occupancy INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (zone, day)
+);
+
+CREATE TABLE IF NOT EXISTS zone_occupancy (
+  zone VARCHAR(20) PRIMARY KEY,
+  current INT NOT NULL DEFAULT 0
+);
 
+-- Backfill active_sessions from existing active events (safe to rerun).
+-- If a vehicle or slot has several active events only the newest is kept;
+-- close the others by hand.
+INSERT IGNORE INTO active_sessions (vehicle_id, user_id, plate_number, slot_id, event_id, entry_time)
+SELECT v.id, v.user_id, v.plate_number, pe.slot_id, pe.id, pe.entry_time
+FROM parking_events pe JOIN vehicles v ON v.id=pe.vehicle_id
+WHERE pe.status='active'
+ORDER BY pe.entry_time DESC, pe.id DESC;
@@ -2,114 +2,179 @@ from __future__ import annotations
 
 from typing import Optional
 
-from db.connection import get_connection
+from db.connection import pooled_connection
+from services.data_versions import touch
+from services.event_bus import publish
+from services.kpi_service import bump
 
 
 class AdminService:
-    def __init__(self):
-        self.conn = get_connection()
-
-    # Dashboard metrics
-    def count_users(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM users")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
-        return int(n or 0)
-
-    def count_guards(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM users WHERE role='guard'")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
-        return int(n or 0)
-
-    def count_vehicles(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM vehicles")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
+    def _count(self, sql: str) -> int:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql)
+            (n,) = cur.fetchone() or (0,)
+            cur.close()
         return int(n or 0)
 
+    # Dashboard metrics (the KPI tiles read services/kpi_service.py)
     def count_open_flags(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM flags WHERE status='open'")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
-        return int(n or 0)
+        return self._count("SELECT COUNT(*) FROM flags WHERE status='open'")
 
     # Verification queue
-    def list_pending_verifications(self) -> list[dict]:
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute(
-            """
+    def count_pending_verifications(self) -> int:
+        return self._count("SELECT COUNT(*) FROM verifications WHERE status='pending'")
+
+    def list_pending_verifications_page(self, limit: int = 100, after_id: Optional[int] = None) -> list[dict]:
+        """Oldest pending verifications first, ``limit`` at a time.
+
+        Oldest first so the longest-waiting requests are always on the first
+        pages, within the admin list's row cap. Pass the last row's ``id`` as
+        ``after_id`` for the next page; with the (status, id) index every page
+        is a short range read, however deep.
+        """
+        sql = """
             SELECT v.id, u.id AS user_id, u.full_name, u.email, v.id_image_url, v.profile_image_url, v.status
             FROM verifications v JOIN users u ON u.id=v.user_id
-            WHERE v.status='pending' ORDER BY v.id DESC
-            """,
-        )
-        rows = cur.fetchall() or []
-        cur.close()
+            WHERE v.status='pending'
+        """
+        params: list = []
+        if after_id is not None:
+            sql += " AND v.id > %s"
+            params.append(after_id)
+        params.append(limit)
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(sql + " ORDER BY v.id LIMIT %s", tuple(params))
+            rows = cur.fetchall() or []
+            cur.close()
         return rows
 
     def set_verification_status(self, verification_id: int, reviewer_id: int, status: str, notes: Optional[str] = None) -> None:
         if status not in ("approved", "rejected"):
             raise ValueError("Invalid status")
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                """
-                UPDATE verifications SET status=%s, reviewer_id=%s, reviewed_at=NOW(), notes=%s
-                WHERE id=%s
-                """,
-                (status, reviewer_id, notes, verification_id),
-            )
-            # Reflect on user profile verified if approved
-            if status == "approved":
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
                 cur.execute(
                     """
-                    UPDATE users SET is_profile_verified=TRUE
-                    WHERE id=(SELECT user_id FROM verifications WHERE id=%s)
+                    UPDATE verifications SET status=%s, reviewer_id=%s, reviewed_at=NOW(), notes=%s
+                    WHERE id=%s
                     """,
-                    (verification_id,),
+                    (status, reviewer_id, notes, verification_id),
                 )
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
+                # Reflect on user profile verified if approved
+                if status == "approved":
+                    cur.execute(
+                        """
+                        UPDATE users SET is_profile_verified=TRUE
+                        WHERE id=(SELECT user_id FROM verifications WHERE id=%s)
+                        """,
+                        (verification_id,),
+                    )
+                versions = touch(cur, "verifications")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        publish("verifications", ids=[verification_id], status=status, version=versions["verifications"])
+
+    def set_verification_status_bulk(self, verification_ids, reviewer_id: int, status: str,
+                                     notes: Optional[str] = None, chunk: int = 500) -> dict[int, str]:
+        """Approve or reject many pending verifications in one transaction.
+
+        Returns an outcome per id: the new status, ``"not_pending"`` if it was
+        already reviewed, or ``"not_found"``. Uses one set-based UPDATE per
+        table (per ``chunk`` ids) instead of two statements and a commit each.
+        """
+        if status not in ("approved", "rejected"):
+            raise ValueError("Invalid status")
+        ids = list(dict.fromkeys(int(i) for i in verification_ids))
+        outcomes = {i: "not_found" for i in ids}
+        if not ids:
+            return outcomes
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                for start in range(0, len(ids), chunk):
+                    part = ids[start:start + chunk]
+                    marks = ",".join(["%s"] * len(part))
+                    # Lock the rows first so the outcomes match what the UPDATEs change
+                    cur.execute(f"SELECT id, status FROM verifications WHERE id IN ({marks}) FOR UPDATE", tuple(part))
+                    for vid, current in cur.fetchall() or []:
+                        outcomes[vid] = status if current == "pending" else "not_pending"
+                    cur.execute(
+                        f"""
+                        UPDATE verifications SET status=%s, reviewer_id=%s, reviewed_at=NOW(), notes=%s
+                        WHERE id IN ({marks}) AND status='pending'
+                        """,
+                        (status, reviewer_id, notes, *part),
+                    )
+                    if status == "approved":
+                        cur.execute(
+                            f"""
+                            UPDATE users u JOIN verifications v ON v.user_id=u.id
+                            SET u.is_profile_verified=TRUE
+                            WHERE v.id IN ({marks}) AND v.status='approved'
+                            """,
+                            tuple(part),
+                        )
+                versions = touch(cur, "verifications")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        changed = [i for i, o in outcomes.items() if o == status]
+        if changed:
+            publish("verifications", ids=changed, status=status, version=versions["verifications"])
+        return outcomes
 
     # Flags
-    def list_open_flags(self) -> list[dict]:
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute(
-            """
+    def list_open_flags_page(self, limit: int = 100, after: Optional[tuple] = None) -> list[dict]:
+        """Oldest open flags first, like the verification queue; ``after`` is the last row's (created_at, id)."""
+        sql = """
             SELECT f.id, f.reason, f.created_at, u.full_name AS raised_by
             FROM flags f JOIN users u ON u.id=f.raised_by_guard_id
-            WHERE f.status='open' ORDER BY f.created_at DESC
-            """,
-        )
-        rows = cur.fetchall() or []
-        cur.close()
+            WHERE f.status='open'
+        """
+        params: list = []
+        if after is not None:
+            # Spelled out rather than a row comparison so MySQL ranges over idx_flags_status_created
+            sql += " AND (f.created_at > %s OR (f.created_at = %s AND f.id > %s))"
+            params += [after[0], after[0], after[1]]
+        params.append(limit)
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(sql + " ORDER BY f.created_at, f.id LIMIT %s", tuple(params))
+            rows = cur.fetchall() or []
+            cur.close()
         return rows
 
     def close_flag(self, flag_id: int, admin_user_id: int, note: str | None = None) -> None:
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                """
-                UPDATE flags
-                SET status='closed', closed_by_admin_id=%s, resolution_note=%s, closed_at=NOW()
-                WHERE id=%s AND status='open'
-                """,
-                (admin_user_id, note, flag_id),
-            )
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    UPDATE flags
+                    SET status='closed', closed_by_admin_id=%s, resolution_note=%s, closed_at=NOW()
+                    WHERE id=%s AND status='open'
+                    """,
+                    (admin_user_id, note, flag_id),
+                )
+                closed = cur.rowcount
+                if closed:
+                    bump(cur, "open_flags", -1)
+                    versions = touch(cur, "flags")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        if closed:
+            publish("flags", action="closed", flag_id=flag_id, version=versions["flags"])
@@ -0,0 +1,215 @@
+"""Move old exited parking events into a month-partitioned archive.
+
+Keeps ``parking_events`` down to active and recent rows so the hot
+``status='active'`` lookups and idx_parking_active stay small. Rows move in
+bounded batches (one short transaction each), so gates are never blocked
+for long. ``parking_events_history`` unions both tables for reports.
+Meant to run nightly from cron / Task Scheduler:
+
+    python -m services.archive_service [--days 90] [--batch 1000] [--keep-months 0]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from db.connection import pooled_connection
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("PARKING_ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH = int(os.environ.get("PARKING_ARCHIVE_BATCH", "1000"))
+# Drop archive partitions older than this many months (0 keeps everything)
+ARCHIVE_KEEP_MONTHS = int(os.environ.get("PARKING_ARCHIVE_KEEP_MONTHS", "0"))
+
+_COLUMNS = (
+    "id, vehicle_id, slot_id, guard_user_id, entry_time, exit_time, status, ocr_plate_text, ocr_confidence"
+)
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+class ArchiveService:
+    def __init__(self, after_days: int = ARCHIVE_AFTER_DAYS, batch: int = ARCHIVE_BATCH):
+        self.after_days = after_days
+        self.batch = batch
+
+    def cutoff(self) -> datetime:
+        return datetime.combine(date.today() - timedelta(days=self.after_days), datetime.min.time())
+
+    def pending(self) -> int:
+        """Exited events old enough to archive."""
+        cutoff = self.cutoff()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            # entry_time <= exit_time, so the extra bound lets idx_parking_active narrow the scan
+            cur.execute(
+                "SELECT COUNT(*) FROM parking_events WHERE status='exited' AND entry_time < %s AND exit_time < %s",
+                (cutoff, cutoff),
+            )
+            (n,) = cur.fetchone() or (0,)
+            cur.close()
+        return int(n or 0)
+
+    # Partitions
+    def partitions(self) -> list[str]:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME='parking_events_archive'
+                ORDER BY PARTITION_ORDINAL_POSITION
+                """
+            )
+            names = [n for (n,) in cur.fetchall() or [] if n]
+            cur.close()
+        return names
+
+    def ensure_partitions(self, start: Optional[date] = None, months_ahead: int = 1) -> list[str]:
+        """Split monthly partitions out of ``pmax`` from ``start`` until ``months_ahead`` past today.
+
+        Rows are only ever archived into months that already have their own
+        partition, so ``pmax`` stays empty and splitting it is metadata-only.
+        """
+        existing = set(self.partitions())
+        month = _month_start(start or date.today())
+        last = _month_start(date.today())
+        for _ in range(months_ahead):
+            last = _next_month(last)
+        wanted = []
+        while month <= last:
+            if _partition_name(month) not in existing:
+                wanted.append(month)
+            month = _next_month(month)
+        if not wanted:
+            return []
+        newest = max((n for n in existing if n != "pmax"), default=None)
+        # REORGANIZE can only split the last partition, so skip gaps older than it
+        wanted = [m for m in wanted if newest is None or _partition_name(m) > newest]
+        if not wanted:
+            return []
+        defs = ", ".join(
+            f"PARTITION {_partition_name(m)} VALUES LESS THAN (TO_DAYS('{_next_month(m).isoformat()}'))"
+            for m in wanted
+        )
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"ALTER TABLE parking_events_archive REORGANIZE PARTITION pmax INTO "
+                f"({defs}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            )
+            cur.close()
+        return [_partition_name(m) for m in wanted]
+
+    def purge(self, keep_months: int = ARCHIVE_KEEP_MONTHS) -> list[str]:
+        """Drop whole archive months older than ``keep_months``; instant, unlike DELETE."""
+        if keep_months <= 0:
+            return []
+        month = _month_start(date.today())
+        for _ in range(keep_months):
+            month = date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+        limit = _partition_name(month)
+        old = [n for n in self.partitions() if n != "pmax" and n < limit]
+        if old:
+            with pooled_connection() as conn:
+                cur = conn.cursor()
+                cur.execute(f"ALTER TABLE parking_events_archive DROP PARTITION {', '.join(old)}")
+                cur.close()
+        return old
+
+    # Moving rows
+    def archive(self, max_batches: Optional[int] = None, pause: float = 0.05) -> int:
+        """Move archivable events batch by batch; returns how many rows moved."""
+        cutoff = self.cutoff()
+        oldest = self._oldest_exit(cutoff)
+        if oldest is None:
+            return 0
+        self.ensure_partitions(oldest.date())
+        moved = batches = 0
+        while max_batches is None or batches < max_batches:
+            n = self._move_batch(cutoff)
+            moved += n
+            batches += 1
+            if n < self.batch:
+                break
+            # Let gate transactions in between batches
+            time.sleep(pause)
+        return moved
+
+    def _oldest_exit(self, cutoff: datetime) -> Optional[datetime]:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT MIN(exit_time) FROM parking_events WHERE status='exited' AND entry_time < %s AND exit_time < %s",
+                (cutoff, cutoff),
+            )
+            (oldest,) = cur.fetchone() or (None,)
+            cur.close()
+        return oldest
+
+    def _move_batch(self, cutoff: datetime) -> int:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    SELECT id FROM parking_events
+                    WHERE status='exited' AND entry_time < %s AND exit_time < %s
+                    ORDER BY entry_time LIMIT %s FOR UPDATE SKIP LOCKED
+                    """,
+                    (cutoff, cutoff, self.batch),
+                )
+                ids = [i for (i,) in cur.fetchall() or []]
+                if not ids:
+                    conn.rollback()
+                    return 0
+                marks = ",".join(["%s"] * len(ids))
+                cur.execute(
+                    f"INSERT INTO parking_events_archive ({_COLUMNS}) "
+                    f"SELECT {_COLUMNS} FROM parking_events WHERE id IN ({marks})",
+                    tuple(ids),
+                )
+                cur.execute(f"DELETE FROM parking_events WHERE id IN ({marks})", tuple(ids))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        return len(ids)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Archive old parking events")
+    ap.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive events exited this many days ago")
+    ap.add_argument("--batch", type=int, default=ARCHIVE_BATCH)
+    ap.add_argument("--max-batches", type=int)
+    ap.add_argument("--keep-months", type=int, default=ARCHIVE_KEEP_MONTHS)
+    ap.add_argument("--dry-run", action="store_true", help="only report how many rows would move")
+    args = ap.parse_args(argv)
+    svc = ArchiveService(after_days=args.days, batch=args.batch)
+    if args.dry_run:
+        print(f"{svc.pending()} events older than {svc.cutoff():%Y-%m-%d} would be archived")
+        return
+    started = time.perf_counter()
+    moved = svc.archive(max_batches=args.max_batches)
+    print(f"[Archive] Moved {moved} events in {time.perf_counter() - started:.1f} s")
+    dropped = svc.purge(args.keep_months)
+    if dropped:
+        print(f"[Archive] Dropped partitions: {', '.join(dropped)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,42 @@
 import bcrypt
-from db.connection import get_connection
+from db.connection import pooled_connection
+from services.data_versions import touch
+from services.event_bus import publish
+from services.kpi_service import bump
 
 
 class AuthService:
-    def __init__(self):
-        self.conn = get_connection()
-
     def register(self, college_id, full_name, email, password, role):
         password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-        cur = self.conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO users (college_id, full_name, email, password_hash, role)
-            VALUES (%s,%s,%s,%s,%s)
-            """,
-            (college_id, full_name, email, password_hash, role),
-        )
-        self.conn.commit()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    INSERT INTO users (college_id, full_name, email, password_hash, role)
+                    VALUES (%s,%s,%s,%s,%s)
+                    """,
+                    (college_id, full_name, email, password_hash, role),
+                )
+                user_id = cur.lastrowid
+                bump(cur, "users", 1)
+                if role == "guard":
+                    bump(cur, "guards", 1)
+                versions = touch(cur, "users")
+                conn.commit()
+            finally:
+                cur.close()
+        publish("users", user_id=user_id, role=role, version=versions["users"])
 
     def login(self, email, password):
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute("SELECT * FROM users WHERE email=%s", (email,))
-        user = cur.fetchone()
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute("SELECT * FROM users WHERE email=%s", (email,))
+            user = cur.fetchone()
+            cur.close()
+        # bcrypt is slow by design; check it after the connection is returned
         if not user:
             return None
         if not bcrypt.checkpw(password.encode(), user["password_hash"].encode()):
             return None
         return user
-
-
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+log = logging.getLogger(__name__)
+
+# Camera index (e.g. "0"), a video file, or a folder of stills used as a stand-in
+CAMERA_SOURCE = os.environ.get("PARKING_CAMERA_SOURCE", "0")
+
+_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+class Frame(NamedTuple):
+    index: int
+    timestamp: float
+    image: object  # BGR ndarray as returned by OpenCV
+    path: Optional[str] = None  # set when the frame came from a still on disk
+
+
+class FrameRing:
+    """Bounded frame buffer; when full the oldest frame is dropped."""
+
+    def __init__(self, capacity: int = 4):
+        self._frames: deque[Frame] = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, frame: Frame) -> None:
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._cond.notify()
+
+    def latest(self) -> Optional[Frame]:
+        with self._cond:
+            return self._frames[-1] if self._frames else None
+
+    def take_latest(self, timeout: float) -> Optional[Frame]:
+        """Wait for a frame and return the newest, discarding older ones."""
+        with self._cond:
+            if not self._frames:
+                self._cond.wait(timeout)
+            if not self._frames:
+                return None
+            frame = self._frames[-1]
+            self.dropped += len(self._frames) - 1
+            self._frames.clear()
+            return frame
+
+
+class MotionGate:
+    """Pass one frame per arriving vehicle instead of every frame.
+
+    Frames are reduced to a small grayscale thumbnail and compared with the
+    previous one. Once the scene has changed and then held still for
+    ``settle_frames`` frames, the settled frame is released for OCR; the gate
+    then stays closed until the scene changes again.
+    """
+
+    def __init__(self, threshold: float = 8.0, settle_frames: int = 3, size=(64, 48)):
+        self.threshold = threshold
+        self.settle_frames = settle_frames
+        self.size = size
+        self._prev = None
+        self._armed = True  # first settled scene counts as a new arrival
+        self._still = 0
+
+    @property
+    def scene_changed(self) -> bool:
+        """True once the scene has moved since the last released frame."""
+        return self._armed
+
+    def _thumb(self, image):
+        import cv2
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        return cv2.GaussianBlur(cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA), (3, 3), 0)
+
+    def check(self, image) -> bool:
+        import cv2
+
+        thumb = self._thumb(image)
+        prev, self._prev = self._prev, thumb
+        if prev is None:
+            return False
+        change = float(cv2.absdiff(thumb, prev).mean())
+        if change > self.threshold:
+            self._armed = True
+            self._still = 0
+            return False
+        self._still += 1
+        if self._armed and self._still >= self.settle_frames:
+            self._armed = False
+            return True
+        return False
+
+
+def _open_source(source: str):
+    """Return a callable producing (image, path) pairs, or (None, None) at end."""
+    import cv2
+
+    if os.path.isdir(source):
+        files = sorted(
+            os.path.join(source, f) for f in os.listdir(source) if f.lower().endswith(_IMAGE_EXTS)
+        )
+        it = iter(files)
+
+        def _next_still():
+            path = next(it, None)
+            return (cv2.imread(path), path) if path else (None, None)
+
+        return _next_still, lambda: None
+
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open camera source: {source}")
+    # Keep the driver's own queue short; our ring buffer does the buffering
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def _next_frame():
+        ok, image = cap.read()
+        return (image, None) if ok else (None, None)
+
+    return _next_frame, cap.release
+
+
+class CameraPipeline:
+    """Threaded capture -> ring buffer -> motion gate -> OCR.
+
+    The capture thread never waits on analysis: frames that arrive while OCR
+    is busy are dropped from the ring. Once the gate opens, up to ``burst``
+    frames of the same vehicle are read and voted on (see plate_voting), with
+    the burst cut short as soon as the vote is confident. Plate reads are
+    queued for the UI via ``poll_results`` so that widgets are only touched on
+    the Tk thread.
+    """
+
+    def __init__(self, ocr, source: str = CAMERA_SOURCE, buffer_size: int = 4,
+                 gate: Optional[MotionGate] = None, max_fps: float = 30.0, burst: Optional[int] = None):
+        from services.plate_voting import OCR_BURST
+
+        self.ocr = ocr
+        self.burst = OCR_BURST if burst is None else burst
+        self.source = str(source)
+        self.ring = FrameRing(buffer_size)
+        self.gate = gate or MotionGate()
+        self.max_fps = max_fps
+        self.last_error: Optional[Exception] = None
+        self._results: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._capture_thread: Optional[threading.Thread] = None
+        self._analysis_thread: Optional[threading.Thread] = None
+        self.frames_captured = 0
+        self.frames_sent = 0
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="camera-capture", daemon=True)
+        self._analysis_thread = threading.Thread(target=self._analysis_loop, name="camera-analysis", daemon=True)
+        self._capture_thread.start()
+        self._analysis_thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """Signal both threads to finish; with ``wait=False`` return at once and watch ``running``."""
+        self._stop.set()
+        if not wait:
+            return
+        for t in (self._capture_thread, self._analysis_thread):
+            if t is not None:
+                t.join(timeout=2)
+
+    @property
+    def running(self) -> bool:
+        return any(t is not None and t.is_alive() for t in (self._capture_thread, self._analysis_thread))
+
+    def latest(self) -> Optional[Frame]:
+        return self.ring.latest()
+
+    def poll_results(self) -> list[tuple[str, float, Frame]]:
+        out = []
+        while True:
+            try:
+                out.append(self._results.get_nowait())
+            except queue.Empty:
+                return out
+
+    def stats(self) -> dict:
+        return {
+            "captured": self.frames_captured,
+            "dropped": self.ring.dropped,
+            "sent_to_ocr": self.frames_sent,
+        }
+
+    def _capture_loop(self) -> None:
+        try:
+            read, release = _open_source(self.source)
+        except Exception as e:
+            self._report(e)
+            return
+        min_interval = 1.0 / self.max_fps if self.max_fps else 0.0
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                image, path = read()
+                if image is None:
+                    break
+                self.ring.put(Frame(self.frames_captured, time.time(), image, path))
+                self.frames_captured += 1
+                spare = min_interval - (time.perf_counter() - started)
+                if spare > 0:
+                    self._stop.wait(spare)
+        finally:
+            release()
+
+    def _analysis_loop(self) -> None:
+        while not self._stop.is_set():
+            frame = self.ring.take_latest(timeout=0.2)
+            if frame is None:
+                if not self._capture_thread.is_alive():
+                    break  # source exhausted
+                continue
+            try:
+                # Stills each show a different car; only live video needs the gate
+                if frame.path is not None:
+                    self.frames_sent += 1
+                    plate, conf = self.ocr.extract_plate(frame.path)
+                elif not self.gate.check(frame.image):
+                    continue
+                else:
+                    plate, conf = self._read_burst(frame)
+            except Exception as e:
+                self._report(e, frame)
+                continue
+            if plate:
+                self._results.put((plate, conf, frame))
+
+    def _read_burst(self, first: Frame) -> tuple[str, float]:
+        from services.plate_voting import PlateVoter, vote_burst
+
+        def _frames():
+            yield first.image
+            while not self._stop.is_set():
+                frame = self.ring.take_latest(timeout=0.2)
+                if frame is None:
+                    return
+                # Keep the gate's reference current; a big change means the vehicle moved on
+                if self.gate.check(frame.image) or self.gate.scene_changed:
+                    return
+                yield frame.image
+
+        voter = PlateVoter(max_frames=max(self.burst, 1))
+        result = vote_burst(self.ocr, _frames(), voter)
+        self.frames_sent += voter.frames
+        return result.plate, result.conf
+
+    def _report(self, e: Exception, frame: Optional[Frame] = None) -> None:
+        """Keep the error for the preview; ``frame`` is set when only that frame failed."""
+        self.last_error = e
+        if frame is None:
+            log.error("Camera stopped: %s", e)
+        else:
+            # The loop carries on with the next frame
+            log.warning("Plate read failed on frame %d: %s", frame.index, e)
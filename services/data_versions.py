@@ -0,0 +1,53 @@
+"""Per-domain version counters for cheap change detection.
+
+Every write to slots, parking events, flags, verifications, users or
+vehicles bumps its domain's row in ``data_versions`` in the same
+transaction, so a client that remembers the versions it last saw can ask
+"did anything change?" with one read of a six-row table, and re-fetch only
+the domains that moved.
+Processes on the same PC are also told through services/event_bus.py; this
+is what other gate PCs and the admin office see. Writers publish the version
+``touch`` returns, so a screen that already redrew for it skips the poll
+that reports the same change.
+"""
+from __future__ import annotations
+
+from db.connection import pooled_connection
+
+DOMAINS = ("slots", "events", "flags", "verifications", "users", "vehicles")
+
+
+def touch(cur, *domains: str) -> dict[str, int]:
+    """Bump domain versions and return the new ones.
+
+    Call with the cursor of the transaction making the change; the rows
+    stay locked until it commits, so the versions read back are this write's.
+    """
+    # Sorted so concurrent writers lock the rows in the same order
+    domains = tuple(sorted(set(domains)))
+    values = ",".join(["(%s,1)"] * len(domains))
+    cur.execute(
+        f"INSERT INTO data_versions (domain, version) VALUES {values}"
+        " ON DUPLICATE KEY UPDATE version=version + 1",
+        domains,
+    )
+    marks = ",".join(["%s"] * len(domains))
+    cur.execute(f"SELECT domain, version FROM data_versions WHERE domain IN ({marks})", domains)
+    return {domain: int(version) for domain, version in cur.fetchall() or []}
+
+
+class DataVersions:
+    def current(self) -> dict[str, int]:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT domain, version FROM data_versions")
+            versions = {domain: int(version) for domain, version in cur.fetchall() or []}
+            cur.close()
+        return versions
+
+    def has_changed_since(self, tokens: dict[str, int]) -> dict[str, int]:
+        """Domains whose version differs from ``tokens``, mapped to their current version.
+
+        Pass ``{}`` to get every version as a starting point.
+        """
+        return {domain: v for domain, v in self.current().items() if tokens.get(domain) != v}
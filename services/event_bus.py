@@ -0,0 +1,197 @@
+"""In-process publish/subscribe for data changes, optionally relayed between processes.
+
+Services publish after their transaction commits (``publish("slots",
+slot_id=4, status="occupied")``) and screens subscribe instead of
+re-querying on a timer. Callbacks run on the publishing thread, so UI code
+should only note the change and redraw from the Tk thread (ui/live.py).
+
+Topics: ``slots``, ``events`` (entries and exits), ``flags``,
+``verifications``, ``users`` and ``vehicles``. ``"*"`` subscribes to all of them.
+Writes that bumped the topic's data version include it as ``version``.
+
+With PARKING_EVENT_RELAY_PORT set, processes on the same PC share their
+events over a localhost TCP socket: the first one to bind the port relays
+for the others, and a survivor takes over if it exits.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+# Localhost port shared by the app instances on one PC; 0 keeps events in-process
+EVENT_RELAY_PORT = int(os.environ.get("PARKING_EVENT_RELAY_PORT", "0"))
+# How long to wait before retrying the relay after it drops (seconds)
+EVENT_RELAY_RETRY = float(os.environ.get("PARKING_EVENT_RELAY_RETRY", "2"))
+
+Subscriber = Callable[[str, dict], None]
+
+
+class EventBus:
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._subs: dict[str, list[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._relay: Optional[_Relay] = None
+
+    def subscribe(self, topic: str, callback: Subscriber) -> Callable[[], None]:
+        """Call ``callback(topic, data)`` on every publish to ``topic``; returns an unsubscribe function."""
+        with self._lock:
+            self._subs.setdefault(topic, []).append(callback)
+
+        def _unsubscribe():
+            with self._lock:
+                subs = self._subs.get(topic, [])
+                if callback in subs:
+                    subs.remove(callback)
+        return _unsubscribe
+
+    def publish(self, topic: str, **data) -> None:
+        self._deliver(topic, data)
+        if self._relay is not None:
+            self._relay.send({"origin": self.origin, "topic": topic, "data": data})
+
+    def _deliver(self, topic: str, data: dict) -> None:
+        with self._lock:
+            subs = self._subs.get(topic, []) + self._subs.get("*", [])
+        for callback in subs:
+            try:
+                callback(topic, data)
+            except Exception:
+                # A broken screen must not fail the write that published
+                log.exception("Subscriber for '%s' failed", topic)
+
+    def start_relay(self, port: int = EVENT_RELAY_PORT) -> None:
+        if port and self._relay is None:
+            self._relay = _Relay(self, port)
+            self._relay.start()
+
+    def stop_relay(self) -> None:
+        if self._relay is not None:
+            self._relay.stop()
+            self._relay = None
+
+
+class _Relay:
+    """Line-delimited JSON over localhost; whoever binds the port forwards to the rest."""
+
+    def __init__(self, bus: EventBus, port: int, host: str = "127.0.0.1"):
+        self.bus = bus
+        self.host = host
+        self.port = port
+        self._peers: list[socket.socket] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._hub = False
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="event-relay", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            peers, self._peers = self._peers, []
+        for peer in peers:
+            _close(peer)
+
+    def send(self, msg: dict, skip: Optional[socket.socket] = None) -> None:
+        line = (json.dumps(msg, default=str) + "\n").encode()
+        with self._lock:
+            for peer in list(self._peers):
+                if peer is skip:
+                    continue
+                try:
+                    peer.sendall(line)
+                except OSError:
+                    self._peers.remove(peer)
+                    _close(peer)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                server = socket.create_server((self.host, self.port))
+            except OSError:
+                # Someone else relays; connect to them
+                try:
+                    peer = socket.create_connection((self.host, self.port), timeout=EVENT_RELAY_RETRY)
+                except OSError:
+                    peer = None
+                if peer is not None:
+                    peer.settimeout(None)
+                    self._hub = False
+                    with self._lock:
+                        self._peers.append(peer)
+                    self._read(peer)
+            else:
+                self._hub = True
+                log.info("Relaying events on %s:%s", self.host, self.port)
+                self._serve(server)
+            self._stop.wait(EVENT_RELAY_RETRY)
+
+    def _serve(self, server: socket.socket) -> None:
+        server.settimeout(1.0)
+        with server:
+            while not self._stop.is_set():
+                try:
+                    peer, _ = server.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                peer.settimeout(None)
+                with self._lock:
+                    self._peers.append(peer)
+                threading.Thread(target=self._read, args=(peer,), name="event-relay-peer", daemon=True).start()
+
+    def _read(self, peer: socket.socket) -> None:
+        try:
+            for line in peer.makefile("r", encoding="utf-8"):
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if msg.get("origin") == self.bus.origin:
+                    continue
+                self.bus._deliver(msg["topic"], msg.get("data") or {})
+                if self._hub:
+                    self.send(msg, skip=peer)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                if peer in self._peers:
+                    self._peers.remove(peer)
+            _close(peer)
+
+
+def _close(peer: socket.socket) -> None:
+    # shutdown() first: a reader's makefile() keeps the descriptor open past close()
+    try:
+        peer.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    peer.close()
+
+
+_bus: Optional[EventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = EventBus()
+                _bus.start_relay()
+    return _bus
+
+
+def publish(topic: str, **data) -> None:
+    get_event_bus().publish(topic, **data)
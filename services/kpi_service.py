@@ -0,0 +1,132 @@
+"""Dashboard KPIs from a small counters table.
+
+Every write that changes a KPI bumps its counter in the same transaction,
+so dashboards read all KPIs in a single primary-key scan instead of one
+COUNT(*) per tile. ``reconcile`` recomputes the counters from the source
+tables; it runs automatically when counters are missing or older than
+PARKING_KPI_RECONCILE seconds, and can be run by hand:
+
+    python -m services.kpi_service --reconcile
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+from db.connection import pooled_connection
+
+KPI_RECONCILE_INTERVAL = float(os.environ.get("PARKING_KPI_RECONCILE", "3600"))
+
+KPI_NAMES = (
+    "active_inside", "free_slots", "entries_today", "open_flags",
+    "users", "guards", "vehicles",
+)
+# Counters that restart at zero every day
+_DAILY = ("entries_today",)
+
+
+def bump(cur, name: str, delta: int = 1, day: Optional[date] = None) -> None:
+    """Adjust a counter; call with the cursor of the transaction making the change.
+
+    ``day`` dates the change for daily counters (default today); a change
+    dated another day, such as an offline entry replayed later, is not
+    counted towards today.
+    """
+    if name in _DAILY:
+        # The first bump of a new day overwrites yesterday's value
+        cur.execute(
+            """
+            INSERT INTO kpi_counters (name, value, day)
+            VALUES (%s, IF(COALESCE(%s, CURRENT_DATE)=CURRENT_DATE, %s, 0), CURRENT_DATE)
+            ON DUPLICATE KEY UPDATE value=IF(day=CURRENT_DATE, value + VALUES(value), VALUES(value)), day=CURRENT_DATE
+            """,
+            (name, day, delta),
+        )
+    else:
+        cur.execute(
+            """
+            INSERT INTO kpi_counters (name, value) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE value=value + VALUES(value)
+            """,
+            (name, delta),
+        )
+
+
+class KPIService:
+    def __init__(self, reconcile_interval: float = KPI_RECONCILE_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self._reconciled_at = 0.0
+        self._lock = threading.Lock()
+
+    def warmup(self) -> None:
+        self.snapshot()
+
+    def snapshot(self) -> dict[str, int]:
+        """All KPIs in one query; reconciles first if the counters are missing or due."""
+        if self.reconcile_interval > 0 and time.time() - self._reconciled_at > self.reconcile_interval:
+            self._reconcile_once()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT name, IF(day IS NULL OR day=CURRENT_DATE, value, 0) FROM kpi_counters"
+            )
+            values = {name: int(value or 0) for name, value in cur.fetchall() or []}
+            cur.close()
+        if not all(name in values for name in KPI_NAMES):
+            self._reconcile_once(force=True)
+            return self.snapshot()
+        return {name: values[name] for name in KPI_NAMES}
+
+    def _reconcile_once(self, force: bool = False) -> None:
+        # Several dashboards may ask at once; one recount is enough
+        with self._lock:
+            if force or time.time() - self._reconciled_at > self.reconcile_interval:
+                self.reconcile()
+
+    def reconcile(self) -> dict[str, int]:
+        """Recompute every counter from the source tables; returns the new values."""
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    REPLACE INTO kpi_counters (name, value, day)
+                    SELECT 'active_inside', COUNT(*), NULL FROM active_sessions
+                    UNION ALL SELECT 'free_slots', COUNT(*), NULL FROM slots WHERE status='available'
+                    UNION ALL SELECT 'entries_today', COUNT(*), CURRENT_DATE FROM parking_events
+                        WHERE entry_time >= CURRENT_DATE AND entry_time < CURRENT_DATE + INTERVAL 1 DAY
+                    UNION ALL SELECT 'open_flags', COUNT(*), NULL FROM flags WHERE status='open'
+                    UNION ALL SELECT 'users', COUNT(*), NULL FROM users
+                    UNION ALL SELECT 'guards', COUNT(*), NULL FROM users WHERE role='guard'
+                    UNION ALL SELECT 'vehicles', COUNT(*), NULL FROM vehicles
+                    """
+                )
+                cur.execute("SELECT name, value FROM kpi_counters")
+                values = {name: int(value) for name, value in cur.fetchall() or []}
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        self._reconciled_at = time.time()
+        return values
+
+
+def main(argv: Optional[list] = None) -> None:
+    ap = argparse.ArgumentParser(description="Show or rebuild the dashboard KPI counters")
+    ap.add_argument("--reconcile", action="store_true", help="recompute counters from the source tables")
+    args = ap.parse_args(argv)
+    kpi = KPIService(reconcile_interval=0)
+    if args.reconcile:
+        kpi.reconcile()
+    for name, value in kpi.snapshot().items():
+        print(f"{name:>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""On-disk copy of the slot index and plate directory for the guard station.
+
+Written every PARKING_SNAPSHOT_INTERVAL seconds from memory (no extra DB
+queries) to a small SQLite file, replaced atomically. At startup the guard
+station seeds its indexes from it in milliseconds, so plate lookups and the
+free-slot list work even if MySQL is slow or down; once the database
+answers, only rows changed since the snapshot's watermarks are pulled.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.environ.get("PARKING_SNAPSHOT_PATH") or os.path.join(
+    os.path.expanduser("~"), ".parking_management", "guard_snapshot.db"
+)
+SNAPSHOT_INTERVAL = float(os.environ.get("PARKING_SNAPSHOT_INTERVAL", "60"))
+# Ignore snapshots older than this (seconds); 0 accepts any age
+SNAPSHOT_MAX_AGE = float(os.environ.get("PARKING_SNAPSHOT_MAX_AGE", "604800"))
+
+_FORMAT_VERSION = "1"
+
+
+class Snapshot(NamedTuple):
+    saved_at: float
+    slots: list[tuple]
+    slot_watermark: Optional[datetime]
+    plates: list[tuple]
+    plate_watermark: Optional[datetime]
+
+
+def _stamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class LocalSnapshot:
+    def __init__(self, path: str = SNAPSHOT_PATH, interval: float = SNAPSHOT_INTERVAL,
+                 max_age: float = SNAPSHOT_MAX_AGE):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # File format
+    def save(self, slots: list[tuple], slot_watermark, plates: list[tuple], plate_watermark) -> None:
+        """Write a new snapshot next to the old one, then swap it in."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            db = sqlite3.connect(tmp)
+            try:
+                db.executescript(
+                    """
+                    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+                    CREATE TABLE slots (id INTEGER PRIMARY KEY, code TEXT, zone TEXT, level TEXT, status TEXT);
+                    CREATE TABLE plates (vehicle_id INTEGER PRIMARY KEY, plate_number TEXT, user_id INTEGER,
+                                         full_name TEXT, is_profile_verified INTEGER);
+                    """
+                )
+                db.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?,?)",
+                    [("version", _FORMAT_VERSION), ("saved_at", repr(time.time())),
+                     ("slot_watermark", _stamp(slot_watermark)), ("plate_watermark", _stamp(plate_watermark))],
+                )
+                db.executemany("INSERT INTO slots VALUES (?,?,?,?,?)", [r[:5] for r in slots])
+                db.executemany(
+                    "INSERT INTO plates VALUES (?,?,?,?,?)",
+                    [(r[0], r[1], r[2], r[3], 1 if r[4] else 0) for r in plates],
+                )
+                db.commit()
+            finally:
+                db.close()
+            os.replace(tmp, self.path)
+
+    def load(self) -> Optional[Snapshot]:
+        """The saved snapshot, or None if missing, unreadable or too old."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+                if meta.get("version") != _FORMAT_VERSION:
+                    return None
+                saved_at = float(meta["saved_at"])
+                if self.max_age > 0 and time.time() - saved_at > self.max_age:
+                    return None
+                slots = [(*r, None) for r in db.execute("SELECT id, code, zone, level, status FROM slots")]
+                plates = [
+                    (vid, plate, uid, name, bool(verified), True, None)
+                    for vid, plate, uid, name, verified in db.execute(
+                        "SELECT vehicle_id, plate_number, user_id, full_name, is_profile_verified FROM plates"
+                    )
+                ]
+            finally:
+                db.close()
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            log.warning("Ignoring %s: %s", self.path, e)
+            return None
+        return Snapshot(saved_at, slots, _parse(meta.get("slot_watermark")),
+                        plates, _parse(meta.get("plate_watermark")))
+
+    # Indexes
+    def restore(self, slot_index, directory) -> Optional[Snapshot]:
+        """Seed indexes that have not loaded yet; returns the snapshot used, if any."""
+        snap = self.load()
+        if snap is None:
+            return None
+        slot_index.restore(snap.slots, snap.slot_watermark, snap.saved_at)
+        directory.restore(snap.plates, snap.plate_watermark, snap.saved_at)
+        return snap
+
+    def capture(self, slot_index, directory) -> bool:
+        """Save the indexes' current contents; skipped until both have loaded."""
+        if not (slot_index.loaded_at and directory.loaded):
+            return False
+        slots, slot_watermark = slot_index.export()
+        plates, plate_watermark = directory.export()
+        self.save(slots, slot_watermark, plates, plate_watermark)
+        return True
+
+    def start(self, slot_index, directory) -> None:
+        """Capture every ``interval`` seconds in a daemon thread until ``stop``."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _run():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.capture(slot_index, directory)
+                except Exception as e:
+                    log.warning("Save failed: %s", e)
+
+        self._thread = threading.Thread(target=_run, name="local-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_snapshot: Optional[LocalSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_local_snapshot() -> LocalSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = LocalSnapshot()
+    return _snapshot
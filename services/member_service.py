@@ -2,103 +2,131 @@ from __future__ import annotations
 
 from typing import Optional
 
-from db.connection import get_connection
+from db.connection import pooled_connection
+from services.data_versions import touch
+from services.event_bus import publish
+from services.kpi_service import bump
+from services.plate_directory import get_plate_directory
 
 
 class MemberService:
-    def __init__(self):
-        self.conn = get_connection()
-
     def submit_verification(self, user_id: int, id_image_url: str, profile_image_url: str) -> None:
-        cur = self.conn.cursor()
-        try:
-            # Upsert-like behavior: if a row exists, set to pending with new paths
-            cur.execute(
-                "SELECT id FROM verifications WHERE user_id=%s",
-                (user_id,),
-            )
-            existing = cur.fetchone()
-            if existing:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                # Upsert-like behavior: if a row exists, set to pending with new paths
                 cur.execute(
-                    """
-                    UPDATE verifications
-                    SET id_image_url=%s, profile_image_url=%s, status='pending', reviewer_id=NULL, reviewed_at=NULL, notes=NULL
-                    WHERE user_id=%s
-                    """,
-                    (id_image_url, profile_image_url, user_id),
+                    "SELECT id FROM verifications WHERE user_id=%s",
+                    (user_id,),
                 )
-            else:
-                cur.execute(
-                    """
-                    INSERT INTO verifications (user_id, id_image_url, profile_image_url, status)
-                    VALUES (%s,%s,%s,'pending')
-                    """,
-                    (user_id, id_image_url, profile_image_url),
-                )
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
+                existing = cur.fetchone()
+                if existing:
+                    cur.execute(
+                        """
+                        UPDATE verifications
+                        SET id_image_url=%s, profile_image_url=%s, status='pending', reviewer_id=NULL, reviewed_at=NULL, notes=NULL
+                        WHERE user_id=%s
+                        """,
+                        (id_image_url, profile_image_url, user_id),
+                    )
+                else:
+                    cur.execute(
+                        """
+                        INSERT INTO verifications (user_id, id_image_url, profile_image_url, status)
+                        VALUES (%s,%s,%s,'pending')
+                        """,
+                        (user_id, id_image_url, profile_image_url),
+                    )
+                versions = touch(cur, "verifications")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        publish("verifications", user_id=user_id, status="pending", version=versions["verifications"])
 
     def get_verification_status(self, user_id: int) -> str:
-        cur = self.conn.cursor()
-        cur.execute("SELECT status FROM verifications WHERE user_id=%s", (user_id,))
-        row = cur.fetchone()
-        cur.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT status FROM verifications WHERE user_id=%s", (user_id,))
+            row = cur.fetchone()
+            cur.close()
         return (row[0] if row else None) or 'pending'
 
     def get_assigned_slot(self, user_id: int) -> Optional[dict]:
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT s.code, pe.entry_time
-            FROM parking_events pe
-            JOIN vehicles v ON v.id = pe.vehicle_id
-            JOIN slots s ON s.id = pe.slot_id
-            WHERE v.user_id=%s AND pe.status='active'
-            ORDER BY pe.entry_time DESC LIMIT 1
-            """,
-            (user_id,),
-        )
-        row = cur.fetchone()
-        cur.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(
+                """
+                SELECT s.code, a.entry_time
+                FROM active_sessions a
+                JOIN slots s ON s.id = a.slot_id
+                WHERE a.user_id=%s
+                ORDER BY a.entry_time DESC LIMIT 1
+                """,
+                (user_id,),
+            )
+            row = cur.fetchone()
+            cur.close()
         return row
 
     def list_vehicles(self, user_id: int) -> list[dict]:
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute("SELECT id, plate_number, is_active FROM vehicles WHERE user_id=%s", (user_id,))
-        rows = cur.fetchall() or []
-        cur.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute("SELECT id, plate_number, is_active FROM vehicles WHERE user_id=%s", (user_id,))
+            rows = cur.fetchall() or []
+            cur.close()
         return rows
 
     def add_vehicle(self, user_id: int, plate_number: str) -> None:
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                "INSERT INTO vehicles (user_id, plate_number, is_active) VALUES (%s,%s,1)",
-                (user_id, plate_number.upper()),
-            )
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    "INSERT INTO vehicles (user_id, plate_number, is_active) VALUES (%s,%s,1)",
+                    (user_id, plate_number.upper()),
+                )
+                vehicle_id = cur.lastrowid
+                cur.execute("SELECT full_name, is_profile_verified FROM users WHERE id=%s", (user_id,))
+                owner = cur.fetchone() or (None, False)
+                bump(cur, "vehicles", 1)
+                versions = touch(cur, "vehicles")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        get_plate_directory().put(vehicle_id, plate_number.upper(), user_id, *owner)
+        publish("vehicles", vehicle_id=vehicle_id, user_id=user_id, active=True, version=versions["vehicles"])
 
     def set_vehicle_active(self, vehicle_id: int, active: bool) -> None:
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                "UPDATE vehicles SET is_active=%s WHERE id=%s",
-                (1 if active else 0, vehicle_id),
-            )
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    "UPDATE vehicles SET is_active=%s WHERE id=%s",
+                    (1 if active else 0, vehicle_id),
+                )
+                cur.execute(
+                    """
+                    SELECT v.plate_number, v.user_id, u.full_name, u.is_profile_verified
+                    FROM vehicles v JOIN users u ON u.id=v.user_id
+                    WHERE v.id=%s
+                    """,
+                    (vehicle_id,),
+                )
+                row = cur.fetchone()
+                versions = touch(cur, "vehicles")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        if row:
+            # Directory and fuzzy index together, so gate lookups see the change at once
+            get_plate_directory().put(vehicle_id, *row, active=active)
+        publish("vehicles", vehicle_id=vehicle_id, user_id=row[1] if row else None, active=active,
+                version=versions["vehicles"])
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+OCR_CACHE_SIZE = int(os.environ.get("PARKING_OCR_CACHE_SIZE", "512"))
+OCR_CACHE_TTL = float(os.environ.get("PARKING_OCR_CACHE_TTL", "600"))
+# Optional on-disk tier shared across restarts (SQLite file)
+OCR_CACHE_PATH = os.environ.get("PARKING_OCR_CACHE_PATH") or None
+# How long a write waits for another process holding the cache file (seconds)
+OCR_CACHE_BUSY_TIMEOUT = float(os.environ.get("PARKING_OCR_CACHE_BUSY_TIMEOUT", "2"))
+# Also match near-identical frames by perceptual hash (useful for camera input)
+OCR_CACHE_NEAR = os.environ.get("PARKING_OCR_CACHE_NEAR", "0") == "1"
+
+log = logging.getLogger(__name__)
+
+
+class CacheKey(NamedTuple):
+    digest: str
+    phash: Optional[int] = None
+
+
+def _content_digest(image) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    else:
+        h.update(str(image.shape).encode())
+        h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def _dhash(image) -> Optional[int]:
+    """64-bit difference hash; near-identical frames differ in only a few bits."""
+    try:
+        import cv2
+
+        if isinstance(image, str):
+            image = cv2.imread(image, cv2.IMREAD_GRAYSCALE)
+        elif image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if image is None:
+            return None
+        small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    except Exception:
+        return None
+    bits = 0
+    for row in small.tolist():
+        for left, right in zip(row, row[1:]):
+            bits = (bits << 1) | (1 if left > right else 0)
+    return bits
+
+
+class OCRResultCache:
+    """LRU + TTL cache of plate reads keyed by image content.
+
+    Exact hits use a content digest. With ``near_duplicates`` enabled a miss
+    falls back to the closest perceptual hash within ``max_distance`` bits, so
+    a parked car seen again in a slightly different frame is still a hit.
+    """
+
+    def __init__(self, max_entries: int = OCR_CACHE_SIZE, ttl: float = OCR_CACHE_TTL,
+                 persist_path: Optional[str] = OCR_CACHE_PATH, near_duplicates: bool = OCR_CACHE_NEAR,
+                 max_distance: int = 4):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        self._entries: OrderedDict[str, tuple[float, Optional[int], tuple[str, float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, timeout=OCR_CACHE_BUSY_TIMEOUT, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache (digest TEXT PRIMARY KEY, phash INTEGER,"
+                " plate TEXT NOT NULL, conf REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def key_for(self, image) -> CacheKey:
+        return CacheKey(_content_digest(image), _dhash(image) if self.near_duplicates else None)
+
+    def get(self, key: CacheKey) -> Optional[tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key.digest)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key.digest)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key.digest]
+            if key.phash is not None:
+                found = self._nearest(key.phash, now)
+                if found is not None:
+                    self.near_hits += 1
+                    return found
+        found = self._disk_get(key.digest, now)
+        with self._lock:
+            if found is not None:
+                self.disk_hits += 1
+                self._insert(key, found, now)
+            else:
+                self.misses += 1
+        return found
+
+    def put(self, key: CacheKey, result: tuple[str, float]) -> None:
+        now = time.time()
+        with self._lock:
+            self._insert(key, result, now)
+        if self._db is not None:
+            with self._lock:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO ocr_cache (digest, phash, plate, conf, created_at) VALUES (?,?,?,?,?)",
+                        (key.digest, key.phash, result[0], float(result[1]), now),
+                    )
+                    self._db.commit()
+                except sqlite3.OperationalError as e:
+                    # File locked by another station or disk trouble: the read already
+                    # succeeded and stays in memory, so only the disk copy is skipped
+                    self._db.rollback()
+                    log.warning("OCR cache write skipped: %s", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM ocr_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": ((lookups - self.misses) / lookups) if lookups else 0.0,
+            }
+
+    # Called with self._lock held
+    def _insert(self, key: CacheKey, result: tuple[str, float], now: float) -> None:
+        self._entries[key.digest] = (now, key.phash, tuple(result))
+        self._entries.move_to_end(key.digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _nearest(self, phash: int, now: float) -> Optional[tuple[str, float]]:
+        best, best_dist = None, self.max_distance + 1
+        for digest, (created, other, result) in self._entries.items():
+            if other is None or now - created > self.ttl:
+                continue
+            dist = (phash ^ other).bit_count()
+            if dist < best_dist:
+                best, best_dist = digest, dist
+        if best is None:
+            return None
+        self._entries.move_to_end(best)
+        return self._entries[best][2]
+
+    def _disk_get(self, digest: str, now: float) -> Optional[tuple[str, float]]:
+        if self._db is None:
+            return None
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT plate, conf, created_at FROM ocr_cache WHERE digest=?", (digest,)
+                ).fetchone()
+            except sqlite3.OperationalError as e:
+                log.warning("OCR cache read skipped: %s", e)
+                return None
+        if not row or now - row[2] > self.ttl:
+            return None
+        return row[0], float(row[1])
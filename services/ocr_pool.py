@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Optional
+
+from services.ocr_service import PlateOCR
+
+log = logging.getLogger(__name__)
+
+# Engine selection for the shared "ocr" service: "inline" runs PaddleOCR in
+# the GUI process, "pool" runs it in worker processes
+OCR_ENGINE = os.environ.get("PARKING_OCR_ENGINE", "inline")
+OCR_WORKERS = int(os.environ.get("PARKING_OCR_WORKERS", "0")) or max(1, min(4, (os.cpu_count() or 2) - 1))
+MAX_RESTARTS = 3
+# Upper bounds on waiting for one plate read and for the models to load (seconds)
+OCR_TIMEOUT = float(os.environ.get("PARKING_OCR_TIMEOUT", "30"))
+OCR_WARMUP_TIMEOUT = float(os.environ.get("PARKING_OCR_WARMUP_TIMEOUT", "120"))
+
+
+def _worker_main(conn, warmup_image: Optional[str]) -> None:
+    ocr = PlateOCR()
+    try:
+        ocr.warmup()
+        if warmup_image:
+            # The first inference is much slower than the rest; pay it here
+            ocr.extract_plate(warmup_image)
+    except Exception:
+        pass
+    conn.send(("ready", None, None))
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        task_id, image_path = item
+        try:
+            conn.send(("ok", task_id, ocr.extract_plate(image_path)))
+        except Exception as e:
+            conn.send(("error", task_id, f"{type(e).__name__}: {e}"))
+
+
+class OCRPoolFull(Exception):
+    pass
+
+
+class OCRWorkerPool:
+    """PlateOCR served by N worker processes that each load the model once.
+
+    ``submit`` returns a Future resolving to ``(plate, confidence)``. At most
+    ``max_pending`` requests may be queued or running; beyond that ``submit``
+    blocks (or raises OCRPoolFull when ``block=False``) so a burst of frames
+    cannot grow the queue without bound. Without PaddleOCR the workers use the
+    same filename fallback as PlateOCR.
+
+    Each worker has its own pipe and the parent hands out work, so a worker
+    that crashes mid-request cannot wedge a shared queue for the others.
+    """
+
+    def __init__(self, workers: int = OCR_WORKERS, max_pending: Optional[int] = None,
+                 warmup_image: Optional[str] = None):
+        if workers < 1:
+            raise ValueError("At least one OCR worker is required")
+        self.workers = workers
+        self._warmup_image = warmup_image
+        self._ctx = mp.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self._lock = threading.Lock()
+        self._futures: dict[int, Future] = {}
+        self._backlog: deque = deque()  # (task_id, image_path) waiting for a worker
+        self._procs: dict[int, mp.Process] = {}
+        self._conns: dict[int, object] = {}
+        self._idle: list[int] = []
+        self._running: dict[int, int] = {}  # worker_id -> task_id
+        self._ready: set[int] = set()
+        self._restarts: dict[int, int] = {}
+        self._ready_event = threading.Event()
+        self._next_id = 0
+        self._closed = False
+        self._dead = False
+        for wid in range(workers):
+            self._spawn(wid)
+        self._collector = threading.Thread(target=self._collect, name="ocr-pool-results", daemon=True)
+        self._collector.start()
+
+    def _spawn(self, worker_id: int) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self._warmup_image),
+            name=f"ocr-worker-{worker_id}",
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        with self._lock:
+            self._procs[worker_id] = proc
+            self._conns[worker_id] = parent_conn
+
+    def submit(self, image_path: str, block: bool = True, timeout: Optional[float] = None) -> Future:
+        self._check_alive()
+        if not self._slots.acquire(block, timeout):
+            raise OCRPoolFull(f"{self.workers} OCR workers busy; request rejected")
+        fut: Future = Future()
+        fut.set_running_or_notify_cancel()
+        with self._lock:
+            if self._closed or self._dead:
+                # Shut down while we waited for a slot; nobody would serve the request
+                self._slots.release()
+                self._check_alive()
+            task_id = self._next_id
+            self._next_id += 1
+            self._futures[task_id] = fut
+            self._backlog.append((task_id, image_path))
+            self._dispatch()
+        return fut
+
+    def _check_alive(self) -> None:
+        if self._closed:
+            raise RuntimeError("OCR pool is closed")
+        if self._dead:
+            raise RuntimeError("All OCR workers have exited")
+
+    def extract_plate(self, image_path: str, timeout: Optional[float] = OCR_TIMEOUT) -> tuple[str, float]:
+        """Blocking drop-in for PlateOCR.extract_plate; raises TimeoutError after ``timeout`` seconds."""
+        return self.submit(image_path).result(timeout)
+
+    def warmup(self, timeout: Optional[float] = OCR_WARMUP_TIMEOUT) -> bool:
+        """Wait until every worker has loaded its model; False on timeout or if the pool died."""
+        return self._ready_event.wait(timeout) and not self._dead
+
+    def ready_workers(self) -> int:
+        return len(self._ready)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            conns = list(self._conns.values())
+            procs = list(self._procs.values())
+        for conn in conns:
+            try:
+                conn.send(None)
+            except Exception:
+                pass
+        for proc in procs:
+            proc.join(timeout=2)
+            if proc.is_alive():
+                proc.terminate()
+        self._fail_all("OCR pool closed")
+
+    # Called with self._lock held
+    def _dispatch(self) -> None:
+        while self._backlog and self._idle:
+            wid = self._idle.pop()
+            task_id, image_path = self._backlog.popleft()
+            try:
+                self._conns[wid].send((task_id, image_path))
+            except Exception:
+                # Worker is going away; the collector will notice and replace it
+                self._backlog.appendleft((task_id, image_path))
+                continue
+            self._running[wid] = task_id
+
+    def _resolve(self, task_id: int, result=None, error: Optional[str] = None) -> None:
+        with self._lock:
+            fut = self._futures.pop(task_id, None)
+        if fut is None:
+            return
+        self._slots.release()
+        if error is not None:
+            fut.set_exception(RuntimeError(error))
+        else:
+            fut.set_result(tuple(result))
+
+    def _fail_all(self, message: str) -> None:
+        with self._lock:
+            pending, self._futures = self._futures, {}
+            self._backlog.clear()
+        for fut in pending.values():
+            self._slots.release()
+            fut.set_exception(RuntimeError(message))
+
+    def _collect(self) -> None:
+        while not self._closed:
+            by_handle = {}
+            with self._lock:
+                for wid, conn in self._conns.items():
+                    by_handle[conn] = wid
+                    by_handle[self._procs[wid].sentinel] = wid
+            for handle in wait(list(by_handle), timeout=1.0):
+                wid = by_handle[handle]
+                if wid not in self._conns:
+                    continue  # already handled via its other handle
+                if handle is self._conns[wid]:
+                    try:
+                        kind, task_id, payload = self._conns[wid].recv()
+                    except (EOFError, OSError):
+                        self._worker_died(wid)
+                        continue
+                    self._on_message(wid, kind, task_id, payload)
+                elif not self._procs[wid].is_alive():
+                    self._worker_died(wid)
+
+    def _on_message(self, wid: int, kind: str, task_id, payload) -> None:
+        if kind == "ready":
+            self._ready.add(wid)
+            if len(self._ready) >= self.workers:
+                self._ready_event.set()
+        elif kind == "ok":
+            self._resolve(task_id, result=payload)
+        else:
+            self._resolve(task_id, error=payload)
+        with self._lock:
+            self._running.pop(wid, None)
+            self._idle.append(wid)
+            self._dispatch()
+
+    def _worker_died(self, wid: int) -> None:
+        # A worker that crashed (e.g. native OCR fault) fails its request and is replaced
+        with self._lock:
+            proc = self._procs.pop(wid)
+            conn = self._conns.pop(wid)
+            if wid in self._idle:
+                self._idle.remove(wid)
+            task_id = self._running.pop(wid, None)
+        conn.close()
+        proc.join(timeout=0.1)
+        self._ready.discard(wid)
+        if self._closed:
+            return
+        if task_id is not None:
+            self._resolve(task_id, error=f"OCR worker {wid} exited with code {proc.exitcode}")
+        restarts = self._restarts.get(wid, 0)
+        if restarts < MAX_RESTARTS:
+            self._restarts[wid] = restarts + 1
+            self._spawn(wid)
+        else:
+            log.error("Worker %s keeps crashing; not restarting it", wid)
+        if not self._procs:
+            with self._lock:
+                self._dead = True
+            self._fail_all("All OCR workers have exited")
+            # Wake anyone waiting in warmup()
+            self._ready_event.set()
+
+
+def create_plate_reader():
+    """Factory for the shared "ocr" service, honouring PARKING_OCR_ENGINE."""
+    if OCR_ENGINE == "pool":
+        return OCRWorkerPool()
+    return PlateOCR()
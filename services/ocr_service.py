@@ -1,44 +1,115 @@
+import os
 import re
+import threading
 
-try:
-    # Optional dependency; we fall back gracefully if not installed
-    from paddleocr import PaddleOCR  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    PaddleOCR = None  # type: ignore
+_PLATE_RE = re.compile(r"[A-Z]{2}\d{1,2}[A-Z]{0,2}\d{3,4}")
+
+# Run the OpenCV plate localiser before recognition ("0" reads the full frame)
+OCR_DETECT_REGIONS = os.environ.get("PARKING_OCR_DETECT", "1") != "0"
+# Remember reads by image content so retries and repeat sightings skip the model
+OCR_CACHE = os.environ.get("PARKING_OCR_CACHE", "1") != "0"
+
+
+def _load_paddle():
+    try:
+        # Optional dependency; we fall back gracefully if not installed.
+        # Imported lazily: paddle takes seconds to import and load weights.
+        from paddleocr import PaddleOCR  # type: ignore
+    except Exception:  # pragma: no cover - optional dependency
+        return None
+    try:
+        return PaddleOCR(lang="en", use_angle_cls=True, use_gpu=False)
+    except Exception:
+        return None
 
 
 class PlateOCR:
-    def __init__(self):
+    def __init__(self, detect_regions: bool = OCR_DETECT_REGIONS, cache=None):
         self._ocr = None
-        if PaddleOCR is not None:
-            try:
-                self._ocr = PaddleOCR(lang="en", use_angle_cls=True, use_gpu=False)
-            except Exception:
-                self._ocr = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.detect_regions = detect_regions
+        self._locator = None
+        if cache is None and OCR_CACHE:
+            from services.ocr_cache import OCRResultCache
+            cache = OCRResultCache()
+        self.cache = cache or None
+
+    def warmup(self) -> None:
+        """Load the recognition model now rather than on the first plate."""
+        self._engine()
 
-    def extract_plate(self, image_path: str) -> tuple[str, float]:
-        if self._ocr is None:
+    def _engine(self):
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._ocr = _load_paddle()
+                    self._loaded = True
+        return self._ocr
+
+    def extract_plate(self, image_path) -> tuple[str, float]:
+        """Read a plate from an image file path or a BGR ndarray (camera frame)."""
+        engine = self._engine()
+        if engine is None:
+            if not isinstance(image_path, str):
+                # Fallback reads the file name; a raw frame has none
+                return "", 0.0
             # Simple fallback: return alphanumeric words of reasonable length
             # Real model path unavailable; caller should handle low confidence
             text = image_path.split("/")[-1].split("\\")[-1]
             cleaned = re.sub(r"[^A-Za-z0-9]", "", text.upper())
             if not cleaned:
                 return "", 0.0
-            m = re.search(r"[A-Z]{2}\d{1,2}[A-Z]{0,2}\d{3,4}", cleaned)
+            m = _PLATE_RE.search(cleaned)
             plate = m.group(0) if m else cleaned[:10]
             return plate, 0.40
 
-        result = self._ocr.ocr(image_path, cls=True)
+        # The filename fallback above is cheaper than hashing, so only model reads are cached
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_for(image_path)
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+        plate, conf = self._read(engine, image_path)
+        if key is not None and plate:
+            self.cache.put(key, (plate, conf))
+        return plate, conf
+
+    def _read(self, engine, image) -> tuple[str, float]:
+        if self.detect_regions:
+            # Recognise only the plate-shaped crops; use the whole frame if none reads as a plate
+            for crop in self._plate_regions(image):
+                plate, conf = self._recognise(engine, crop)
+                if plate and _PLATE_RE.fullmatch(plate):
+                    return plate, conf
+        return self._recognise(engine, image)
+
+    def _plate_regions(self, image) -> list:
+        if self._locator is None:
+            try:
+                from services.plate_detector import PlateLocator
+                self._locator = PlateLocator()
+            except Exception:
+                self.detect_regions = False
+                return []
+        try:
+            return self._locator.locate(image)
+        except Exception:
+            return []
+
+    @staticmethod
+    def _recognise(engine, image) -> tuple[str, float]:
+        result = engine.ocr(image, cls=True)
         candidates: list[tuple[str, float]] = []
         for line in result or []:
-            for _, (text, conf) in line:
+            # Paddle yields None for an image without text
+            for _, (text, conf) in line or []:
                 candidates.append((str(text), float(conf)))
         if not candidates:
             return "", 0.0
         raw, conf = max(candidates, key=lambda x: x[1])
         raw = re.sub(r"[^A-Za-z0-9]", "", raw.upper())
-        m = re.search(r"[A-Z]{2}\d{1,2}[A-Z]{0,2}\d{3,4}", raw)
+        m = _PLATE_RE.search(raw)
         plate = m.group(0) if m else raw
         return plate, float(conf)
-
-
@@ -0,0 +1,196 @@
+"""Durable queue of gate operations made while MySQL is unreachable.
+
+Each operation is appended to a local SQLite file (WAL, synchronous=FULL)
+before the guard is told it succeeded, so a crash or power cut does not lose
+it. Once the database answers again the queue is replayed strictly in order
+through the normal service methods; an operation that no longer applies
+(slot taken meanwhile, vehicle already parked, no active session) is marked
+as a conflict and handed to ``on_conflict`` instead of blocking the rest.
+Only writes that never reached MySQL are queued, and each carries an
+``op_id`` that the replayed write records in applied_ops, so a replay
+retried after a lost commit reply is not applied twice.
+
+    python -m services.offline_queue            # list pending and conflicting operations
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+from db.connection import DatabaseUnavailable
+
+log = logging.getLogger(__name__)
+
+OFFLINE_QUEUE_PATH = os.environ.get("PARKING_OFFLINE_QUEUE_PATH") or os.path.join(
+    os.path.expanduser("~"), ".parking_management", "offline_queue.db"
+)
+# Queue gate writes when MySQL is down instead of failing them
+OFFLINE_MODE = os.environ.get("PARKING_OFFLINE_MODE", "1") == "1"
+# How often to try replaying while operations are pending (seconds)
+OFFLINE_RETRY_INTERVAL = float(os.environ.get("PARKING_OFFLINE_RETRY", "5"))
+
+# Returned by gate methods whose write was queued here rather than applied
+QUEUED = "queued"
+
+
+class QueuedOp(NamedTuple):
+    id: int
+    op: str
+    args: dict
+    created_at: float
+
+
+class OfflineQueue:
+    def __init__(self, path: str = OFFLINE_QUEUE_PATH, retry_interval: float = OFFLINE_RETRY_INTERVAL):
+        self.path = path
+        self.retry_interval = retry_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ops (id INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL,"
+            " args TEXT NOT NULL, created_at REAL NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+            " detail TEXT, done_at REAL)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        (self._pending,) = self._db.execute("SELECT COUNT(*) FROM ops WHERE status='pending'").fetchone()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def append(self, op: str, args: dict) -> int:
+        """Durably record an operation; returns its queue id."""
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO ops (op, args, created_at) VALUES (?,?,?)", (op, json.dumps(args), time.time())
+            )
+            self._db.commit()
+            self._pending += 1
+            return cur.lastrowid
+
+    def pending(self) -> list[QueuedOp]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, op, args, created_at FROM ops WHERE status='pending' ORDER BY id"
+            ).fetchall()
+        return [QueuedOp(i, op, json.loads(args), created) for i, op, args, created in rows]
+
+    def conflicts(self) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, op, args, created_at, detail FROM ops WHERE status='conflict' ORDER BY id"
+            ).fetchall()
+        return [
+            {"id": i, "op": op, "args": json.loads(args), "created_at": created, "detail": detail}
+            for i, op, args, created, detail in rows
+        ]
+
+    def _mark(self, op_id: int, status: str, detail: Optional[str] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE ops SET status=?, detail=?, done_at=? WHERE id=? AND status='pending'",
+                (status, detail, time.time(), op_id),
+            )
+            self._db.commit()
+            self._pending = max(self._pending - 1, 0)
+
+    # Replay
+    def replay(self, handlers: dict[str, Callable], on_conflict: Optional[Callable] = None) -> tuple[int, int]:
+        """Apply pending operations in order; returns (applied, conflicts).
+
+        ``handlers[op](at, **args)`` runs one operation, ``at`` being when it
+        was queued. Raising ValueError or returning False marks a conflict.
+        Replay stops at the first DatabaseUnavailable so order is kept.
+        """
+        applied = conflicts = 0
+        with self._replay_lock:
+            for item in self.pending():
+                handler = handlers.get(item.op)
+                try:
+                    if handler is None:
+                        raise ValueError(f"Unknown operation '{item.op}'")
+                    result = handler(datetime.fromtimestamp(item.created_at), **item.args)
+                except DatabaseUnavailable:
+                    break
+                except Exception as e:
+                    # Anything else would fail the same way on every retry
+                    reason = str(e) or type(e).__name__
+                else:
+                    if result is not False:
+                        self._mark(item.id, "applied")
+                        applied += 1
+                        continue
+                    reason = "No longer applies"
+                self._mark(item.id, "conflict", reason)
+                conflicts += 1
+                log.warning("Conflict replaying #%s %s: %s", item.id, item.op, reason)
+                if on_conflict is not None:
+                    try:
+                        on_conflict(item, reason)
+                    except Exception:
+                        log.exception("Could not report conflict #%s", item.id)
+        if applied or conflicts:
+            log.info("Replayed %d operations, %d conflicts, %d pending", applied, conflicts, self._pending)
+        return applied, conflicts
+
+    def start(self, handlers: dict[str, Callable], on_conflict: Optional[Callable] = None) -> None:
+        """Retry ``replay`` every ``retry_interval`` seconds in a daemon thread while anything is pending."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _run():
+            while not self._stop.wait(self.retry_interval):
+                if self._pending:
+                    try:
+                        self.replay(handlers, on_conflict)
+                    except Exception as e:
+                        log.warning("Replay failed: %s", e)
+
+        self._thread = threading.Thread(target=_run, name="offline-replay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_queue: Optional[OfflineQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_offline_queue() -> OfflineQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = OfflineQueue()
+    return _queue
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Inspect the offline gate queue")
+    ap.add_argument("--path", default=OFFLINE_QUEUE_PATH)
+    args = ap.parse_args(argv)
+    queue = OfflineQueue(args.path)
+    for item in queue.pending():
+        print(f"pending  #{item.id} {datetime.fromtimestamp(item.created_at):%Y-%m-%d %H:%M:%S} {item.op} {item.args}")
+    for c in queue.conflicts():
+        print(f"conflict #{c['id']} {datetime.fromtimestamp(c['created_at']):%Y-%m-%d %H:%M:%S} {c['op']} "
+              f"{c['args']}: {c['detail']}")
+    print(f"{len(queue)} pending, {len(queue.conflicts())} conflicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,133 +1,477 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+import logging
+import random
+import time
+import uuid
+from datetime import date, datetime
+from typing import Optional, Sequence, Union
 
-from db.connection import get_connection
+from db.connection import ConnectError, pooled_connection
+from services.data_versions import touch
+from services.event_bus import publish
+from services.kpi_service import bump
+from services.local_snapshot import get_local_snapshot
+from services.offline_queue import OFFLINE_MODE, QUEUED, get_offline_queue
+from services.plate_directory import get_plate_directory
+from services.rollup_service import record_entry, record_exit
+from services.slot_index import get_slot_index
 
+log = logging.getLogger(__name__)
 
-class ParkingService:
-    def __init__(self):
-        self.conn = get_connection()
+# MySQL deadlock / lock wait timeout: the transaction was rolled back and is safe to retry
+_RETRYABLE_ERRNOS = (1213, 1205)
+_DUPLICATE_KEY = 1062
 
-    # KPIs
-    def count_active_inside(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM parking_events WHERE status='active'")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
-        return int(n or 0)
 
-    def count_free_slots(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM slots WHERE status='available'")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
-        return int(n or 0)
+def _retrying(fn, *args, retries: int = 3, **kwargs):
+    """Run a transaction, retrying it on deadlock or lock wait timeout."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if getattr(e, "errno", None) not in _RETRYABLE_ERRNOS or attempt == retries:
+                raise
+            # Back off with jitter so colliding gates do not retry in lockstep
+            time.sleep(random.uniform(0.01, 0.05) * (2 ** attempt))
 
-    def count_today_entries(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM parking_events WHERE DATE(entry_time)=CURRENT_DATE")
-        (n,) = cur.fetchone() or (0,)
-        cur.close()
-        return int(n or 0)
 
-    def count_open_flags(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM flags WHERE status='open'")
-        (n,) = cur.fetchone() or (0,)
+class _AlreadyApplied(Exception):
+    """A replayed offline operation whose earlier attempt had committed."""
+
+
+def _claim_op(cur, op_id: Optional[str]) -> None:
+    """Record a replayed operation's id in its own transaction, so it can only apply once."""
+    if op_id is None:
+        return
+    try:
+        cur.execute("INSERT INTO applied_ops (op_id) VALUES (%s)", (op_id,))
+    except Exception as e:
+        if getattr(e, "errno", None) == _DUPLICATE_KEY:
+            raise _AlreadyApplied(op_id) from e
+        raise
+
+
+def _replayed(fn):
+    """Wrap a replay handler: an operation that already committed counts as applied."""
+    def _run(at, **args):
+        try:
+            return fn(at, **args)
+        except _AlreadyApplied:
+            return None
+    return _run
+
+
+def _count_entry(cur, day: Optional[date] = None) -> None:
+    # Same counter order everywhere so concurrent gates lock them consistently
+    bump(cur, "active_inside", 1)
+    bump(cur, "free_slots", -1)
+    # Dated by the entry, so a replayed offline entry from yesterday is not counted today
+    bump(cur, "entries_today", 1, day=day)
+
+
+def _count_exit(cur) -> None:
+    bump(cur, "active_inside", -1)
+    bump(cur, "free_slots", 1)
+
+
+def _record(conn, event_id: int, exited: bool = False) -> dict[str, int]:
+    """Rollups, KPI counters and data versions for an entry or exit, in its transaction.
+
+    These rows are shared by every gate, so call this last, just before the
+    commit, to hold their locks briefly. Entries and exits lock them in the
+    same order; a lock wait that still times out retries the whole
+    transaction (see ``_retrying``). Returns the new data versions.
+    """
+    cur = conn.cursor()
+    try:
+        if exited:
+            record_exit(conn, event_id)
+            _count_exit(cur)
+        else:
+            entry_time = record_entry(conn, event_id)
+            _count_entry(cur, entry_time.date())
+        return touch(cur, "events", "slots")
+    finally:
         cur.close()
-        return int(n or 0)
 
-    # Vehicle lookup
-    def find_vehicle(self, plate: str) -> Optional[dict]:
-        cur = self.conn.cursor(dictionary=True)
+
+def _open_session(cur, event_id: int) -> None:
+    """Record the new event in active_sessions; must run in the allocating transaction."""
+    try:
         cur.execute(
             """
-            SELECT v.id AS vehicle_id, v.plate_number, u.id AS user_id, u.full_name, u.is_profile_verified
-            FROM vehicles v JOIN users u ON u.id=v.user_id
-            WHERE v.plate_number=%s AND v.is_active=1
+            INSERT INTO active_sessions (vehicle_id, user_id, plate_number, slot_id, event_id, entry_time)
+            SELECT v.id, v.user_id, v.plate_number, pe.slot_id, pe.id, pe.entry_time
+            FROM parking_events pe JOIN vehicles v ON v.id=pe.vehicle_id
+            WHERE pe.id=%s
             """,
-            (plate,),
+            (event_id,),
         )
-        row = cur.fetchone()
-        cur.close()
-        return row
+    except Exception as e:
+        if getattr(e, "errno", None) == _DUPLICATE_KEY:
+            raise ValueError("Vehicle is already parked") from e
+        raise
 
-    def get_available_slots(self) -> list[dict]:
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute("SELECT id, code FROM slots WHERE status='available' ORDER BY code")
-        rows = cur.fetchall() or []
-        cur.close()
-        return rows
+
+class ParkingService:
+    def __init__(self):
+        # Serve slots and plates from the last local snapshot until the DB answers
+        snap = get_local_snapshot().restore(get_slot_index(), get_plate_directory())
+        if snap is not None:
+            log.info("Restored %d slots and %d plates from snapshot of %s", len(snap.slots), len(snap.plates),
+                     time.strftime('%H:%M:%S', time.localtime(snap.saved_at)))
+
+    def warmup(self) -> None:
+        # Load plates (and with them the fuzzy index) and free slots before the first gate read
+        directory = get_plate_directory()
+        directory.ensure_fresh()
+        directory.start()
+        slots = get_slot_index()
+        slots.ensure_fresh()
+        snapshot = get_local_snapshot()
+        snapshot.capture(slots, directory)
+        snapshot.start(slots, directory)
+        # Operations queued before a restart are replayed once the DB answers
+        if OFFLINE_MODE and len(get_offline_queue()):
+            get_offline_queue().start(self._replay_handlers(), self._on_conflict)
+
+    # Vehicle lookup
+    def find_vehicle(self, plate: str) -> Optional[dict]:
+        # Served from the preloaded directory; it syncs changes every few seconds
+        directory = get_plate_directory()
+        directory.ensure_fresh()
+        return directory.lookup(plate)
+
+    def suggest_vehicles(self, plate: str, limit: int = 3) -> list[dict]:
+        """Active vehicles whose plate is a near match for an OCR read, closest first."""
+        directory = get_plate_directory()
+        directory.ensure_fresh()
+        out = []
+        for m in directory.index.search(plate, limit=limit):
+            row = directory.get_vehicle(m.vehicle_id)
+            if row is not None:
+                row["distance"] = m.distance
+                out.append(row)
+        return out
+
+    def get_available_slots(self, zone: Optional[str] = None, level: Optional[str] = None) -> list[dict]:
+        index = get_slot_index()
+        index.ensure_fresh()
+        return index.available(zone, level)
+
+    def next_free_slot(self, zone: Optional[str] = None, level: Optional[str] = None) -> Optional[dict]:
+        index = get_slot_index()
+        index.ensure_fresh()
+        return index.first_free(zone, level)
+
+    def slot_changes(self, version: int = 0, epoch: Optional[int] = None) -> dict:
+        """Slot status changes for the live map; see SlotIndex.changes_since."""
+        index = get_slot_index()
+        index.ensure_fresh()
+        return index.changes_since(version, epoch)
+
+    def list_zones(self) -> list[str]:
+        index = get_slot_index()
+        index.ensure_fresh()
+        return sorted({zone for zone, _ in index.zones() if zone})
+
+    # Offline mode: writes made while MySQL is unreachable are queued locally
+    def offline_pending(self) -> int:
+        """Gate operations waiting to be replayed; no DB access."""
+        return len(get_offline_queue()) if OFFLINE_MODE else 0
+
+    def _online(self) -> bool:
+        """Whether to write straight to MySQL: nothing is queued, or replaying just emptied the queue.
+
+        Queued operations must reach the database before later ones (an exit
+        after its offline entry), so while the queue cannot be drained new
+        writes queue behind it. Replay gives up at the first unreachable
+        attempt, so this costs one connection attempt while MySQL is down.
+        """
+        if not self.offline_pending():
+            return True
+        queue = get_offline_queue()
+        queue.replay(self._replay_handlers(), self._on_conflict)
+        return not len(queue)
+
+    def _enqueue(self, op: str, **args) -> None:
+        queue = get_offline_queue()
+        # Recorded in applied_ops on replay, so a replay retried after a lost commit is a no-op
+        queue.append(op, dict(args, op_id=uuid.uuid4().hex))
+        queue.start(self._replay_handlers(), self._on_conflict)
+
+    def _replay_handlers(self) -> dict:
+        return {
+            "allocate": _replayed(lambda at, **args: self._allocate(entry_time=at, **args)),
+            "process_exit": _replayed(lambda at, plate, op_id=None: self._process_exit(plate, at, op_id)),
+            "raise_flag": _replayed(lambda at, **args: self._raise_flag(created_at=at, **args)),
+        }
+
+    def _on_conflict(self, item, reason: str) -> None:
+        # The car really is in the slot the guard gave it; let an admin sort out the records
+        if item.op == "allocate":
+            self._raise_flag(item.args["guard_user_id"], "mismatch", item.args["vehicle_id"])
+
+    def _queued_slot(self, plate: str) -> Optional[int]:
+        """Slot of a still-queued offline entry for this plate, if any."""
+        vehicle = get_plate_directory().lookup(plate)
+        if vehicle is None:
+            return None
+        slot_id = None
+        for item in get_offline_queue().pending():
+            if item.op == "allocate" and item.args["vehicle_id"] == vehicle["vehicle_id"]:
+                slot_id = item.args["slot_id"]
+            elif item.op == "process_exit" and item.args["plate"] == plate:
+                slot_id = None
+        return slot_id
 
     def allocate(self, vehicle_id: int, slot_id: int, guard_user_id: int,
                  ocr_plate_text: Optional[str] = None, ocr_conf: Optional[float] = None) -> None:
-        cur = self.conn.cursor()
-        try:
-            cur.execute("SELECT status FROM slots WHERE id=%s FOR UPDATE", (slot_id,))
-            row = cur.fetchone()
-            if not row or row[0] != 'available':
-                self.conn.rollback()
-                raise ValueError("Slot not available")
-            cur.execute(
-                """
-                INSERT INTO parking_events (vehicle_id, slot_id, guard_user_id, ocr_plate_text, ocr_confidence)
-                VALUES (%s,%s,%s,%s,%s)
-                """,
-                (vehicle_id, slot_id, guard_user_id, ocr_plate_text, ocr_conf),
-            )
-            cur.execute("UPDATE slots SET status='occupied' WHERE id=%s", (slot_id,))
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
-
-    def process_exit(self, plate: str) -> bool:
-        cur = self.conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT pe.id, pe.slot_id
-            FROM parking_events pe
-            JOIN vehicles v ON v.id = pe.vehicle_id
-            WHERE v.plate_number=%s AND pe.status='active'
-            ORDER BY pe.entry_time DESC LIMIT 1
-            """,
-            (plate,),
-        )
-        ev = cur.fetchone()
-        cur.close()
-        if not ev:
+        args = dict(vehicle_id=vehicle_id, slot_id=slot_id, guard_user_id=guard_user_id,
+                    ocr_plate_text=ocr_plate_text, ocr_conf=ocr_conf)
+        if self._online():
+            try:
+                self._allocate(**args)
+                return
+            except ConnectError:
+                # Only when nothing reached the server; a link lost mid-write has an unknown outcome
+                if not OFFLINE_MODE:
+                    raise
+        index = get_slot_index()
+        if not any(s["id"] == slot_id for s in index.available()):
+            raise ValueError("Slot not available")
+        self._enqueue("allocate", **args)
+        index.mark(slot_id, 'occupied')
+        publish("slots", slot_id=slot_id, status='occupied')
+
+    def _allocate(self, vehicle_id: int, slot_id: int, guard_user_id: int,
+                  ocr_plate_text: Optional[str] = None, ocr_conf: Optional[float] = None,
+                  entry_time: Optional[datetime] = None, op_id: Optional[str] = None) -> None:
+        versions = _retrying(self._park, vehicle_id, slot_id, guard_user_id, ocr_plate_text, ocr_conf, entry_time,
+                             op_id)
+        get_slot_index().mark(slot_id, 'occupied')
+        publish("slots", slot_id=slot_id, status='occupied', version=versions["slots"])
+        publish("events", kind="entry", vehicle_id=vehicle_id, slot_id=slot_id, version=versions["events"])
+
+    def _park(self, vehicle_id: int, slot_id: int, guard_user_id: int, ocr_plate_text: Optional[str],
+              ocr_conf: Optional[float], entry_time: Optional[datetime], op_id: Optional[str]) -> dict[str, int]:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                _claim_op(cur, op_id)
+                cur.execute("SELECT status FROM slots WHERE id=%s FOR UPDATE", (slot_id,))
+                row = cur.fetchone()
+                if not row or row[0] != 'available':
+                    conn.rollback()
+                    # Our copy was stale; stop offering this slot
+                    get_slot_index().mark(slot_id, row[0] if row else 'occupied')
+                    raise ValueError("Slot not available")
+                # entry_time is set when replaying an offline entry
+                cur.execute(
+                    """
+                    INSERT INTO parking_events
+                      (vehicle_id, slot_id, guard_user_id, ocr_plate_text, ocr_confidence, entry_time)
+                    VALUES (%s,%s,%s,%s,%s,COALESCE(%s, CURRENT_TIMESTAMP))
+                    """,
+                    (vehicle_id, slot_id, guard_user_id, ocr_plate_text, ocr_conf, entry_time),
+                )
+                event_id = cur.lastrowid
+                _open_session(cur, event_id)
+                cur.execute("UPDATE slots SET status='occupied' WHERE id=%s", (slot_id,))
+                versions = _record(conn, event_id)
+                conn.commit()
+                return versions
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def allocate_next(self, vehicle_id: int, guard_user_id: int,
+                      zone: Union[str, Sequence[str], None] = None, level: Optional[str] = None,
+                      ocr_plate_text: Optional[str] = None, ocr_conf: Optional[float] = None,
+                      strict: bool = False, retries: int = 3) -> Optional[dict]:
+        """Claim the first free slot server-side and park the vehicle in it.
+
+        ``zone`` may be one zone or several in order of preference; unless
+        ``strict``, any zone is used once those are full. Rows locked by other
+        gates are skipped rather than waited on, so concurrent gates each get
+        a different slot. Returns the claimed slot, or None if none is free.
+        While MySQL is unreachable the slot comes from the local index and
+        the allocation is queued (services/offline_queue.py).
+        """
+        zones = [zone] if isinstance(zone, str) else list(zone or [])
+        if not strict or not zones:
+            zones.append(None)
+        if self._online():
+            try:
+                return self._allocate_next(vehicle_id, guard_user_id, zones, level, ocr_plate_text, ocr_conf, retries)
+            except ConnectError:
+                # Only when nothing reached the server; a link lost mid-write has an unknown outcome
+                if not OFFLINE_MODE:
+                    raise
+        # Offline: take the first slot we believe is free and queue it as an explicit allocation
+        index = get_slot_index()
+        for z in zones:
+            slot = index.first_free(z, level)
+            if slot is not None:
+                self._enqueue("allocate", vehicle_id=vehicle_id, slot_id=slot["id"], guard_user_id=guard_user_id,
+                              ocr_plate_text=ocr_plate_text, ocr_conf=ocr_conf)
+                index.mark(slot["id"], 'occupied')
+                publish("slots", slot_id=slot["id"], status='occupied')
+                return slot
+        return None
+
+    def _allocate_next(self, vehicle_id: int, guard_user_id: int, zones: list, level: Optional[str],
+                       ocr_plate_text: Optional[str], ocr_conf: Optional[float], retries: int) -> Optional[dict]:
+        claimed = _retrying(self._claim_next, vehicle_id, guard_user_id, zones, level, ocr_plate_text, ocr_conf,
+                            retries=retries)
+        if claimed is None:
+            return None
+        slot, versions = claimed
+        get_slot_index().mark(slot["id"], 'occupied')
+        publish("slots", slot_id=slot["id"], status='occupied', version=versions["slots"])
+        publish("events", kind="entry", vehicle_id=vehicle_id, slot_id=slot["id"], version=versions["events"])
+        return slot
+
+    def _claim_next(self, vehicle_id: int, guard_user_id: int, zones: list, level: Optional[str],
+                    ocr_plate_text: Optional[str], ocr_conf: Optional[float]) -> Optional[tuple[dict, dict[str, int]]]:
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            try:
+                slot = None
+                for zone in zones:
+                    sql = "SELECT id, code FROM slots WHERE status='available'"
+                    params: list = []
+                    if zone is not None:
+                        sql += " AND zone=%s"
+                        params.append(zone)
+                    if level is not None:
+                        sql += " AND level=%s"
+                        params.append(level)
+                    cur.execute(sql + " ORDER BY code LIMIT 1 FOR UPDATE SKIP LOCKED", tuple(params))
+                    slot = cur.fetchone()
+                    if slot:
+                        break
+                if not slot:
+                    conn.rollback()
+                    return None
+                cur.execute(
+                    """
+                    INSERT INTO parking_events (vehicle_id, slot_id, guard_user_id, ocr_plate_text, ocr_confidence)
+                    VALUES (%s,%s,%s,%s,%s)
+                    """,
+                    (vehicle_id, slot["id"], guard_user_id, ocr_plate_text, ocr_conf),
+                )
+                event_id = cur.lastrowid
+                _open_session(cur, event_id)
+                cur.execute("UPDATE slots SET status='occupied' WHERE id=%s", (slot["id"],))
+                versions = _record(conn, event_id)
+                conn.commit()
+                return slot, versions
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def process_exit(self, plate: str) -> Union[bool, str]:
+        """Close the plate's parking session and free its slot.
+
+        Returns False if the plate has no active session, or QUEUED if MySQL
+        is unreachable and the exit was saved for replay; the session is
+        only checked then, and a mismatch is reported as a conflict.
+        """
+        if self._online():
+            try:
+                return self._process_exit(plate)
+            except ConnectError:
+                # Only when nothing reached the server; a link lost mid-write has an unknown outcome
+                if not OFFLINE_MODE:
+                    raise
+        # Offline we cannot check the session, only that the plate is registered
+        if get_plate_directory().lookup(plate) is None:
             return False
-        cur2 = self.conn.cursor()
-        try:
-            cur2.execute(
-                "UPDATE parking_events SET status='exited', exit_time=%s WHERE id=%s",
-                (datetime.now(), ev['id']),
-            )
-            cur2.execute("UPDATE slots SET status='available' WHERE id=%s", (ev['slot_id'],))
-            self.conn.commit()
-            return True
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur2.close()
+        slot_id = self._queued_slot(plate)
+        self._enqueue("process_exit", plate=plate)
+        if slot_id is not None:
+            get_slot_index().mark(slot_id, 'available')
+            publish("slots", slot_id=slot_id, status='available')
+        return QUEUED
 
-    def raise_flag(self, raised_by_guard_id: int, reason: str, vehicle_id: Optional[int] = None) -> None:
-        cur = self.conn.cursor()
-        try:
-            cur.execute(
-                "INSERT INTO flags (vehicle_id, raised_by_guard_id, reason) VALUES (%s,%s,%s)",
-                (vehicle_id, raised_by_guard_id, reason),
-            )
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-        finally:
-            cur.close()
+    def _process_exit(self, plate: str, exit_time: Optional[datetime] = None, op_id: Optional[str] = None) -> bool:
+        ended = _retrying(self._end_session, plate, exit_time, op_id)
+        if ended is None:
+            return False
+        session, versions = ended
+        get_slot_index().mark(session['slot_id'], 'available')
+        publish("slots", slot_id=session['slot_id'], status='available', version=versions["slots"])
+        publish("events", kind="exit", vehicle_id=session['vehicle_id'], slot_id=session['slot_id'],
+                version=versions["events"])
+        return True
 
+    def _end_session(self, plate: str, exit_time: Optional[datetime],
+                     op_id: Optional[str]) -> Optional[tuple[dict, dict[str, int]]]:
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            try:
+                _claim_op(cur, op_id)
+                cur.execute(
+                    "SELECT vehicle_id, slot_id, event_id FROM active_sessions WHERE plate_number=%s FOR UPDATE",
+                    (plate,),
+                )
+                session = cur.fetchone()
+                if not session:
+                    conn.rollback()
+                    return None
+                cur.execute("DELETE FROM active_sessions WHERE vehicle_id=%s", (session['vehicle_id'],))
+                cur.execute(
+                    "UPDATE parking_events SET status='exited', exit_time=%s WHERE id=%s",
+                    (exit_time or datetime.now(), session['event_id']),
+                )
+                cur.execute("UPDATE slots SET status='available' WHERE id=%s", (session['slot_id'],))
+                versions = _record(conn, session['event_id'], exited=True)
+                conn.commit()
+                return session, versions
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def raise_flag(self, raised_by_guard_id: int, reason: str, vehicle_id: Optional[int] = None) -> None:
+        args = dict(raised_by_guard_id=raised_by_guard_id, reason=reason, vehicle_id=vehicle_id)
+        if self._online():
+            try:
+                self._raise_flag(**args)
+                return
+            except ConnectError:
+                # Only when nothing reached the server; a link lost mid-write has an unknown outcome
+                if not OFFLINE_MODE:
+                    raise
+        self._enqueue("raise_flag", **args)
 
+    def _raise_flag(self, raised_by_guard_id: int, reason: str, vehicle_id: Optional[int] = None,
+                    created_at: Optional[datetime] = None, op_id: Optional[str] = None) -> None:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                _claim_op(cur, op_id)
+                cur.execute(
+                    """
+                    INSERT INTO flags (vehicle_id, raised_by_guard_id, reason, created_at)
+                    VALUES (%s,%s,%s,COALESCE(%s, CURRENT_TIMESTAMP))
+                    """,
+                    (vehicle_id, raised_by_guard_id, reason, created_at),
+                )
+                flag_id = cur.lastrowid
+                bump(cur, "open_flags", 1)
+                versions = touch(cur, "flags")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        publish("flags", action="raised", flag_id=flag_id, reason=reason, version=versions["flags"])
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable, NamedTuple, Optional
+
+from services.plate_index import PlateIndex, get_plate_index
+
+log = logging.getLogger(__name__)
+
+# Pull vehicles/users changed by other stations this often (seconds)
+DIRECTORY_SYNC_INTERVAL = float(os.environ.get("PARKING_DIRECTORY_SYNC", "5"))
+# Full reload interval (seconds); also drops vehicles deleted outright
+DIRECTORY_TTL = float(os.environ.get("PARKING_DIRECTORY_TTL", "3600"))
+# updated_at is set when a row is written, not when it commits
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+_SELECT = """
+    SELECT v.id, v.plate_number, v.user_id, u.full_name, u.is_profile_verified, v.is_active,
+           GREATEST(v.updated_at, u.updated_at)
+    FROM vehicles v JOIN users u ON u.id=v.user_id
+"""
+
+
+class DirectoryEntry(NamedTuple):
+    vehicle_id: int
+    plate_number: str
+    user_id: int
+    full_name: str
+    is_profile_verified: bool
+
+
+def _key(plate: str) -> str:
+    # Same matching as the plate_number column: case-insensitive, padding ignored
+    return (plate or "").strip().upper()
+
+
+class PlateDirectory:
+    """Active plates with their owner, held in memory on the guard station.
+
+    Loaded in full at login, then kept current by pulling only the vehicles
+    and users whose ``updated_at`` moved past the watermark, so a gate read is
+    a dict lookup instead of a round trip. Also keeps the fuzzy plate index
+    in step, so the index no longer reloads itself.
+    """
+
+    def __init__(self, index: Optional[PlateIndex] = None, sync_interval: float = DIRECTORY_SYNC_INTERVAL,
+                 ttl: float = DIRECTORY_TTL):
+        self.index = index
+        self.sync_interval = sync_interval
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._by_plate: dict[str, DirectoryEntry] = {}
+        self._by_vehicle: dict[int, str] = {}  # vehicle_id -> plate key
+        self._watermark = None
+        self.loaded_at: Optional[float] = None
+        self.synced_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._by_plate)
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # Sync with the DB
+    def load(self, rows: Iterable[tuple]) -> None:
+        """Replace the contents with rows shaped like ``_SELECT``."""
+        with self._lock:
+            self._by_plate = {}
+            self._by_vehicle = {}
+            self._watermark = None
+            self._apply(rows, full=True)
+            self.loaded_at = self.synced_at = time.time()
+
+    def refresh(self) -> None:
+        self.load(self._fetch(None))
+
+    def sync(self) -> int:
+        """Apply vehicles and owners changed since the last sync; returns how many rows were read."""
+        with self._lock:
+            since = self._watermark
+        if since is None:
+            self.refresh()
+            return len(self)
+        rows = self._fetch(since - _SYNC_OVERLAP)
+        with self._lock:
+            self._apply(rows)
+            self.synced_at = time.time()
+        return len(rows)
+
+    def ensure_fresh(self) -> None:
+        now = time.time()
+        try:
+            if self.loaded_at is None or (self.ttl > 0 and now - self.loaded_at > self.ttl):
+                self.refresh()
+            elif not self.running and now - self.synced_at > self.sync_interval:
+                # The background thread, when running, already keeps us current
+                self.sync()
+        except Exception as e:
+            if self.loaded_at is None:
+                raise
+            # DB unreachable: keep serving the last copy and retry after the interval
+            self.synced_at = now
+            log.warning("Serving cached plates: %s", e)
+
+    @staticmethod
+    def _fetch(since) -> list[tuple]:
+        from db.connection import pooled_connection
+
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            if since is None:
+                cur.execute(_SELECT + " WHERE v.is_active=1")
+            else:
+                # Two halves so each side can use its updated_at index
+                cur.execute(
+                    _SELECT + " WHERE v.updated_at >= %s UNION " + _SELECT + " WHERE u.updated_at >= %s",
+                    (since, since),
+                )
+            rows = cur.fetchall() or []
+            cur.close()
+        return rows
+
+    # Local snapshot (services/local_snapshot.py)
+    def export(self) -> tuple[list[tuple], object]:
+        """Current entries in ``load`` shape, plus the sync watermark."""
+        with self._lock:
+            rows = [(e.vehicle_id, e.plate_number, e.user_id, e.full_name, e.is_profile_verified, True, None)
+                    for e in self._by_plate.values()]
+            return rows, self._watermark
+
+    def restore(self, rows: Iterable[tuple], watermark, saved_at: float) -> bool:
+        """Seed from a saved copy; the next sync pulls what changed since."""
+        with self._lock:
+            if self.loaded_at is not None:
+                return False
+            self.load(rows)
+            self._watermark = watermark
+            self.loaded_at = saved_at
+            self.synced_at = 0.0
+            return True
+
+    # Background sync
+    def start(self) -> None:
+        """Sync every ``sync_interval`` seconds in a daemon thread until ``stop``."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="plate-directory-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                if self.ttl > 0 and time.time() - (self.loaded_at or 0) > self.ttl:
+                    self.refresh()
+                else:
+                    self.sync()
+            except Exception as e:
+                # Keep serving the last copy (possibly a local snapshot); the next round retries
+                log.warning("Sync failed: %s", e)
+
+    def put(self, vehicle_id: int, plate: str, user_id: int, full_name: str, verified, active=True) -> None:
+        """Apply a vehicle this station just wrote, ahead of the next sync."""
+        with self._lock:
+            self._set(vehicle_id, plate, user_id, full_name, verified, active)
+
+    # Lookups
+    def lookup(self, plate: str) -> Optional[dict]:
+        """The active vehicle with this plate, shaped like ``ParkingService.find_vehicle``."""
+        with self._lock:
+            entry = self._by_plate.get(_key(plate))
+        return entry._asdict() if entry else None
+
+    def get_vehicle(self, vehicle_id: int) -> Optional[dict]:
+        with self._lock:
+            key = self._by_vehicle.get(vehicle_id)
+            entry = self._by_plate.get(key) if key else None
+        return entry._asdict() if entry else None
+
+    # Called with self._lock held
+    def _apply(self, rows: Iterable[tuple], full: bool = False) -> None:
+        indexed = []
+        for vehicle_id, plate, user_id, full_name, verified, active, changed_at in rows:
+            if full:
+                indexed.append((vehicle_id, plate, user_id))
+                self._set(vehicle_id, plate, user_id, full_name, verified, active, reindex=False)
+            else:
+                self._set(vehicle_id, plate, user_id, full_name, verified, active)
+            if changed_at is not None and (self._watermark is None or changed_at > self._watermark):
+                self._watermark = changed_at
+        if full and self.index is not None:
+            self.index.load(indexed)
+
+    def _set(self, vehicle_id: int, plate: str, user_id: int, full_name: str, verified, active,
+             reindex: bool = True) -> None:
+        old = self._by_vehicle.pop(vehicle_id, None)
+        if old is not None:
+            self._by_plate.pop(old, None)
+        if active:
+            key = _key(plate)
+            self._by_plate[key] = DirectoryEntry(vehicle_id, plate, user_id, full_name, bool(verified))
+            self._by_vehicle[vehicle_id] = key
+        if reindex and self.index is not None:
+            if active:
+                self.index.add(vehicle_id, plate, user_id)
+            else:
+                self.index.remove(vehicle_id)
+
+
+_directory: Optional[PlateDirectory] = None
+_directory_lock = threading.Lock()
+
+
+def get_plate_directory() -> PlateDirectory:
+    """Process-wide directory; feeds the shared plate index."""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = PlateDirectory(index=get_plate_index())
+    return _directory
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+# Characters OCR commonly mistakes for each other. Each group collapses to
+# one skeleton symbol, and a swap within a group is a cheap edit.
+_CONFUSABLE_GROUPS = ("0ODQU", "1IL", "8B", "5S", "2Z", "6G", "4A", "7T")
+_SKELETON = {ch: group[0] for group in _CONFUSABLE_GROUPS for ch in group}
+_CONFUSION_COST = 0.25
+
+
+class PlateMatch(NamedTuple):
+    plate: str
+    vehicle_id: int
+    user_id: Optional[int]
+    distance: float
+
+
+def normalise_plate(plate: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", (plate or "").upper())
+
+
+def plate_skeleton(plate: str) -> str:
+    return "".join(_SKELETON.get(ch, ch) for ch in normalise_plate(plate))
+
+
+def _levenshtein(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def plate_distance(a: str, b: str) -> float:
+    """Edit distance where swapping confusable characters (O/0, B/8, ...) costs 0.25."""
+    prev = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        cur = [float(i)]
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                sub = 0.0
+            elif _SKELETON.get(ca, ca) == _SKELETON.get(cb, cb):
+                sub = _CONFUSION_COST
+            else:
+                sub = 1.0
+            cur.append(min(prev[j] + 1.0, cur[j - 1] + 1.0, prev[j - 1] + sub))
+        prev = cur
+    return prev[-1]
+
+
+def _deletions(skeleton: str) -> set[str]:
+    """The skeleton itself plus every string one deletion away from it."""
+    return {skeleton} | {skeleton[:i] + skeleton[i + 1:] for i in range(len(skeleton))}
+
+
+class PlateIndex:
+    """In-memory index of active plates for OCR-tolerant lookup.
+
+    Plates are keyed by skeleton (confusable characters collapsed), so a read
+    that differs only by O/0-style swaps is a single dict hit. Each skeleton
+    is also filed under its single-character deletions; two strings one
+    substitution, insertion or deletion apart always share one of those, so
+    near matches cost about a dozen dict lookups regardless of index size.
+    Candidates are ranked by the weighted ``plate_distance`` on the real
+    characters.
+
+    Filled and kept current by services/plate_directory.py.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_skeleton: dict[str, dict[int, tuple[str, Optional[int]]]] = {}
+        self._by_deletion: dict[str, set[str]] = {}
+        self._by_vehicle: dict[int, str] = {}  # vehicle_id -> skeleton
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._by_vehicle)
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self, rows: Iterable[tuple[int, str, Optional[int]]]) -> None:
+        """Replace the contents with (vehicle_id, plate_number, user_id) rows."""
+        with self._lock:
+            self._by_skeleton = {}
+            self._by_deletion = {}
+            self._by_vehicle = {}
+            for vehicle_id, plate, user_id in rows:
+                self._add(vehicle_id, plate, user_id)
+            self.loaded_at = time.time()
+
+    def add(self, vehicle_id: int, plate: str, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._add(vehicle_id, plate, user_id)
+
+    def remove(self, vehicle_id: int) -> None:
+        with self._lock:
+            skeleton = self._by_vehicle.pop(vehicle_id, None)
+            if skeleton is None:
+                return
+            bucket = self._by_skeleton[skeleton]
+            bucket.pop(vehicle_id, None)
+            if bucket:
+                return
+            del self._by_skeleton[skeleton]
+            for key in _deletions(skeleton):
+                owners = self._by_deletion.get(key)
+                if owners is not None:
+                    owners.discard(skeleton)
+                    if not owners:
+                        del self._by_deletion[key]
+
+    def search(self, plate: str, limit: int = 5, max_edits: int = 2) -> list[PlateMatch]:
+        """Active plates near ``plate``, closest first.
+
+        Finds every plate within one edit of the read once confusable
+        characters are collapsed, plus some at two (``max_edits`` caps it).
+        """
+        query = normalise_plate(plate)
+        if not query:
+            return []
+        skeleton = plate_skeleton(query)
+        found: dict[int, tuple[str, Optional[int]]] = {}
+        with self._lock:
+            candidates: set[str] = set()
+            for key in _deletions(skeleton):
+                candidates.update(self._by_deletion.get(key, ()))
+            for other in candidates:
+                if other == skeleton or _levenshtein(skeleton, other) <= max_edits:
+                    found.update(self._by_skeleton.get(other, {}))
+        matches = [
+            PlateMatch(p, vid, uid, plate_distance(query, p)) for vid, (p, uid) in found.items()
+        ]
+        matches.sort(key=lambda m: (m.distance, m.plate))
+        return matches[:limit]
+
+    # Called with self._lock held
+    def _add(self, vehicle_id: int, plate: str, user_id: Optional[int]) -> None:
+        plate = normalise_plate(plate)
+        if not plate:
+            return
+        if vehicle_id in self._by_vehicle:
+            self.remove(vehicle_id)
+        skeleton = plate_skeleton(plate)
+        bucket = self._by_skeleton.get(skeleton)
+        if bucket is None:
+            bucket = self._by_skeleton[skeleton] = {}
+            for key in _deletions(skeleton):
+                self._by_deletion.setdefault(key, set()).add(skeleton)
+        bucket[vehicle_id] = (plate, user_id)
+        self._by_vehicle[vehicle_id] = skeleton
+
+
+_index: Optional[PlateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_plate_index() -> PlateIndex:
+    """Process-wide index shared by the parking and member services."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PlateIndex()
+    return _index
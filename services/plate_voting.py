@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+from services.ocr_service import _PLATE_RE
+
+# Frames read per vehicle before settling on the best plate seen so far
+OCR_BURST = int(os.environ.get("PARKING_OCR_BURST", "5"))
+# Voted confidence at which a burst stops early
+OCR_VOTE_THRESHOLD = float(os.environ.get("PARKING_OCR_VOTE_THRESHOLD", "0.9"))
+
+
+class VoteResult(NamedTuple):
+    plate: str
+    conf: float
+    frames: int  # reads that went into the vote
+    decided: bool  # True when the threshold was reached, False if the burst ran out
+
+
+class PlateVoter:
+    """Combine several reads of one vehicle into a single plate.
+
+    Reads are grouped by length (a dropped or extra character shifts every
+    position after it, so only equal-length reads are compared). Within the
+    strongest group each position is decided by a confidence-weighted vote.
+    A position's confidence is the winner's share of the vote times the chance
+    that at least one agreeing read is right; the plate's confidence is its
+    weakest position, scaled by the group's share of all reads.
+    """
+
+    def __init__(self, threshold: float = OCR_VOTE_THRESHOLD, min_frames: int = 2,
+                 max_frames: int = OCR_BURST):
+        self.threshold = threshold
+        self.min_frames = min_frames
+        self.max_frames = max(max_frames, 1)
+        self._reads: list[tuple[str, float]] = []
+        self.frames = 0  # includes reads with no text
+
+    def reset(self) -> None:
+        self._reads.clear()
+        self.frames = 0
+
+    @property
+    def done(self) -> bool:
+        return self.frames >= self.max_frames or self._decided(self.current())
+
+    def add(self, plate: str, conf: float) -> Optional[VoteResult]:
+        """Record one read; return the result once the vote is settled."""
+        self.frames += 1
+        plate = re.sub(r"[^A-Z0-9]", "", (plate or "").upper())
+        if plate:
+            self._reads.append((plate, max(0.0, min(float(conf), 1.0))))
+        best = self.current()
+        if self._decided(best):
+            return best._replace(decided=True)
+        if self.frames >= self.max_frames:
+            return best if best.plate else None
+        return None
+
+    def current(self) -> VoteResult:
+        if not self._reads:
+            return VoteResult("", 0.0, self.frames, False)
+        groups: dict[int, list[tuple[str, float]]] = defaultdict(list)
+        for plate, conf in self._reads:
+            groups[len(plate)].append((plate, conf))
+        total = sum(conf for _, conf in self._reads) or 1.0
+
+        def _group_score(reads):
+            # Prefer lengths that form a valid plate, then the heaviest vote
+            return (any(_PLATE_RE.fullmatch(p) for p, _ in reads), sum(c for _, c in reads))
+
+        reads = max(groups.values(), key=_group_score)
+        group_weight = sum(conf for _, conf in reads)
+        chars, scores = [], []
+        for pos in range(len(reads[0][0])):
+            votes: dict[str, list[float]] = defaultdict(list)
+            for plate, conf in reads:
+                votes[plate[pos]].append(conf)
+            char, agreeing = max(votes.items(), key=lambda kv: sum(kv[1]))
+            miss = 1.0
+            for conf in agreeing:
+                miss *= 1.0 - conf
+            share = sum(agreeing) / group_weight if group_weight else 0.0
+            chars.append(char)
+            scores.append(share * (1.0 - miss))
+        conf = min(scores) * (group_weight / total)
+        return VoteResult("".join(chars), conf, self.frames, False)
+
+    def _decided(self, result: VoteResult) -> bool:
+        return bool(result.plate) and self.frames >= self.min_frames and result.conf >= self.threshold
+
+
+def vote_burst(ocr, images: Iterable, voter: Optional[PlateVoter] = None,
+               batch: Optional[int] = None) -> VoteResult:
+    """OCR ``images`` (paths or frames) until the vote settles.
+
+    With an OCR worker pool, up to ``batch`` images are read in parallel;
+    the next batch is only sent if the vote is still open, so a clear plate
+    costs one round of reads instead of the whole burst.
+    """
+    voter = voter or PlateVoter()
+    submit = getattr(ocr, "submit", None)
+    batch = max(batch or getattr(ocr, "workers", 1), 1)
+    pending: list = []
+
+    def _flush() -> Optional[VoteResult]:
+        if submit is not None:
+            futures = [submit(image) for image in pending]
+            results = [f.result() for f in futures]
+        else:
+            results = [ocr.extract_plate(image) for image in pending]
+        pending.clear()
+        settled = None
+        for plate, conf in results:
+            settled = voter.add(plate, conf) or settled
+        return settled
+
+    for image in images:
+        pending.append(image)
+        if len(pending) >= (batch if submit is not None else 1):
+            result = _flush()
+            if result is not None and (result.decided or voter.done):
+                return result
+        if voter.frames + len(pending) >= voter.max_frames:
+            break
+    if pending:
+        result = _flush()
+        if result is not None:
+            return result
+    return voter.current()
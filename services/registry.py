@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+from typing import Iterable
+
+log = logging.getLogger(__name__)
+
+# name -> (module, class or factory); modules are imported on first use so that
+# heavy dependencies (PaddleOCR, mysql-connector) stay off the startup path
+_FACTORIES = {
+    "auth": ("services.auth_service", "AuthService"),
+    "parking": ("services.parking_service", "ParkingService"),
+    "member": ("services.member_service", "MemberService"),
+    "admin": ("services.admin_service", "AdminService"),
+    "kpi": ("services.kpi_service", "KPIService"),
+    "rollup": ("services.rollup_service", "RollupService"),
+    "versions": ("services.data_versions", "DataVersions"),
+    "ocr": ("services.ocr_pool", "create_plate_reader"),
+}
+
+# What each dashboard needs, used to warm services right after login
+ROLE_SERVICES = {
+    "guard": ("parking", "kpi", "ocr"),
+    "member": ("member",),
+    "admin": ("admin", "kpi", "rollup"),
+}
+
+
+class ServiceRegistry:
+    def __init__(self, factories: dict | None = None):
+        self._factories = dict(factories or _FACTORIES)
+        self._instances: dict[str, object] = {}
+        self._locks: dict[str, threading.Lock] = {name: threading.Lock() for name in self._factories}
+
+    def register(self, name: str, factory) -> None:
+        """Register a callable (or (module, class) pair) that builds a service."""
+        self._factories[name] = factory
+        self._locks.setdefault(name, threading.Lock())
+        self._instances.pop(name, None)
+
+    def get(self, name: str):
+        inst = self._instances.get(name)
+        if inst is not None:
+            return inst
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        # Per-service lock: warming the OCR model must not block the DB services
+        with self._locks[name]:
+            inst = self._instances.get(name)
+            if inst is None:
+                inst = self._build(self._factories[name])
+                self._instances[name] = inst
+        return inst
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm(self, names: Iterable[str], background: bool = True, on_error=None) -> threading.Thread | None:
+        """Construct services ahead of first use, by default in a daemon thread."""
+        names = list(names)
+
+        def _run():
+            for name in names:
+                try:
+                    inst = self.get(name)
+                    warmup = getattr(inst, "warmup", None)
+                    if callable(warmup):
+                        warmup()
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(name, e)
+                    else:
+                        log.warning("Warmup of '%s' failed: %s", name, e)
+
+        if not background:
+            _run()
+            return None
+        t = threading.Thread(target=_run, name="service-warmup", daemon=True)
+        t.start()
+        return t
+
+    @staticmethod
+    def _build(factory):
+        if isinstance(factory, tuple):
+            module_name, class_name = factory
+            return getattr(importlib.import_module(module_name), class_name)()
+        return factory()
+
+
+registry = ServiceRegistry()
+
+
+def get_service(name: str):
+    return registry.get(name)
+
+
+def warm_for_role(role: str) -> threading.Thread | None:
+    return registry.warm(ROLE_SERVICES.get(role, ()))
@@ -0,0 +1,247 @@
+"""Hourly and daily occupancy rollups.
+
+Allocation and exit update the current hour and day in their own
+transaction (``record_entry`` / ``record_exit``, see ParkingService), so
+dashboards and reports read a handful of primary-key rows instead of scanning parking_events.
+Each bucket is kept per zone ('' for slots without one) and for the whole
+lot under ALL_ZONES. Rebuild from history (run while gates are idle):
+
+    python -m services.rollup_service --backfill
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from db.connection import pooled_connection
+
+ALL_ZONES = "*"
+
+_BUMP_SQL = """
+    INSERT INTO {table} ({key}, zone, entries, exits, dwell_seconds, peak_occupancy)
+    VALUES (%s,%s,%s,%s,%s,%s)
+    ON DUPLICATE KEY UPDATE
+      entries=entries + VALUES(entries),
+      exits=exits + VALUES(exits),
+      dwell_seconds=dwell_seconds + VALUES(dwell_seconds),
+      peak_occupancy=GREATEST(peak_occupancy, VALUES(peak_occupancy))
+"""
+
+
+def _hour(at: datetime) -> datetime:
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def _bump(cur, zone: str, at: datetime, entries: int, exits: int, dwell: int, occupancy: int) -> None:
+    cur.execute(_BUMP_SQL.format(table="occupancy_hourly", key="bucket"),
+                (_hour(at), zone, entries, exits, dwell, occupancy))
+    cur.execute(_BUMP_SQL.format(table="occupancy_daily", key="day"),
+                (at.date(), zone, entries, exits, dwell, occupancy))
+
+
+def _move(cur, zone: str, delta: int) -> int:
+    """Shift a zone's live occupancy and return the new value."""
+    cur.execute(
+        """
+        INSERT INTO zone_occupancy (zone, current) VALUES (%s, GREATEST(%s, 0))
+        ON DUPLICATE KEY UPDATE current=GREATEST(current + %s, 0)
+        """,
+        (zone, delta, delta),
+    )
+    cur.execute("SELECT current FROM zone_occupancy WHERE zone=%s", (zone,))
+    (current,) = cur.fetchone() or (0,)
+    return int(current)
+
+
+def record_entry(conn, event_id: int) -> datetime:
+    """Count a new parking event; call in its allocating transaction. Returns its entry_time."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT COALESCE(s.zone, ''), pe.entry_time
+            FROM parking_events pe JOIN slots s ON s.id=pe.slot_id WHERE pe.id=%s
+            """,
+            (event_id,),
+        )
+        zone, at = cur.fetchone()
+        for key in (zone, ALL_ZONES):
+            _bump(cur, key, at, 1, 0, 0, _move(cur, key, 1))
+    finally:
+        cur.close()
+    return at
+
+
+def record_exit(conn, event_id: int) -> None:
+    """Count an exit; call in the exit's transaction, after exit_time is set."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT COALESCE(s.zone, ''), pe.exit_time, TIMESTAMPDIFF(SECOND, pe.entry_time, pe.exit_time)
+            FROM parking_events pe JOIN slots s ON s.id=pe.slot_id WHERE pe.id=%s
+            """,
+            (event_id,),
+        )
+        zone, at, dwell = cur.fetchone()
+        for key in (zone, ALL_ZONES):
+            # Peak is the occupancy just before the car left
+            _bump(cur, key, at, 0, 1, max(int(dwell or 0), 0), _move(cur, key, -1) + 1)
+    finally:
+        cur.close()
+
+
+def _row(r: Optional[dict], current: int = 0) -> dict:
+    r = r or {}
+    exits = int(r.get("exits") or 0)
+    return {
+        "entries": int(r.get("entries") or 0),
+        "exits": exits,
+        "peak_occupancy": max(int(r.get("peak_occupancy") or 0), current),
+        "avg_dwell_minutes": (int(r.get("dwell_seconds") or 0) / exits / 60.0) if exits else 0.0,
+    }
+
+
+class RollupService:
+    def today(self, zone: str = ALL_ZONES) -> dict:
+        """Today's entries, exits, peak and average dwell, plus the live occupancy."""
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(
+                """
+                SELECT d.entries, d.exits, d.dwell_seconds, d.peak_occupancy, z.current
+                FROM zone_occupancy z
+                LEFT JOIN occupancy_daily d ON d.day=CURRENT_DATE AND d.zone=z.zone
+                WHERE z.zone=%s
+                """,
+                (zone,),
+            )
+            r = cur.fetchone()
+            cur.close()
+        current = int((r or {}).get("current") or 0)
+        return dict(_row(r, current), current=current)
+
+    def count_today_entries(self, zone: str = ALL_ZONES) -> int:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT entries FROM occupancy_daily WHERE day=CURRENT_DATE AND zone=%s", (zone,))
+            (n,) = cur.fetchone() or (0,)
+            cur.close()
+        return int(n or 0)
+
+    def hourly(self, day: date, zone: str = ALL_ZONES) -> list[dict]:
+        start = datetime.combine(day, datetime.min.time())
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(
+                """
+                SELECT bucket, entries, exits, dwell_seconds, peak_occupancy FROM occupancy_hourly
+                WHERE zone=%s AND bucket >= %s AND bucket < %s ORDER BY bucket
+                """,
+                (zone, start, start + timedelta(days=1)),
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        return [dict(_row(r), bucket=r["bucket"]) for r in rows]
+
+    def daily(self, start: date, end: date, zone: str = ALL_ZONES) -> list[dict]:
+        """Days in [start, end], oldest first."""
+        with pooled_connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(
+                """
+                SELECT day, entries, exits, dwell_seconds, peak_occupancy FROM occupancy_daily
+                WHERE zone=%s AND day BETWEEN %s AND %s ORDER BY day
+                """,
+                (zone, start, end),
+            )
+            rows = cur.fetchall() or []
+            cur.close()
+        return [dict(_row(r), day=r["day"]) for r in rows]
+
+    def zones(self) -> list[str]:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT zone FROM zone_occupancy WHERE zone<>%s ORDER BY zone", (ALL_ZONES,))
+            rows = [z for (z,) in cur.fetchall() or []]
+            cur.close()
+        return rows
+
+    def backfill(self, batch: int = 1000) -> int:
+        """Rebuild every rollup from live and archived events; returns the number read."""
+        points = []  # (time, +1 entry / -1 exit, zone, dwell seconds)
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT pe.entry_time, pe.exit_time, COALESCE(s.zone, '')
+                FROM parking_events_history pe JOIN slots s ON s.id=pe.slot_id
+                """
+            )
+            events = 0
+            for entry_time, exit_time, zone in cur:
+                events += 1
+                points.append((entry_time, 1, zone, 0))
+                if exit_time is not None:
+                    points.append((exit_time, -1, zone, max(int((exit_time - entry_time).total_seconds()), 0)))
+            cur.close()
+        # Exits before entries at the same instant, so a swap does not inflate the peak
+        points.sort(key=lambda p: (p[0], p[1]))
+
+        hourly: dict[tuple, list[int]] = {}
+        daily: dict[tuple, list[int]] = {}
+        occupancy: dict[str, int] = {}
+        for at, step, zone, dwell in points:
+            for key in (zone, ALL_ZONES):
+                before = occupancy.get(key, 0)
+                after = max(before + step, 0)
+                occupancy[key] = after
+                for table, bucket in ((hourly, _hour(at)), (daily, at.date())):
+                    # A bucket's peak starts from whatever was parked when it opened
+                    acc = table.setdefault((bucket, key), [0, 0, 0, before])
+                    acc[0 if step > 0 else 1] += 1
+                    acc[2] += dwell
+                    acc[3] = max(acc[3], before, after)
+
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("DELETE FROM occupancy_hourly")
+                cur.execute("DELETE FROM occupancy_daily")
+                cur.execute("DELETE FROM zone_occupancy")
+                for table, key, data in (("occupancy_hourly", "bucket", hourly), ("occupancy_daily", "day", daily)):
+                    rows = [(b, z, *acc) for (b, z), acc in data.items()]
+                    for i in range(0, len(rows), batch):
+                        cur.executemany(
+                            f"INSERT INTO {table} ({key}, zone, entries, exits, dwell_seconds, peak_occupancy)"
+                            " VALUES (%s,%s,%s,%s,%s,%s)",
+                            rows[i:i + batch],
+                        )
+                cur.executemany(
+                    "INSERT INTO zone_occupancy (zone, current) VALUES (%s,%s)",
+                    list(occupancy.items()) or [(ALL_ZONES, 0)],
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+        return events
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Occupancy rollups")
+    ap.add_argument("--backfill", action="store_true", help="rebuild all rollups from event history")
+    args = ap.parse_args(argv)
+    rollups = RollupService()
+    if args.backfill:
+        print(f"Rebuilt rollups from {rollups.backfill()} events")
+    t = rollups.today()
+    print(f"Today: {t['entries']} entries, {t['exits']} exits, peak {t['peak_occupancy']}, "
+          f"avg dwell {t['avg_dwell_minutes']:.0f} min, {t['current']} inside now")
+
+
+if __name__ == "__main__":
+    main()
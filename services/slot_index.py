@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+
+log = logging.getLogger(__name__)
+
+# Pull rows changed by other stations at most this often (seconds)
+SLOT_RECONCILE_INTERVAL = float(os.environ.get("PARKING_SLOT_RECONCILE", "2"))
+# Full reload interval (seconds); also picks up deleted slots
+SLOT_INDEX_TTL = float(os.environ.get("PARKING_SLOT_INDEX_TTL", "300"))
+# last_changed_at is set when a row is written, not when it commits, so
+# re-read a little behind the watermark to catch slow commits
+_RECONCILE_OVERLAP = timedelta(seconds=5)
+
+
+class SlotIndex:
+    """Free slots bucketed by (zone, level), each bucket sorted by code.
+
+    Loaded once from ``slots``, updated in place when this process allocates
+    or releases a slot, and reconciled against ``slots.last_changed_at`` for
+    changes made elsewhere. ``first_free`` is a dict lookup plus a list head.
+    """
+
+    def __init__(self, reconcile_interval: float = SLOT_RECONCILE_INTERVAL, ttl: float = SLOT_INDEX_TTL):
+        self.reconcile_interval = reconcile_interval
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._slots: dict[int, tuple[str, str, str, str]] = {}  # id -> (code, zone, level, status)
+        self._free: dict[tuple[str, str], list[tuple[str, int]]] = {}
+        self._watermark = None
+        # Change log for screens that redraw incrementally (changes_since)
+        self._epoch = 0
+        self._version = 0
+        self._changed: dict[int, int] = {}  # slot id -> version of its last change
+        self.loaded_at: Optional[float] = None
+        self.reconciled_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # Sync with the DB
+    def load(self, rows: Iterable[tuple]) -> None:
+        """Replace the contents with (id, code, zone, level, status, last_changed_at) rows."""
+        with self._lock:
+            self._slots = {}
+            self._free = {}
+            self._watermark = None
+            # Slots may have been deleted; clients start over from a full list
+            self._epoch += 1
+            self._changed = {}
+            self._apply(rows)
+            self.loaded_at = self.reconciled_at = time.time()
+
+    def refresh(self) -> None:
+        self.load(self._fetch(None))
+
+    def reconcile(self) -> int:
+        """Apply rows changed since the last sync; returns how many were read."""
+        with self._lock:
+            since = self._watermark
+        if since is None:
+            self.refresh()
+            return len(self)
+        rows = self._fetch(since - _RECONCILE_OVERLAP)
+        with self._lock:
+            self._apply(rows)
+            self.reconciled_at = time.time()
+        return len(rows)
+
+    def ensure_fresh(self) -> None:
+        now = time.time()
+        try:
+            if self.loaded_at is None or (self.ttl > 0 and now - self.loaded_at > self.ttl):
+                self.refresh()
+            elif now - self.reconciled_at > self.reconcile_interval:
+                self.reconcile()
+        except Exception as e:
+            if self.loaded_at is None:
+                raise
+            # DB unreachable: keep serving the last copy and retry after the interval
+            self.reconciled_at = now
+            log.warning("Serving cached slots: %s", e)
+
+    # Local snapshot (services/local_snapshot.py)
+    def export(self) -> tuple[list[tuple], object]:
+        """Current rows in ``load`` shape, plus the sync watermark."""
+        with self._lock:
+            rows = [(slot_id, *slot, None) for slot_id, slot in self._slots.items()]
+            return rows, self._watermark
+
+    def restore(self, rows: Iterable[tuple], watermark, saved_at: float) -> bool:
+        """Seed from a saved copy; the next ``ensure_fresh`` pulls what changed since."""
+        with self._lock:
+            if self.loaded_at is not None:
+                return False
+            self.load(rows)
+            self._watermark = watermark
+            self.loaded_at = saved_at
+            self.reconciled_at = 0.0
+            return True
+
+    @staticmethod
+    def _fetch(since) -> list[tuple]:
+        from db.connection import pooled_connection
+
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            if since is None:
+                cur.execute("SELECT id, code, zone, level, status, last_changed_at FROM slots")
+            else:
+                cur.execute(
+                    "SELECT id, code, zone, level, status, last_changed_at FROM slots WHERE last_changed_at >= %s",
+                    (since,),
+                )
+            rows = cur.fetchall() or []
+            cur.close()
+        return rows
+
+    # Local updates, called after this process commits a change
+    def mark(self, slot_id: int, status: str) -> None:
+        with self._lock:
+            slot = self._slots.get(slot_id)
+            if slot is not None:
+                code, zone, level, _ = slot
+                self._set(slot_id, code, zone, level, status)
+
+    # Queries
+    def available(self, zone: Optional[str] = None, level: Optional[str] = None) -> list[dict]:
+        """Free slots ordered by code, optionally limited to a zone and/or level."""
+        with self._lock:
+            buckets = [b for key, b in self._free.items() if self._matches(key, zone, level)]
+            merged = heapq.merge(*buckets) if len(buckets) > 1 else (buckets[0] if buckets else [])
+            return [{"id": slot_id, "code": code} for code, slot_id in merged]
+
+    def first_free(self, zone: Optional[str] = None, level: Optional[str] = None) -> Optional[dict]:
+        with self._lock:
+            if zone is not None and level is not None:
+                bucket = self._free.get((zone, level))
+                heads = [bucket[0]] if bucket else []
+            else:
+                heads = [b[0] for key, b in self._free.items() if b and self._matches(key, zone, level)]
+            if not heads:
+                return None
+            code, slot_id = min(heads)
+            return {"id": slot_id, "code": code}
+
+    def free_count(self, zone: Optional[str] = None, level: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(len(b) for key, b in self._free.items() if self._matches(key, zone, level))
+
+    def changes_since(self, version: int = 0, epoch: Optional[int] = None) -> dict:
+        """Slots changed after ``version``, as (id, code, zone, level, status) rows.
+
+        Pass back the ``epoch`` and ``version`` from the previous call. After a
+        full reload the epoch moves on and every slot is returned with
+        ``full`` set, so the caller can also drop slots that disappeared.
+        """
+        with self._lock:
+            full = epoch != self._epoch
+            rows = [
+                (slot_id, *slot) for slot_id, slot in self._slots.items()
+                if full or self._changed.get(slot_id, 0) > version
+            ]
+            return {"epoch": self._epoch, "version": self._version, "full": full, "slots": rows}
+
+    def zones(self) -> list[tuple[str, str]]:
+        with self._lock:
+            return sorted({(zone, level) for _, zone, level, _ in self._slots.values()})
+
+    @staticmethod
+    def _matches(key: tuple[str, str], zone: Optional[str], level: Optional[str]) -> bool:
+        return (zone is None or key[0] == zone) and (level is None or key[1] == level)
+
+    # Called with self._lock held
+    def _apply(self, rows: Iterable[tuple]) -> None:
+        for slot_id, code, zone, level, status, changed_at in rows:
+            self._set(slot_id, code, zone or "", level or "", status)
+            if changed_at is not None and (self._watermark is None or changed_at > self._watermark):
+                self._watermark = changed_at
+
+    def _set(self, slot_id: int, code: str, zone: str, level: str, status: str) -> None:
+        old = self._slots.get(slot_id)
+        if old is not None and old[3] == "available":
+            bucket = self._free.get((old[1], old[2]), [])
+            i = bisect.bisect_left(bucket, (old[0], slot_id))
+            if i < len(bucket) and bucket[i] == (old[0], slot_id):
+                del bucket[i]
+        self._slots[slot_id] = (code, zone, level, status)
+        if old != self._slots[slot_id]:
+            self._version += 1
+            self._changed[slot_id] = self._version
+        if status == "available":
+            bisect.insort(self._free.setdefault((zone, level), []), (code, slot_id))
+
+
+_index: Optional[SlotIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_slot_index() -> SlotIndex:
+    """Process-wide slot index shared by every guard screen."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SlotIndex()
+    return _index
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from db.connection import ConnectError, ConnectionPool, PoolTimeout
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError("server has gone away")
+
+    def reconnect(self, attempts=1, delay=0):
+        raise OSError("still down")
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**kwargs):
+    opened = []
+
+    def _connect():
+        opened.append(_FakeConnection())
+        return opened[-1]
+
+    return ConnectionPool(connect=_connect, **kwargs), opened
+
+
+def test_checkout_times_out_when_pool_is_exhausted():
+    pool, _ = _pool(size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+
+def test_waiter_gets_connection_released_meanwhile():
+    pool, _ = _pool(size=1, timeout=2)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, (conn,)).start()
+    assert pool.acquire() is conn
+
+
+def test_old_connection_is_recycled():
+    pool, opened = _pool(size=1, max_lifetime=60)
+    conn = pool.acquire()
+    pool.release(conn)
+    pool._created_at[id(conn)] -= 120
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert len(opened) == 2
+    assert pool.stats()["recycled"] == 1
+
+
+def test_dropped_connection_is_replaced():
+    pool, opened = _pool(size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+    assert pool.acquire() is opened[1]
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_open_transaction_is_rolled_back_on_release():
+    pool, _ = _pool(size=1)
+    conn = pool.acquire()
+    conn.in_transaction = True
+    pool.release(conn)
+    assert not conn.in_transaction
+
+
+def test_unreachable_server_raises_connect_error_and_frees_slot():
+    def _refuse():
+        raise ConnectionRefusedError("can't connect")
+
+    pool = ConnectionPool(size=1, timeout=0.05, connect=_refuse)
+    with pytest.raises(ConnectError):
+        pool.acquire()
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,62 @@
+import pytest
+
+from db.connection import DatabaseUnavailable
+from services.offline_queue import OfflineQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = OfflineQueue(str(tmp_path / "queue.db"), retry_interval=3600)
+    yield q
+    q.stop()
+
+
+def test_replays_in_order_and_survives_reopen(queue, tmp_path):
+    queue.append("allocate", {"slot_id": 1})
+    queue.append("process_exit", {"plate": "KA01AB1234"})
+    assert len(OfflineQueue(queue.path)) == 2
+
+    seen = []
+    handlers = {
+        "allocate": lambda at, **args: seen.append(("allocate", args)),
+        "process_exit": lambda at, **args: seen.append(("process_exit", args)),
+    }
+    assert queue.replay(handlers) == (2, 0)
+    assert seen == [("allocate", {"slot_id": 1}), ("process_exit", {"plate": "KA01AB1234"})]
+    assert len(queue) == 0
+
+
+def test_conflicts_are_set_aside_without_blocking(queue):
+    queue.append("allocate", {"slot_id": 1})
+    queue.append("process_exit", {"plate": "KA01AB1234"})
+    queue.append("raise_flag", {"reason": "x"})
+    reported = []
+
+    def _taken(at, **args):
+        raise ValueError("Slot not available")
+
+    handlers = {"allocate": _taken, "process_exit": lambda at, **args: False, "raise_flag": lambda at, **args: None}
+    assert queue.replay(handlers, lambda item, reason: reported.append((item.op, reason))) == (1, 2)
+    assert reported == [("allocate", "Slot not available"), ("process_exit", "No longer applies")]
+    assert [c["op"] for c in queue.conflicts()] == ["allocate", "process_exit"]
+    assert len(queue) == 0
+
+
+def test_outage_stops_replay_and_keeps_order(queue):
+    queue.append("allocate", {"slot_id": 1})
+    queue.append("allocate", {"slot_id": 2})
+    calls = []
+
+    def _down(at, **args):
+        calls.append(args["slot_id"])
+        raise DatabaseUnavailable("gone")
+
+    assert queue.replay({"allocate": _down}) == (0, 0)
+    assert calls == [1]
+    assert [op.args["slot_id"] for op in queue.pending()] == [1, 2]
+
+
+def test_unknown_operation_is_a_conflict(queue):
+    queue.append("teleport", {})
+    assert queue.replay({}) == (0, 1)
+    assert "Unknown operation" in queue.conflicts()[0]["detail"]
@@ -0,0 +1,35 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from services.plate_detector import PlateLocator  # noqa: E402
+
+
+def _scene(tilt: float, characters: bool = True):
+    """A white plate on a dark car body, tilted by ``tilt`` degrees."""
+    # No wider than PlateLocator.work_width, so the box is measured at full resolution
+    image = np.full((480, 640, 3), 50, np.uint8)
+    plate = np.full((80, 320, 3), 235, np.uint8)
+    for i in range(8 if characters else 0):
+        cv2.rectangle(plate, (24 + i * 36, 18), (44 + i * 36, 62), (20, 20, 20), -1)
+    rot = cv2.getRotationMatrix2D((160, 40), tilt, 1.0)
+    rot[:, 2] += (320 - 160, 240 - 40)
+    mask = cv2.warpAffine(np.full((80, 320), 255, np.uint8), rot, (640, 480))
+    warped = cv2.warpAffine(plate, rot, (640, 480))
+    image[mask > 0] = warped[mask > 0]
+    return image
+
+
+@pytest.mark.parametrize("tilt,characters", [(0.0, False), (0.0, True), (8.0, True), (-12.0, True)])
+def test_crop_is_the_levelled_plate(tilt, characters):
+    crops = PlateLocator().locate(_scene(tilt, characters))
+    assert crops
+    crop = cv2.cvtColor(crops[0], cv2.COLOR_BGR2GRAY)
+    h, w = crop.shape
+    assert w > 2.5 * h
+    # Mostly plate: a quarter-turned crop is mostly car body instead
+    assert (crop > 150).mean() > 0.45
+    if characters:
+        # Levelled: the character row runs across the middle of the crop
+        assert (crop[h // 2] < 100).sum() >= 8 * 15
@@ -0,0 +1,46 @@
+from services.plate_index import PlateIndex, normalise_plate, plate_distance
+
+
+def _index():
+    index = PlateIndex()
+    index.load([(1, "KA01AB1234", 10), (2, "MH12CD5678", 20), (3, "DL8CAF0001", 30)])
+    return index
+
+
+def test_normalise_strips_spacing_and_case():
+    assert normalise_plate(" ka-01 ab 1234 ") == "KA01AB1234"
+
+
+def test_confusable_swap_is_cheaper_than_a_real_edit():
+    assert plate_distance("KA01AB1234", "KAO1AB1234") == 0.25
+    assert plate_distance("KA01AB1234", "KA01AB1235") == 1.0
+
+
+def test_exact_match_ranks_first():
+    matches = _index().search("KA01AB1234")
+    assert matches[0].vehicle_id == 1
+    assert matches[0].distance == 0
+
+
+def test_confusable_read_finds_plate():
+    # O for 0 and 8 for B, as OCR tends to read them
+    (match, *_) = _index().search("KAO1A81234")
+    assert (match.vehicle_id, match.user_id) == (1, 10)
+    assert match.distance == 0.5
+
+
+def test_one_dropped_character_still_matches():
+    assert [m.vehicle_id for m in _index().search("MH12CD568")] == [2]
+
+
+def test_unrelated_plate_does_not_match():
+    assert _index().search("ZZ99ZZ9999") == []
+
+
+def test_remove_and_readd_moves_plate():
+    index = _index()
+    index.remove(1)
+    assert index.search("KA01AB1234") == []
+    index.add(1, "KA01AB9999", 10)
+    assert [m.plate for m in index.search("KA01AB9999")] == ["KA01AB9999"]
+    assert len(index) == 3
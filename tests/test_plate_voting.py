@@ -0,0 +1,50 @@
+from services.plate_voting import PlateVoter, vote_burst
+
+
+class _FakeOCR:
+    def __init__(self, reads):
+        self.reads = list(reads)
+        self.calls = 0
+
+    def extract_plate(self, _image):
+        self.calls += 1
+        return self.reads.pop(0)
+
+
+def test_positions_are_voted_across_reads():
+    voter = PlateVoter(threshold=1.1, max_frames=3)
+    voter.add("KA01AB1234", 0.8)
+    voter.add("KA01A81234", 0.6)
+    result = voter.add("KA01AB1234", 0.8)
+    assert result.plate == "KA01AB1234"
+    assert not result.decided
+
+
+def test_valid_length_group_wins_over_heavier_invalid_one():
+    voter = PlateVoter(threshold=1.1, max_frames=3)
+    voter.add("KA01AB12", 0.9)
+    voter.add("KA01AB12", 0.9)
+    result = voter.add("KA01AB1234", 0.5)
+    assert result.plate == "KA01AB1234"
+
+
+def test_agreeing_reads_settle_early():
+    voter = PlateVoter(threshold=0.9, min_frames=2, max_frames=5)
+    assert voter.add("KA01AB1234", 0.95) is None  # below min_frames
+    result = voter.add("KA01AB1234", 0.95)
+    assert result.decided
+    assert result.conf >= 0.9
+
+
+def test_empty_reads_give_no_plate():
+    voter = PlateVoter(max_frames=2)
+    voter.add("", 0.0)
+    assert voter.add("", 0.0) is None
+    assert voter.current().plate == ""
+
+
+def test_burst_stops_once_decided():
+    ocr = _FakeOCR([("KA01AB1234", 0.97)] * 5)
+    result = vote_burst(ocr, range(5), PlateVoter(threshold=0.9, min_frames=2, max_frames=5))
+    assert result.plate == "KA01AB1234"
+    assert ocr.calls == 2
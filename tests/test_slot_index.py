@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from services import slot_index
+from services.slot_index import SlotIndex
+
+T0 = datetime(2026, 1, 1, 8, 0)
+
+
+def _loaded(monkeypatch, rows):
+    index = SlotIndex(reconcile_interval=0, ttl=0)
+    fetched = []
+
+    def _fetch(since):
+        fetched.append(since)
+        return rows.pop(0)
+
+    monkeypatch.setattr(SlotIndex, "_fetch", staticmethod(_fetch))
+    index.refresh()
+    return index, fetched
+
+
+def test_reconcile_reads_behind_the_watermark_and_merges(monkeypatch):
+    rows = [
+        [(1, "A-01", "A", "G", "available", T0), (2, "A-02", "A", "G", "available", T0 + timedelta(minutes=1))],
+        [(1, "A-01", "A", "G", "occupied", T0 + timedelta(minutes=2)),
+         (3, "A-03", "A", "G", "available", T0 + timedelta(minutes=3))],
+    ]
+    index, fetched = _loaded(monkeypatch, rows)
+    assert index.first_free("A", "G")["code"] == "A-01"
+
+    assert index.reconcile() == 2
+    # Re-reads a little before the newest change seen, for commits that landed late
+    assert fetched == [None, T0 + timedelta(minutes=1) - slot_index._RECONCILE_OVERLAP]
+    assert [s["code"] for s in index.available("A")] == ["A-02", "A-03"]
+    assert index.export()[1] == T0 + timedelta(minutes=3)
+
+
+def test_reapplying_overlap_rows_is_harmless(monkeypatch):
+    row = (1, "A-01", "A", "G", "available", T0)
+    index, _ = _loaded(monkeypatch, [[row], [row]])
+    version = index.changes_since()["version"]
+    index.reconcile()
+    assert index.free_count() == 1
+    assert index.changes_since(version, index.changes_since()["epoch"])["slots"] == []
+
+
+def test_first_free_across_buckets_takes_lowest_code(monkeypatch):
+    index, _ = _loaded(monkeypatch, [[
+        (1, "B-01", "B", "1", "available", T0),
+        (2, "A-05", "A", "2", "available", T0),
+        (3, "A-01", "A", "1", "occupied", T0),
+    ]])
+    assert index.first_free()["code"] == "A-05"
+    index.mark(3, "available")
+    assert index.first_free("A")["code"] == "A-01"
+    assert index.free_count("A") == 2
@@ -0,0 +1,202 @@
+"""Concurrency check for ParkingService.allocate_next.
+
+Creates a throwaway member with ``--vehicles`` vehicles and a zone of
+``--slots`` slots, then has ``--threads`` threads (each its own "gate")
+auto-allocate every vehicle at once. Afterwards it checks that no slot holds
+two active sessions, that every occupied slot has exactly one, and that the
+number of successful allocations equals min(vehicles, slots). Needs a live
+database; the fixture rows are removed afterwards unless ``--keep``, and the
+KPI counters, rollups and data versions are rebuilt either way.
+
+    python tools/allocation_stress.py [--threads 16] [--vehicles 200] [--slots 150]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db.connection import POOL_SIZE, pooled_connection  # noqa: E402
+from services.parking_service import ParkingService  # noqa: E402
+
+
+def _setup(tag: str, vehicles: int, slots: int) -> tuple[int, list[int], str]:
+    zone = f"ST{tag[:6]}"
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO users (college_id, full_name, email, password_hash, role) VALUES (%s,%s,%s,%s,'guard')",
+                (f"stress-{tag}", "Allocation Stress", f"stress-{tag}@example.invalid", "!"),
+            )
+            user_id = cur.lastrowid
+            vehicle_ids = []
+            for i in range(vehicles):
+                cur.execute(
+                    "INSERT INTO vehicles (user_id, plate_number, is_active) VALUES (%s,%s,1)",
+                    (user_id, f"ZZ{tag[:6]}{i:05d}"),
+                )
+                vehicle_ids.append(cur.lastrowid)
+            cur.executemany(
+                "INSERT INTO slots (code, zone, level, status) VALUES (%s,%s,'S','available')",
+                [(f"{zone}-{i:04d}", zone) for i in range(slots)],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return user_id, vehicle_ids, zone
+
+
+def _verify(zone: str) -> list[str]:
+    problems = []
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT s.code, COUNT(pe.id)
+            FROM slots s JOIN parking_events pe ON pe.slot_id=s.id AND pe.status='active'
+            WHERE s.zone=%s GROUP BY s.id, s.code HAVING COUNT(pe.id) > 1
+            """,
+            (zone,),
+        )
+        for code, n in cur.fetchall():
+            problems.append(f"slot {code} has {n} active sessions")
+        cur.execute(
+            """
+            SELECT s.code FROM slots s
+            LEFT JOIN parking_events pe ON pe.slot_id=s.id AND pe.status='active'
+            WHERE s.zone=%s AND s.status='occupied' AND pe.id IS NULL
+            """,
+            (zone,),
+        )
+        for (code,) in cur.fetchall():
+            problems.append(f"slot {code} is occupied without an active session")
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM parking_events pe JOIN slots s ON s.id=pe.slot_id
+            LEFT JOIN active_sessions a ON a.event_id=pe.id
+            WHERE s.zone=%s AND pe.status='active' AND a.event_id IS NULL
+            """,
+            (zone,),
+        )
+        (orphans,) = cur.fetchone()
+        if orphans:
+            problems.append(f"{orphans} active events have no active_sessions row")
+        cur.close()
+    return problems
+
+
+def _cleanup(user_id: int, zone: str) -> None:
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM active_sessions WHERE user_id=%s", (user_id,))
+            cur.execute(
+                "DELETE pe FROM parking_events pe JOIN vehicles v ON v.id=pe.vehicle_id WHERE v.user_id=%s",
+                (user_id,),
+            )
+            cur.execute("DELETE FROM vehicles WHERE user_id=%s", (user_id,))
+            cur.execute("DELETE FROM slots WHERE zone=%s", (zone,))
+            cur.execute("DELETE FROM users WHERE id=%s", (user_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def _repair() -> None:
+    """Rebuild KPI counters and rollups from the tables and bump every data version.
+
+    The fixture rows are written and deleted directly, bypassing the
+    bookkeeping the services do, so without this the dashboards would keep
+    counting them.
+    """
+    from services.data_versions import DOMAINS, touch
+    from services.kpi_service import KPIService
+    from services.rollup_service import RollupService
+
+    KPIService().reconcile()
+    RollupService().backfill()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            touch(cur, *DOMAINS)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--vehicles", type=int, default=200)
+    ap.add_argument("--slots", type=int, default=150)
+    ap.add_argument("--keep", action="store_true", help="leave the fixture rows in place")
+    args = ap.parse_args(argv)
+    if args.threads > POOL_SIZE:
+        print(f"Note: {args.threads} threads share {POOL_SIZE} pooled connections (PARKING_DB_POOL_SIZE)")
+
+    tag = uuid.uuid4().hex
+    user_id, vehicle_ids, zone = _setup(tag, args.vehicles, args.slots)
+    parking = ParkingService()
+    claimed: list[dict] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def _gate(vehicle_id: int) -> None:
+        try:
+            slot = parking.allocate_next(vehicle_id, user_id, zone=zone, strict=True)
+        except Exception as e:
+            with lock:
+                errors.append(f"vehicle {vehicle_id}: {e}")
+            return
+        if slot is not None:
+            with lock:
+                claimed.append(slot)
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as ex:
+            list(ex.map(_gate, vehicle_ids))
+        elapsed = time.perf_counter() - started
+
+        problems = _verify(zone) + errors
+        codes = [s["code"] for s in claimed]
+        if len(codes) != len(set(codes)):
+            problems.append("the same slot was returned to two gates")
+        expected = min(args.vehicles, args.slots)
+        if len(claimed) != expected:
+            problems.append(f"{len(claimed)} allocations succeeded, expected {expected}")
+        print(f"{len(claimed)} allocations from {args.threads} threads in {elapsed:.2f} s "
+              f"({len(claimed) / elapsed if elapsed else 0:.0f}/s)")
+    finally:
+        try:
+            if not args.keep:
+                _cleanup(user_id, zone)
+        finally:
+            _repair()
+
+    for p in problems:
+        print(f"FAIL: {p}")
+    if not problems:
+        print("OK: no double-booking")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
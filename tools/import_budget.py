@@ -0,0 +1,68 @@
+"""Startup import-time budget check.
+
+Imports ``app`` in a fresh interpreter with ``-X importtime`` and fails if
+the total exceeds the budget or if a heavy module that should be loaded
+lazily (OCR model, DB driver, OpenCV) shows up on the startup path.
+
+    python tools/import_budget.py [--budget-ms 500] [--top 10]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported before the user reaches a dashboard
+LAZY_MODULES = ("paddleocr", "paddle", "mysql.connector", "cv2")
+
+
+def measure(module: str = "app") -> list[tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) for every import of ``module``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        # One separator space, then two spaces of indentation per nesting level
+        rows.append((name.rstrip()[1:], int(self_us), int(cum_us)))
+    return rows
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--budget-ms", type=float, default=500.0)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    rows = measure()
+    # Top-level imports carry no indentation; their cumulative times add up to the total
+    total_us = sum(cum for name, _, cum in rows if not name.startswith(" "))
+    print(f"Startup imports: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, _, cum in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"  {cum / 1000:8.1f} ms  {name.strip()}")
+
+    ok = True
+    loaded = {name.strip() for name, _, _ in rows}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        ok = False
+    if total_us / 1000 > args.budget_ms:
+        print("FAIL: startup import budget exceeded")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""OCR latency/accuracy benchmark on synthetic plates.
+
+Renders Indian-format plates with PIL (random fonts, rotation, blur, noise
+and uneven lighting), reads them back through ``PlateOCR.extract_plate`` or
+the OCR worker pool, and reports latency percentiles, throughput per core,
+exact-match rate and character error rate.
+
+    python tools/ocr_benchmark.py [--count 200] [--workers 0] [--json out.json]
+    python tools/ocr_benchmark.py --baseline out.json   # fail on regression
+
+Files are named ``plate_0001.png`` so the no-model fallback (which reads the
+file name) scores zero; ``--name-by-plate`` puts the plate in the name to
+exercise the fallback path instead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.ocr_service import _PLATE_RE, PlateOCR  # noqa: E402
+
+STATE_CODES = ("AP", "DL", "GJ", "HR", "KA", "KL", "MH", "MP", "PB", "RJ", "TN", "TS", "UP", "WB")
+FONT_CANDIDATES = (
+    "DejaVuSans-Bold.ttf",
+    "DejaVuSansMono-Bold.ttf",
+    "LiberationSans-Bold.ttf",
+    "LiberationMono-Bold.ttf",
+    "arialbd.ttf",
+    "Arial Bold.ttf",
+)
+
+
+def random_plate(rng: random.Random) -> str:
+    plate = (
+        rng.choice(STATE_CODES)
+        + str(rng.randint(1, 99)).zfill(rng.choice((1, 2)))
+        + "".join(rng.choices(string.ascii_uppercase, k=rng.choice((0, 1, 2, 2))))
+        + str(rng.randint(1, 9999)).zfill(4)
+    )
+    assert _PLATE_RE.fullmatch(plate), plate
+    return plate
+
+
+def _fonts(size: int) -> list:
+    from PIL import ImageFont
+
+    fonts = []
+    for name in FONT_CANDIDATES:
+        try:
+            fonts.append(ImageFont.truetype(name, size))
+        except OSError:
+            continue
+    if not fonts:
+        try:
+            fonts.append(ImageFont.load_default(size=size))  # Pillow >= 10.1
+        except TypeError:
+            fonts.append(ImageFont.load_default())
+    return fonts
+
+
+def render_plate(text: str, rng: random.Random, fonts: list):
+    """Return an RGB scene containing one plate with the given text."""
+    from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+    font = rng.choice(fonts)
+    left, top, right, bottom = font.getbbox(text)
+    tw, th = right - left, bottom - top
+    pw, ph = tw + 40, th + 30
+    plate = Image.new("RGB", (pw, ph), (245, 245, 240))
+    draw = ImageDraw.Draw(plate)
+    draw.rectangle((2, 2, pw - 3, ph - 3), outline=(20, 20, 20), width=3)
+    draw.text((20 - left, 15 - top), text, font=font, fill=(15, 15, 15))
+
+    shade = rng.randint(40, 160)
+    background = (shade, shade, max(0, min(255, shade + rng.randint(-20, 20))))
+    plate = plate.rotate(rng.uniform(-8.0, 8.0), resample=Image.BICUBIC, expand=True, fillcolor=background)
+    scene = Image.new("RGB", (pw * 2, ph * 3), background)
+    scene.paste(plate, (rng.randint(0, scene.width - plate.width), rng.randint(0, scene.height - plate.height)))
+
+    # Uneven lighting: a horizontal brightness ramp, then a global exposure change
+    ramp = Image.linear_gradient("L").rotate(rng.choice((90, 270))).resize(scene.size)
+    dark = ImageEnhance.Brightness(scene).enhance(rng.uniform(0.4, 0.8))
+    scene = Image.composite(scene, dark, ramp)
+    scene = ImageEnhance.Brightness(scene).enhance(rng.uniform(0.7, 1.3))
+    scene = ImageEnhance.Contrast(scene).enhance(rng.uniform(0.6, 1.2))
+
+    noise = Image.effect_noise(scene.size, rng.uniform(8.0, 30.0)).convert("RGB")
+    scene = Image.blend(scene, noise, rng.uniform(0.05, 0.2))
+    return scene.filter(ImageFilter.GaussianBlur(rng.uniform(0.0, 1.6)))
+
+
+def generate(out_dir: str, count: int, seed: int, name_by_plate: bool = False) -> list[tuple[str, str]]:
+    """Write ``count`` plate images to ``out_dir``; return (path, label) pairs."""
+    rng = random.Random(seed)
+    fonts = _fonts(48)
+    samples = []
+    for i in range(count):
+        label = random_plate(rng)
+        name = f"{i:04d}_{label}.png" if name_by_plate else f"plate_{i:04d}.png"
+        path = os.path.join(out_dir, name)
+        render_plate(label, rng, fonts).save(path)
+        samples.append((path, label))
+    return samples
+
+
+def _edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank, so p99 of a small run is an observed latency
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)
+    return sorted_values[rank - 1]
+
+
+def run(samples: list[tuple[str, str]], detect: bool, workers: int = 0) -> dict:
+    if workers:
+        from services.ocr_pool import OCRWorkerPool
+
+        reader = OCRWorkerPool(workers=workers, warmup_image=samples[0][0] if samples else None)
+        reader.warmup()
+        engine = "pool"
+    else:
+        # Cache off: every image is distinct anyway, and hashing would skew latency
+        reader = PlateOCR(detect_regions=detect, cache=False)
+        reader.warmup()
+        engine = "paddle" if reader._engine() is not None else "fallback"
+        if samples:
+            reader.extract_plate(samples[0][0])  # first inference is not representative
+
+    latencies: list[float] = []
+    reads: list[str] = []
+    started = time.perf_counter()
+    try:
+        if workers:
+            futures = []
+            for path, _ in samples:
+                futures.append((time.perf_counter(), reader.submit(path)))
+            for submitted, fut in futures:
+                plate, _ = fut.result()
+                # Queueing time is part of what a caller waits for under load
+                latencies.append((time.perf_counter() - submitted) * 1000.0)
+                reads.append(plate)
+        else:
+            for path, _ in samples:
+                t0 = time.perf_counter()
+                plate, _ = reader.extract_plate(path)
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                reads.append(plate)
+    finally:
+        if workers:
+            reader.close()
+    wall = time.perf_counter() - started
+
+    labels = [label for _, label in samples]
+    char_errors = sum(_edit_distance(read, label) for read, label in zip(reads, labels))
+    ordered = sorted(latencies)
+    throughput = len(samples) / wall if wall else 0.0
+    return {
+        "engine": engine,
+        "detect": detect,
+        "workers": workers or 1,
+        "images": len(samples),
+        "p50_ms": _percentile(ordered, 50),
+        "p95_ms": _percentile(ordered, 95),
+        "p99_ms": _percentile(ordered, 99),
+        "mean_ms": sum(ordered) / len(ordered) if ordered else 0.0,
+        "throughput_ips": throughput,
+        "throughput_per_core_ips": throughput / (workers or 1),
+        "exact_match": sum(r == l for r, l in zip(reads, labels)) / len(labels) if labels else 0.0,
+        "char_error_rate": char_errors / sum(len(l) for l in labels) if labels else 0.0,
+        "no_read": sum(not r for r in reads) / len(reads) if reads else 0.0,
+    }
+
+
+def check_regression(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    problems = []
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        if baseline.get(key) and result[key] > baseline[key] * (1 + tolerance):
+            problems.append(f"{key} {result[key]:.1f} ms vs baseline {baseline[key]:.1f} ms")
+    if result["exact_match"] < baseline.get("exact_match", 0.0) - 0.02:
+        problems.append(f"exact_match {result['exact_match']:.1%} vs baseline {baseline['exact_match']:.1%}")
+    if result["char_error_rate"] > baseline.get("char_error_rate", 1.0) + 0.02:
+        problems.append(f"char_error_rate {result['char_error_rate']:.1%} vs baseline {baseline['char_error_rate']:.1%}")
+    return problems
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--count", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="read through an OCR worker pool of this size (workers use PARKING_OCR_DETECT)")
+    ap.add_argument("--no-detect", dest="detect", action="store_false", help="skip plate localisation")
+    ap.add_argument("--name-by-plate", action="store_true", help="put the plate in the file name")
+    ap.add_argument("--keep", metavar="DIR", help="write the images here instead of a temp dir")
+    ap.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    ap.add_argument("--baseline", metavar="PATH", help="compare against an earlier --json report")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed latency growth vs baseline")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="plates_") as tmp:
+        out_dir = args.keep or tmp
+        os.makedirs(out_dir, exist_ok=True)
+        samples = generate(out_dir, args.count, args.seed, args.name_by_plate)
+        result = run(samples, args.detect, args.workers)
+
+    result.update(seed=args.seed, python=platform.python_version(), cpu_count=os.cpu_count())
+    print(
+        f"{result['engine']} ({'detect' if result['detect'] else 'full frame'}, {result['workers']} worker(s)): "
+        f"{result['images']} images\n"
+        f"  latency p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms  p99 {result['p99_ms']:.1f} ms\n"
+        f"  throughput {result['throughput_ips']:.1f} img/s ({result['throughput_per_core_ips']:.1f} per core)\n"
+        f"  exact {result['exact_match']:.1%}  CER {result['char_error_rate']:.1%}  no read {result['no_read']:.1%}"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = check_regression(result, json.load(f), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION: {p}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# ui/camera_preview.py (throttled live preview for CameraPipeline)
+from __future__ import annotations
+
+import tkinter as tk
+
+
+class CameraPreview:
+    """Paint the pipeline's newest frame onto a Canvas at most every ``interval_ms``.
+
+    Runs entirely on the Tk thread via ``after()``: it only reads the latest
+    frame from the ring buffer, so a slow redraw never backs up capture.
+    Plate reads from the pipeline are handed to ``on_plate(plate, conf, frame)``.
+    Stopping never joins the pipeline's threads on the Tk thread; ``stop``
+    signals them and polls with ``after()`` until they have exited.
+    """
+
+    def __init__(self, canvas: tk.Canvas, pipeline, on_plate, interval_ms: int = 100, on_stopped=None):
+        self.canvas = canvas
+        self.pipeline = pipeline
+        self.on_plate = on_plate
+        self.on_stopped = on_stopped
+        self.interval_ms = interval_ms
+        self._job = None
+        self._item = None
+        self._photo = None
+        self._last_index = -1
+
+    def start(self) -> None:
+        self.pipeline.start()
+        self._job = self.canvas.after(self.interval_ms, self._tick)
+
+    def stop(self, on_done=None) -> None:
+        """Stop drawing and signal the pipeline; ``on_done()`` runs once its threads have exited.
+
+        A camera read or OCR call in progress can take a while to return, so
+        wait for it before opening the camera again.
+        """
+        if self._job is not None:
+            self.canvas.after_cancel(self._job)
+            self._job = None
+        self.pipeline.stop(wait=False)
+        self._await_stop(on_done)
+
+    def _await_stop(self, on_done) -> None:
+        if not self.pipeline.running:
+            if on_done is not None:
+                on_done()
+            return
+        try:
+            self.canvas.after(self.interval_ms, self._await_stop, on_done)
+        except tk.TclError:
+            # Canvas destroyed; the daemon threads finish on their own
+            pass
+
+    @property
+    def active(self) -> bool:
+        return self._job is not None
+
+    def _tick(self) -> None:
+        self._job = None
+        try:
+            frame = self.pipeline.latest()
+            if frame is not None and frame.index != self._last_index:
+                self._last_index = frame.index
+                self._draw(frame.image)
+            for plate, conf, frame in self.pipeline.poll_results():
+                self.on_plate(plate, conf, frame)
+        except tk.TclError:
+            # Canvas destroyed (e.g. logout); shut the camera down without blocking Tk
+            self.pipeline.stop(wait=False)
+            return
+        if not self.pipeline.running:
+            if self.on_stopped is not None:
+                self.on_stopped(self.pipeline.last_error)
+            return
+        self._job = self.canvas.after(self.interval_ms, self._tick)
+
+    def _draw(self, image) -> None:
+        import cv2
+        from PIL import Image, ImageTk
+
+        w = max(self.canvas.winfo_width(), 1)
+        h = max(self.canvas.winfo_height(), 1)
+        # Shrink before colour conversion; full-resolution frames are costly to copy
+        ih, iw = image.shape[:2]
+        scale = min(w / iw, h / ih, 1.0)
+        if scale < 1.0:
+            image = cv2.resize(image, (max(int(iw * scale), 1), max(int(ih * scale), 1)), interpolation=cv2.INTER_AREA)
+        self._photo = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+        if self._item is None:
+            self._item = self.canvas.create_image(w // 2, h // 2, image=self._photo, anchor="center")
+        else:
+            self.canvas.coords(self._item, w // 2, h // 2)
+            self.canvas.itemconfig(self._item, image=self._photo)
@@ -0,0 +1,197 @@
+# ui/dispatch.py (background work for Tk callbacks)
+"""Run blocking work (DB, OCR, bcrypt) off the Tk thread.
+
+Tk is not thread-safe, so workers never touch widgets: finished futures
+are queued and drained on the Tk thread by an ``after()`` poll, which then
+calls ``on_done``/``on_error``. Tasks submitted with the same ``key``
+supersede each other, so a slow stale result never overwrites a newer one.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from tkinter import TclError, messagebox
+
+log = logging.getLogger(__name__)
+
+SLOW_TASK_SECONDS = 0.5
+
+
+class Task:
+    def __init__(self, name: str, key, future: Future | None, submitted_at: float):
+        self.name = name
+        self.key = key
+        self.future = future
+        self.submitted_at = submitted_at
+        self.started_at: float | None = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Drop the result; also stops the work if it has not started yet."""
+        self.cancelled = True
+        self.future.cancel()
+
+
+class TkDispatcher:
+    def __init__(self, root, max_workers: int = 4, poll_ms: int = 30):
+        self._root = root
+        self._poll_ms = poll_ms
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-worker")
+        self._processes: ProcessPoolExecutor | None = None
+        self._done: queue.SimpleQueue = queue.SimpleQueue()
+        self._pending: dict[Task, tuple] = {}  # task -> (on_done, on_error, busy widgets)
+        self._latest: dict[object, Task] = {}
+        self._busy_count: dict[object, int] = {}
+        self._busy_state: dict[object, bool] = {}
+        self._timings: dict[str, list[float]] = {}  # name -> [count, total, max]
+        self._lock = threading.Lock()
+        self._polling = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, busy=(),
+               name: str | None = None, process: bool = False, **kwargs) -> Task:
+        """Run ``fn(*args, **kwargs)`` in a worker and deliver the result to the Tk thread.
+
+        ``process=True`` uses a process pool for CPU-bound, picklable work.
+        ``busy`` widgets are disabled (and the cursor set to busy) while running.
+        """
+        name = name or getattr(fn, "__name__", "task")
+        if key is not None:
+            stale = self._latest.get(key)
+            if stale is not None:
+                stale.cancel()
+
+        task = Task(name, key, None, time.perf_counter())
+        if process:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=2)
+            task.future = self._processes.submit(fn, *args, **kwargs)
+        else:
+            def _run():
+                task.started_at = time.perf_counter()
+                return fn(*args, **kwargs)
+
+            task.future = self._threads.submit(_run)
+
+        if key is not None:
+            self._latest[key] = task
+        self._pending[task] = (on_done, on_error, tuple(busy))
+        self._set_busy(busy, True)
+        task.future.add_done_callback(lambda _f, t=task: self._done.put(t))
+        self._ensure_polling()
+        return task
+
+    def cancel(self, key) -> None:
+        task = self._latest.get(key)
+        if task is not None:
+            task.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"count": int(c), "avg_ms": (t / c * 1000.0) if c else 0.0, "max_ms": m * 1000.0}
+                for name, (c, t, m) in self._timings.items()
+            }
+
+    def shutdown(self) -> None:
+        for task in list(self._pending):
+            task.cancel()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    # Tk-thread side
+    def _ensure_polling(self) -> None:
+        if not self._polling:
+            self._polling = True
+            self._root.after(self._poll_ms, self._drain)
+
+    def _drain(self) -> None:
+        try:
+            while True:
+                try:
+                    task = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._finish(task)
+                except Exception:
+                    # One broken callback must not stop every later result from being delivered
+                    log.exception("Callback for task '%s' failed", task.name)
+        finally:
+            self._polling = False
+            if self._pending:
+                try:
+                    self._root.after(self._poll_ms, self._drain)
+                    self._polling = True
+                except TclError:
+                    # Window destroyed
+                    pass
+
+    def _finish(self, task: Task) -> None:
+        on_done, on_error, busy = self._pending.pop(task, (None, None, ()))
+        # Re-enable widgets before any callback runs, so a failing one cannot leave them disabled
+        self._set_busy(busy, False)
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        if task.cancelled or task.future.cancelled():
+            return
+        self._record(task)
+        try:
+            result = task.future.result()
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                messagebox.showerror(task.name.replace("_", " ").strip().title(), str(e))
+            return
+        if on_done is not None:
+            try:
+                on_done(result)
+            except TclError:
+                # The screen that asked for this result was closed meanwhile
+                pass
+
+    def _record(self, task: Task) -> None:
+        now = time.perf_counter()
+        run = now - (task.started_at or task.submitted_at)
+        with self._lock:
+            entry = self._timings.setdefault(task.name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += run
+            entry[2] = max(entry[2], run)
+        if run > SLOW_TASK_SECONDS:
+            log.warning("Task '%s' took %.2fs (queued %.2fs)", task.name, run, now - task.submitted_at - run)
+
+    def _set_busy(self, widgets, busy: bool) -> None:
+        for w in widgets:
+            n = self._busy_count.get(w, 0) + (1 if busy else -1)
+            self._busy_count[w] = max(n, 0)
+            try:
+                if busy and n == 1:
+                    self._busy_state[w] = w.instate(["disabled"])
+                    w.state(["disabled"])
+                elif not busy and n <= 0:
+                    if not self._busy_state.pop(w, False):
+                        w.state(["!disabled"])
+                    self._busy_count.pop(w, None)
+            except Exception:
+                # Widget destroyed while the task was running
+                self._busy_count.pop(w, None)
+                self._busy_state.pop(w, None)
+        try:
+            self._root.configure(cursor="watch" if self._pending else "")
+        except Exception:
+            pass
+
+
+def get_dispatcher(widget) -> TkDispatcher:
+    """Return the dispatcher shared by every widget under ``widget``'s toplevel."""
+    root = widget.winfo_toplevel()
+    dispatcher = getattr(root, "_dispatcher", None)
+    if dispatcher is None:
+        dispatcher = TkDispatcher(root)
+        root._dispatcher = dispatcher
+    return dispatcher
@@ -0,0 +1,173 @@
+# ui/live.py (redraw screens when the event bus reports changes)
+from __future__ import annotations
+
+import threading
+from tkinter import TclError
+
+from services.data_versions import DOMAINS
+from services.event_bus import get_event_bus
+from services.registry import get_service
+from ui.dispatch import get_dispatcher
+
+# How often pending changes are checked on the Tk thread (ms)
+LIVE_REFRESH_MS = 300
+# How often the database's data versions are compared (ms); catches other PCs'
+# writes, this PC's arrive through the bus straight away
+VERSION_POLL_MS = 5000
+
+
+class VersionPoller:
+    """One ``has_changed_since`` read per interval for every live screen in a window.
+
+    The bus only hears this PC; other gates and the admin office are seen
+    through the data_versions table. The first read just records where
+    the versions stand, since screens load their data when built. Versions
+    carried by bus events are recorded through ``seen``, so a poll that
+    only reports changes the bus already delivered calls nobody.
+    """
+
+    def __init__(self, root, interval_ms: int = VERSION_POLL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()  # _tokens; ``seen`` runs on worker threads
+        self._tokens: dict[str, int] | None = None
+        self._watchers: list[tuple[frozenset, object]] = []
+        self._running = False
+
+    def watch(self, domains, callback):
+        """Call ``callback(changed_domains)`` on the Tk thread; returns an unwatch function."""
+        entry = (frozenset(domains), callback)
+        self._watchers.append(entry)
+        if not self._running:
+            self._running = True
+            self._poll()
+
+        def _unwatch():
+            if entry in self._watchers:
+                self._watchers.remove(entry)
+        return _unwatch
+
+    def seen(self, domain: str, version: int) -> None:
+        """Record a version already delivered by the bus; any thread.
+
+        Only the version right after the one held counts: after a gap, a
+        write from another PC is still unseen and the poll must report it.
+        """
+        with self._lock:
+            if self._tokens is not None and self._tokens.get(domain) == version - 1:
+                self._tokens[domain] = version
+
+    def _poll(self) -> None:
+        if not self._watchers:
+            # Nobody is watching: start from fresh versions next time
+            self._running = False
+            with self._lock:
+                self._tokens = None
+            return
+        with self._lock:
+            tokens = dict(self._tokens or {})
+        get_dispatcher(self.root).submit(
+            get_service("versions").has_changed_since, tokens,
+            on_done=self._changed, on_error=lambda _e: self._schedule(), key="data_versions",
+        )
+
+    def _changed(self, changed: dict[str, int]) -> None:
+        with self._lock:
+            first = self._tokens is None
+            tokens = self._tokens or {}
+            # Versions only grow; one at or below what we hold was seen on the bus meanwhile
+            new = {domain: v for domain, v in changed.items() if first or v > tokens.get(domain, 0)}
+            self._tokens = {**tokens, **new}
+        if new and not first:
+            for domains, callback in list(self._watchers):
+                hit = domains & new.keys()
+                if hit:
+                    callback(hit)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        try:
+            self.root.after(self.interval_ms, self._poll)
+        except TclError:
+            # Window closed
+            self._running = False
+
+
+def get_version_poller(widget) -> VersionPoller:
+    """Return the poller shared by every widget under ``widget``'s toplevel."""
+    root = widget.winfo_toplevel()
+    poller = getattr(root, "_version_poller", None)
+    if poller is None:
+        poller = VersionPoller(root)
+        root._version_poller = poller
+    return poller
+
+
+class LiveRefresh:
+    """Call ``refresh(topics)`` on the Tk thread after bus events on ``topics``.
+
+    Bus callbacks arrive on worker threads, so they only record the topic;
+    a Tk ``after`` loop picks the set up every ``delay_ms`` and calls
+    ``refresh`` once for however many events came in meanwhile. Topics that
+    are data domains are also watched through the window's VersionPoller.
+    ``match(topic, data)``, if given, drops bus events the screen does not
+    show (another member's car, say); polled changes carry no detail and
+    always pass. Changes seen while ``widget`` is hidden are held until it
+    is shown again. Unsubscribes when ``widget`` is destroyed.
+    """
+
+    def __init__(self, widget, topics, refresh, delay_ms: int = LIVE_REFRESH_MS, match=None):
+        self.widget = widget
+        self.refresh = refresh
+        self.delay_ms = delay_ms
+        self.match = match
+        self._lock = threading.Lock()  # _dirty is added to from worker threads
+        self._dirty: set[str] = set()
+        self._job = None
+        self._poller = None
+        bus = get_event_bus()
+        self._unsubscribe = [bus.subscribe(t, self._note) for t in topics]
+        domains = [t for t in topics if t in DOMAINS]
+        if domains:
+            self._poller = get_version_poller(widget)
+            self._unsubscribe.append(self._poller.watch(domains, self._note_domains))
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+        self._job = widget.after(delay_ms, self._poll)
+
+    def _note(self, topic: str, data: dict) -> None:
+        # Worker thread
+        version = data.get("version")
+        if version is not None and self._poller is not None and topic in DOMAINS:
+            self._poller.seen(topic, version)
+        if self.match is not None and not self.match(topic, data):
+            return
+        with self._lock:
+            self._dirty.add(topic)
+
+    def _note_domains(self, domains) -> None:
+        with self._lock:
+            self._dirty.update(domains)
+
+    def _poll(self) -> None:
+        self._job = None
+        if self._dirty and self.widget.winfo_ismapped():
+            with self._lock:
+                topics, self._dirty = self._dirty, set()
+            self.refresh(topics)
+        try:
+            self._job = self.widget.after(self.delay_ms, self._poll)
+        except TclError:
+            pass
+
+    def _on_destroy(self, event) -> None:
+        if event.widget is not self.widget:
+            return
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except TclError:
+                pass
+            self._job = None
@@ -0,0 +1,139 @@
+# ui/paged_tree.py (keyset-paged Treeview for long queues)
+from __future__ import annotations
+
+import os
+from tkinter import messagebox, ttk
+
+# Most rows one list keeps loaded; handling (removing) rows makes room for more
+PAGED_TREE_MAX_ROWS = int(os.environ.get("PARKING_PAGED_TREE_MAX_ROWS", "2000"))
+
+
+class PagedTree:
+    """Treeview that fetches its rows a page at a time as the user scrolls.
+
+    ``fetch(cursor, limit)`` runs on the dispatcher's workers and returns up
+    to ``limit`` dicts (each with an ``id``) after ``cursor``; ``cursor_of(row)``
+    gives the cursor that follows a row (None asks for the first page).
+    Rows past the scrolled-to point are never fetched, and loaded rows are
+    kept (Treeview items are not widgets, so each costs a small record) up to
+    ``max_rows``; scrolling stops fetching there until rows are removed.
+    """
+
+    def __init__(self, parent, columns, fetch, cursor_of, dispatcher, key: str, page_size: int = 100,
+                 height: int = 15, selectmode: str = "browse", on_error=None,
+                 max_rows: int = PAGED_TREE_MAX_ROWS):
+        self.fetch = fetch
+        self.cursor_of = cursor_of
+        self.dispatcher = dispatcher
+        self.key = key
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.on_error = on_error
+        self._columns = [c[0] for c in columns]
+        self._rows: dict[str, dict] = {}
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        self._generation = 0
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=self._columns, show="headings", height=height,
+                                 selectmode=selectmode)
+        for name, heading, width in columns:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, anchor="w")
+        self.scroll = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scroll.grid(row=0, column=1, sticky="ns")
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(0, weight=1)
+
+    def grid(self, **kwargs) -> None:
+        self.frame.grid(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._exhausted
+
+    @property
+    def full(self) -> bool:
+        """Whether ``max_rows`` are loaded, so scrolling fetches no further."""
+        return len(self._rows) >= self.max_rows
+
+    # Loading
+    def reload(self) -> None:
+        """Drop what is loaded and fetch the first page again."""
+        self._generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self._rows.clear()
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        self.load_more()
+
+    def load_more(self) -> None:
+        if self._loading or self._exhausted or self.full:
+            return
+        self._loading = True
+        generation = self._generation
+        limit = min(self.page_size, self.max_rows - len(self._rows))
+        self.dispatcher.submit(
+            self.fetch, self._cursor, limit,
+            on_done=lambda rows: self._append(rows, generation, limit),
+            on_error=lambda e: self._failed(e, generation),
+            key=self.key, name=f"{self.key}_page",
+        )
+
+    def _append(self, rows: list[dict], generation: int, limit: int) -> None:
+        if generation != self._generation:
+            return
+        self._loading = False
+        for row in rows:
+            iid = str(row["id"])
+            if iid in self._rows:
+                continue
+            self._rows[iid] = row
+            self.tree.insert("", "end", iid=iid, values=[self._text(row.get(c)) for c in self._columns])
+        if rows:
+            self._cursor = self.cursor_of(rows[-1])
+        if len(rows) < limit:
+            self._exhausted = True
+        elif self.tree.yview()[1] >= 1.0:
+            # The first page did not fill the view, so no scroll event will ask for more
+            self.tree.after_idle(self.load_more)
+
+    def _failed(self, e: Exception, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._loading = False
+        if self.on_error is not None:
+            self.on_error(e)
+        else:
+            messagebox.showerror("Load", str(e))
+
+    def _on_scroll(self, first, last) -> None:
+        self.scroll.set(first, last)
+        # Fetch the next page a little before the bottom is reached
+        if float(last) > 0.9:
+            self.load_more()
+
+    @staticmethod
+    def _text(value) -> str:
+        return "" if value is None else str(value)
+
+    # Rows
+    def selected(self) -> list[dict]:
+        return [self._rows[iid] for iid in self.tree.selection() if iid in self._rows]
+
+    def remove(self, ids) -> None:
+        """Drop rows (e.g. once handled) without refetching."""
+        for row_id in ids:
+            iid = str(row_id)
+            if self._rows.pop(iid, None) is not None:
+                self.tree.delete(iid)
+        if not self._exhausted and self.tree.yview()[1] >= 1.0:
+            self.load_more()
@@ -0,0 +1,161 @@
+# ui/slot_map.py (live slot map on a single Canvas)
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+
+from ui.theme_light import PALETTE
+
+STATUS_COLOURS = {
+    "available": PALETTE["success"],
+    "occupied": PALETTE["danger"],
+    "reserved": PALETTE["warn"],
+}
+_UNKNOWN = PALETTE["muted"]
+
+
+class SlotMap:
+    """Every slot as one rectangle on a Canvas, grouped by zone and level.
+
+    Fed with ``ParkingService.slot_changes`` payloads: a status change is an
+    ``itemconfigure`` on the slot's rectangle plus its group header, so a
+    refresh costs a few canvas calls however large the lot is. The layout is
+    only rebuilt when slots appear or disappear, the filter changes or the
+    canvas is resized to a different number of columns.
+    """
+
+    def __init__(self, parent, cell: int = 22, gap: int = 4, width: int = 720, height: int = 420,
+                 on_hover=None):
+        self.cell = cell
+        self.gap = gap
+        self.on_hover = on_hover
+        self.zone = None
+        self.level = None
+        self.epoch = None
+        self.version = 0
+        self._slots: dict[int, tuple[str, str, str, str]] = {}  # id -> (code, zone, level, status)
+        self._items: dict[int, int] = {}  # slot id -> canvas item
+        self._by_item: dict[int, int] = {}
+        self._groups: dict[tuple[str, str], list[int]] = {}  # drawn groups -> slot ids
+        self._headers: dict[tuple[str, str], int] = {}
+        self._per_row = 0
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, width=width, height=height, bg=PALETTE["panel"], highlightthickness=0)
+        scroll = ttk.Scrollbar(self.frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        scroll.grid(row=0, column=1, sticky="ns")
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.canvas.tag_bind("slot", "<Enter>", self._on_enter)
+        self.canvas.tag_bind("slot", "<Leave>", self._on_leave)
+        self.canvas.bind("<Configure>", self._on_resize)
+
+    def grid(self, **kwargs) -> None:
+        self.frame.grid(**kwargs)
+
+    def groups(self) -> list[tuple[str, str]]:
+        return sorted({(zone, level) for _, zone, level, _ in self._slots.values()})
+
+    def set_filter(self, zone=None, level=None) -> None:
+        self.zone, self.level = zone, level
+        self._layout()
+
+    def apply(self, change: dict) -> None:
+        """Apply a ``slot_changes`` payload, redrawing only what changed."""
+        relayout = False
+        seen = set()
+        touched = []
+        for slot_id, code, zone, level, status in change["slots"]:
+            seen.add(slot_id)
+            new = (code, zone or "", level or "", status)
+            old = self._slots.get(slot_id)
+            if old == new:
+                continue
+            if old is None or old[:3] != new[:3]:
+                relayout = True
+            self._slots[slot_id] = new
+            touched.append(slot_id)
+        if change["full"]:
+            for slot_id in [i for i in self._slots if i not in seen]:
+                del self._slots[slot_id]
+                relayout = True
+        self.epoch, self.version = change["epoch"], change["version"]
+        if relayout:
+            self._layout()
+            return
+        groups = set()
+        for slot_id in touched:
+            item = self._items.get(slot_id)
+            if item is not None:
+                code, zone, level, status = self._slots[slot_id]
+                self.canvas.itemconfigure(item, fill=STATUS_COLOURS.get(status, _UNKNOWN))
+                groups.add((zone, level))
+        for key in groups:
+            self._update_header(key)
+
+    # Drawing
+    def _matches(self, zone: str, level: str) -> bool:
+        return (self.zone is None or zone == self.zone) and (self.level is None or level == self.level)
+
+    def _columns(self) -> int:
+        width = max(self.canvas.winfo_width(), int(self.canvas["width"]))
+        return max((width - 2 * self.gap) // (self.cell + self.gap), 1)
+
+    def _layout(self) -> None:
+        self.canvas.delete("all")
+        self._items.clear()
+        self._by_item.clear()
+        self._headers.clear()
+        self._groups = {}
+        # Group by (zone, level), slots in code order
+        order = sorted(self._slots.items(), key=lambda kv: (kv[1][1:3], kv[1][0], kv[0]))
+        for slot_id, (code, zone, level, _) in order:
+            if self._matches(zone, level):
+                self._groups.setdefault((zone, level), []).append(slot_id)
+        self._per_row = per_row = self._columns()
+        step = self.cell + self.gap
+        y = self.gap
+        for key, ids in self._groups.items():
+            self._headers[key] = self.canvas.create_text(
+                self.gap, y, anchor="nw", fill=PALETTE["text"], font=("Segoe UI Semibold", 10)
+            )
+            self._update_header(key)
+            y += 22
+            for i, slot_id in enumerate(ids):
+                x0 = self.gap + (i % per_row) * step
+                y0 = y + (i // per_row) * step
+                item = self.canvas.create_rectangle(
+                    x0, y0, x0 + self.cell, y0 + self.cell, outline="", tags=("slot",),
+                    fill=STATUS_COLOURS.get(self._slots[slot_id][3], _UNKNOWN),
+                )
+                self._items[slot_id] = item
+                self._by_item[item] = slot_id
+            y += -(-len(ids) // per_row) * step + 12
+        self.canvas.configure(scrollregion=(0, 0, self._per_row * step + self.gap, y))
+
+    def _update_header(self, key: tuple[str, str]) -> None:
+        ids = self._groups.get(key, ())
+        free = sum(1 for i in ids if self._slots[i][3] == "available")
+        zone, level = key
+        self.canvas.itemconfigure(
+            self._headers[key], text=f"Zone {zone or '—'} · Level {level or '—'}   {free}/{len(ids)} free"
+        )
+
+    def _on_resize(self, _event) -> None:
+        if self._slots and self._columns() != self._per_row:
+            self._layout()
+
+    def _on_leave(self, _event) -> None:
+        if self.on_hover is not None:
+            self.on_hover(None)
+
+    def _on_enter(self, _event) -> None:
+        if self.on_hover is None:
+            return
+        current = self.canvas.find_withtag("current")
+        slot_id = self._by_item.get(current[0]) if current else None
+        if slot_id is not None:
+            code, zone, level, status = self._slots[slot_id]
+            self.on_hover({"id": slot_id, "code": code, "zone": zone, "level": level, "status": status})